@@ -0,0 +1,109 @@
+require('dotenv').config();
+const fs = require('fs');
+const path = require('path');
+const mongoose = require('mongoose');
+const OrgActivity = require('./src/models/OrgActivity');
+const User = require('./src/models/User');
+
+/**
+ * Export daily organization emissions for the ML sector baselines.
+ *
+ * One CSV row per organization per day (the same daily totals
+ * /api/org/prediction sends as emission_history), with the sector and
+ * size the baselines are grouped by:
+ *
+ *   organization_id,sector,employee_count,annual_revenue,date,emission
+ *
+ * Usage:
+ *   node export-org-emissions.js [output.csv] [--days 365]
+ *
+ * Then, in CarbonMeter/ml/Carbon_meter:
+ *   python sector_baselines.py
+ */
+const DEFAULT_OUTPUT = path.join(__dirname, '..', 'ml', 'Carbon_meter', 'data', 'org_daily_emissions.csv');
+
+const csvValue = (value) => {
+  if (value === undefined || value === null) return '';
+  const text = String(value);
+  return /[",\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+};
+
+async function exportOrgEmissions() {
+  const args = process.argv.slice(2);
+  const daysIndex = args.indexOf('--days');
+  const days = daysIndex >= 0 ? parseInt(args[daysIndex + 1], 10) : 365;
+  const output = args.find((arg, i) => !arg.startsWith('--') && (daysIndex < 0 || i !== daysIndex + 1))
+    || DEFAULT_OUTPUT;
+
+  try {
+    await mongoose.connect(process.env.MONGODB_URI, {
+      maxPoolSize: 10,
+      serverSelectionTimeoutMS: 5000,
+    });
+
+    console.log('\n==========================================');
+    console.log('🏭 Organization Emissions Export');
+    console.log('==========================================\n');
+
+    const since = new Date();
+    since.setDate(since.getDate() - days);
+
+    const daily = await OrgActivity.aggregate([
+      { $match: { activityDate: { $gte: since } } },
+      {
+        $group: {
+          _id: {
+            userId: '$userId',
+            date: { $dateToString: { format: '%Y-%m-%d', date: '$activityDate' } },
+          },
+          emission: { $sum: { $ifNull: ['$emissionValue', 0] } },
+        }
+      },
+      { $sort: { '_id.userId': 1, '_id.date': 1 } },
+    ]);
+
+    const userIds = [...new Set(daily.map((row) => row._id.userId.toString()))];
+    const users = await User.find({ _id: { $in: userIds } })
+      .select('industryType organizationType numberOfEmployees annualRevenue');
+    const usersById = new Map(users.map((user) => [user._id.toString(), user]));
+
+    const lines = ['organization_id,sector,employee_count,annual_revenue,date,emission'];
+    let skipped = 0;
+    daily.forEach((row) => {
+      const id = row._id.userId.toString();
+      const user = usersById.get(id);
+      const sector = user?.industryType || user?.organizationType;
+      if (!sector) {
+        skipped++;
+        return;
+      }
+      lines.push([
+        id,
+        sector,
+        user.numberOfEmployees || '',
+        user.annualRevenue || '',
+        row._id.date,
+        row.emission,
+      ].map(csvValue).join(','));
+    });
+
+    fs.mkdirSync(path.dirname(output), { recursive: true });
+    fs.writeFileSync(output, lines.join('\n') + '\n');
+
+    console.log(`📝 Organizations: ${usersById.size}`);
+    console.log(`📅 Daily rows:    ${lines.length - 1} (last ${days} days)`);
+    if (skipped > 0) {
+      console.log(`⚠️  Skipped ${skipped} rows of organizations without a sector`);
+    }
+    console.log(`💾 Saved: ${output}`);
+    console.log('\n==========================================\n');
+
+    await mongoose.disconnect();
+    process.exit(0);
+  } catch (error) {
+    console.error('❌ Error:', error.message);
+    process.exit(1);
+  }
+}
+
+exportOrgEmissions();
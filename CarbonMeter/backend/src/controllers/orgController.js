@@ -1,6 +1,7 @@
 const OrgActivity = require('../models/OrgActivity');
 const CarbonCredit = require('../models/CarbonCredit');
 const User = require('../models/User');
+const { mlTraceHeaders } = require('../utils/requestId');
 const { MOCK_ORGANIZATIONS, SECTOR_BENCHMARKS, BEST_PRACTICES_CATALOG } = require('../data/mockOrganizations');
 const { 
   getDemoDataForSector, 
@@ -1780,7 +1781,8 @@ exports.getOrganizationPrediction = async (req, res) => {
       sector: sector,
       emission_history: emission_history,
       employee_count: employee_count,
-      revenue: 0,  // Optional field
+      revenue: 0,  // Optional field (model feature)
+      annual_revenue: user.annualRevenue || 0,  // Per-revenue peer benchmark only
       period: new Date().toISOString().slice(0, 7)  // YYYY-MM format
     };
     
@@ -1788,7 +1790,8 @@ exports.getOrganizationPrediction = async (req, res) => {
       // Call Python ML API
       const ML_API_URL = process.env.ML_API_URL || 'http://localhost:8000';
       const mlResponse = await axios.post(`${ML_API_URL}/predict/organization`, mlPayload, {
-        timeout: 5000
+        timeout: 5000,
+        headers: mlTraceHeaders(req, 5000),
       });
       
       // Save prediction to database
@@ -2194,7 +2197,8 @@ exports.fillMissingData = async (req, res) => {
         revenue: user.revenue || 1000000,
         period: 'missing-days'
       }, {
-        timeout: 10000
+        timeout: 10000,
+        headers: mlTraceHeaders(req, 10000),
       });
 
       const predictedEmission = mlResponse.data.predicted_emission || avgEmission;
@@ -4,6 +4,7 @@ const axios = require('axios');
 const auth = require('../middleware/auth');
 const OrgActivity = require('../models/OrgActivity');
 const OrganizationPrediction = require('../models/OrganizationPrediction');
+const { mlTraceHeaders } = require('../utils/requestId');
 
 const ML_API_URL = process.env.ML_API_URL || 'http://localhost:8001';
 
@@ -67,9 +68,10 @@ router.post('/predict', auth, async (req, res) => {
     try {
       mlResponse = await axios.post(`${ML_API_URL}/predict/org`, mlInput, {
         timeout: 15000, // 15 second timeout
+        headers: mlTraceHeaders(req, 15000),
       });
     } catch (mlError) {
-      console.error('ML API call failed:', mlError.message);
+      console.error(`ML API call failed [${req.id}]:`, mlError.message);
       
       // Fallback to cached prediction or mock data
       const cachedPrediction = await OrganizationPrediction.getLatestPrediction(orgId);
@@ -274,6 +276,7 @@ router.post('/save-prediction', auth, async (req, res) => {
         recommendations: predictionData.recommendations || [],
       }, {
         timeout: 10000,
+        headers: mlTraceHeaders(req, 10000),
       });
       console.log('Prediction saved to CSV successfully');
     } catch (csvError) {
@@ -362,7 +365,10 @@ router.get('/prediction/history', auth, async (req, res) => {
  */
 router.get('/ml-status', async (req, res) => {
   try {
-    const response = await axios.get(`${ML_API_URL}/health`, { timeout: 5000 });
+    const response = await axios.get(`${ML_API_URL}/health`, {
+      timeout: 5000,
+      headers: mlTraceHeaders(req, 5000),
+    });
     res.json({
       success: true,
       mlAvailable: true,
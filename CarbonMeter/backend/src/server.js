@@ -2,6 +2,7 @@ require('dotenv').config();
 const express = require('express');
 const cors = require('cors');
 const connectDB = require('./config/database');
+const { requestId } = require('./utils/requestId');
 
 const app = express();
 
@@ -20,6 +21,7 @@ app.use(
 
 // Middleware
 app.use(express.json());
+app.use(requestId); // X-Request-ID, forwarded to the ML services
 
 // Connect to Database and start server
 const startServer = async () => {
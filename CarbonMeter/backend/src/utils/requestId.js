@@ -0,0 +1,32 @@
+const crypto = require('crypto');
+
+/**
+ * Request ID middleware
+ * Reuses an incoming X-Request-ID (from a proxy or the frontend) or
+ * generates one, exposes it as req.id and echoes it on the response.
+ * The ML services log their spans under the same ID.
+ */
+const requestId = (req, res, next) => {
+  const incoming = req.get('X-Request-ID');
+  req.id = incoming && incoming.length <= 128 ? incoming : crypto.randomUUID();
+  res.set('X-Request-ID', req.id);
+  next();
+};
+
+/**
+ * Headers that carry the request ID (and our timeout) to the ML services
+ *
+ * @param {object} req - Express request (after the requestId middleware)
+ * @param {number} [timeoutMs] - The axios timeout of the call; the ML
+ *   service stops queueing the request well before it
+ * @returns {object} Headers for an axios call
+ */
+const mlTraceHeaders = (req, timeoutMs) => {
+  const headers = { 'X-Request-ID': req.id || crypto.randomUUID() };
+  if (timeoutMs) {
+    headers['X-Request-Timeout-Ms'] = String(timeoutMs);
+  }
+  return headers;
+};
+
+module.exports = { requestId, mlTraceHeaders };
@@ -0,0 +1,349 @@
+# ============================================================
+# CarbonMeter - Batch Daily Emission Calculator
+# - Non-interactive counterpart of carbonmeter_individual.py
+# - Takes a table of daily inputs (CSV / Parquet / DataFrame / Arrow)
+# - Applies the same emission factors column-wise (no Python loop)
+# - Emits the same 12-column rows as carbonmeter_daily_log.csv
+#
+# USAGE:
+#   python batch_calculator.py --input daily_inputs.csv
+#   python batch_calculator.py --input daily_inputs.parquet --output out.csv
+# ============================================================
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from carbonmeter_individual import (
+    FACTORS, CSV_FILE, LOG_HEADER, INPUTS_FILE, INPUT_HEADER
+)
+from sector_shares import SHARES_FILE, record_days
+
+# ======================
+# Input Schema
+# ======================
+# Column name -> default used when the column is absent
+INPUT_DEFAULTS = {
+    "private_mode": "Car",          # Bike / Car (or 1 / 2 as in the prompt)
+    "total_km": 0.0,
+    "public_ratio": 0.0,            # 0–1
+    "public_mode": "",              # bus / train / flight
+    "fuel_liters": 0.0,
+    "electricity_kwh": 0.0,
+    "lpg_kg": 0.0,
+    "induction_hours": 0.0,
+    "diet": "veg",                  # veg / non-veg
+    "waste_recycled": 0,            # 1 = yes, 0 = no
+    "data_gb": 0.0,
+    "online_orders": 0,
+    "solar_water_heater": 0,        # 1 = yes, 0 = no
+    "led_percentage": 0.0           # 0–100
+}
+
+PUBLIC_MODES = ["bus", "train", "flight"]
+
+
+def _to_frame(inputs):
+    """Accept a DataFrame, an Arrow table or a list of dicts."""
+    if isinstance(inputs, pd.DataFrame):
+        return inputs
+    if hasattr(inputs, "to_pandas"):  # pyarrow.Table / RecordBatch
+        return inputs.to_pandas()
+    return pd.DataFrame(inputs)
+
+
+def _column(df, name):
+    """Return an input column, filled with its default where missing."""
+    default = INPUT_DEFAULTS[name]
+    if name not in df.columns:
+        return pd.Series(default, index=df.index)
+    return df[name].fillna(default)
+
+
+def _numeric(df, name):
+    return pd.to_numeric(_column(df, name), errors="coerce").fillna(
+        INPUT_DEFAULTS[name]
+    ).to_numpy(dtype=np.float64)
+
+
+def _text(df, name):
+    """
+    Normalise a text column (strip + lower) without per-row string work.
+
+    Text inputs are low-cardinality (modes, diets), so only the distinct
+    values are normalised and the result is gathered back by code.
+
+    Returns:
+        tuple: (codes, normalised_values) with values[codes] == column
+    """
+    codes, uniques = pd.factorize(_column(df, name).astype(str))
+    values = pd.Index(uniques).str.strip().str.lower().to_numpy(dtype=object)
+    return codes, values
+
+
+def _diet_activities(diet_values):
+    """Map diets to factor activities (unknown diets count as veg)."""
+    return np.where(diet_values == "non-veg", "food_non_veg", "food_veg")
+
+
+def _transport_labels(is_bike, public_codes, public_values, public_pct):
+    """
+    Build "Car+bus (90% public)" labels, formatting each distinct
+    (private, public, percent) combination only once.
+    """
+    keys = pd.MultiIndex.from_arrays([is_bike, public_codes, public_pct])
+    combo_codes, combos = pd.factorize(keys)
+    labels = np.array([
+        f"{'Bike' if bike else 'Car'}+{public_values[code]} ({pct:.0f}% public)"
+        for bike, code, pct in combos
+    ], dtype=object)
+    return labels[combo_codes]
+
+
+def calculate_daily_batch(inputs, estimated=0, factors=None):
+    """
+    Compute daily emission log rows for many days at once.
+
+    Mirrors the interactive calculate_* functions in
+    carbonmeter_individual.py, one column per prompt.
+
+    Args:
+        inputs: DataFrame, pyarrow.Table or list of dicts with a
+            'date' column plus the columns in INPUT_DEFAULTS
+        estimated (int): Value written to the 'estimated' flag
+        factors (PinnedFactors): Factor version to apply
+            (default: the calculator's pinned FACTOR_VERSION)
+
+    Returns:
+        pd.DataFrame: Rows with exactly the LOG_HEADER columns
+    """
+    df = _to_frame(inputs)
+    factors = FACTORS if factors is None else factors
+
+    if "date" not in df.columns:
+        raise ValueError("Missing required column: date")
+
+    grid_ef = factors.factor("electricity")
+
+    # Transport
+    private_codes, private_values = _text(df, "private_mode")
+    is_bike = np.isin(private_values, ["1", "bike"])[private_codes]
+
+    public_codes, public_values = _text(df, "public_mode")
+    public_ratio = _numeric(df, "public_ratio")
+    public_km = _numeric(df, "total_km") * public_ratio
+
+    # Unknown modes (and "") emit nothing, as in calculate_transport()
+    known_modes = np.where(np.isin(public_values, PUBLIC_MODES), public_values, "")
+    public_ef = factors.lookup(known_modes, default=0.0)[public_codes]
+    transport = (
+        _numeric(df, "fuel_liters") * factors.factor("petrol")
+        + public_km * public_ef
+    )
+
+    transport_mode = _transport_labels(
+        is_bike, public_codes, public_values, np.round(public_ratio * 100)
+    )
+
+    # Electricity & cooking
+    electricity = _numeric(df, "electricity_kwh") * grid_ef
+    cooking = (
+        _numeric(df, "lpg_kg") * factors.factor("lpg")
+        + _numeric(df, "induction_hours") * 1.5 * grid_ef
+    )
+
+    # Food, waste & digital
+    diet_codes, diet_values = _text(df, "diet")
+    food = factors.lookup(_diet_activities(diet_values))[diet_codes]
+    waste = np.where(_numeric(df, "waste_recycled") == 1, -0.2, 0.0)
+    digital = (
+        _numeric(df, "data_gb") * factors.factor("data")
+        + _numeric(df, "online_orders") * factors.factor("online_order")
+    )
+
+    # Avoided emissions
+    avoided = (
+        np.where(_numeric(df, "solar_water_heater") == 1, 1.5 * grid_ef, 0.0)
+        + (_numeric(df, "led_percentage") / 100) * 0.8
+    )
+
+    total = transport + electricity + cooking + food + waste + digital - avoided
+
+    return pd.DataFrame({
+        "date": df["date"].astype(str).to_numpy(),
+        "transport_mode": transport_mode,
+        "public_transport_ratio": public_ratio,
+        "transport_co2": np.round(transport, 2),
+        "electricity_co2": np.round(electricity, 2),
+        "cooking_co2": np.round(cooking, 2),
+        "food_co2": np.round(food, 2),
+        "waste_co2": np.round(waste, 2),
+        "digital_co2": np.round(digital, 2),
+        "avoided_co2": np.round(avoided, 2),
+        "total_co2": np.round(total, 2),
+        "estimated": estimated
+    }, columns=LOG_HEADER)
+
+
+def factor_usage(inputs, activities):
+    """
+    Flag the rows whose calculation uses any of the given factors.
+
+    Used by recompute_emissions.py to re-derive only the rows a
+    factor change actually affects (e.g. only rows with electricity).
+
+    Args:
+        inputs: Raw daily inputs (same shape as calculate_daily_batch)
+        activities: Factor activity names (see emission_factors.csv)
+
+    Returns:
+        np.ndarray: Boolean mask aligned with the input rows
+    """
+    df = _to_frame(inputs)
+    activities = set(activities)
+    used = np.zeros(len(df), dtype=bool)
+
+    if "electricity" in activities:
+        used |= (
+            (_numeric(df, "electricity_kwh") != 0)
+            | (_numeric(df, "induction_hours") != 0)
+            | (_numeric(df, "solar_water_heater") == 1)
+        )
+
+    for activity, column in (
+        ("petrol", "fuel_liters"),
+        ("lpg", "lpg_kg"),
+        ("data", "data_gb"),
+        ("online_order", "online_orders")
+    ):
+        if activity in activities:
+            used |= _numeric(df, column) != 0
+
+    modes = activities.intersection(PUBLIC_MODES)
+    if modes:
+        public_codes, public_values = _text(df, "public_mode")
+        public_km = _numeric(df, "total_km") * _numeric(df, "public_ratio")
+        used |= np.isin(public_values, list(modes))[public_codes] & (public_km != 0)
+
+    if activities.intersection(["food_veg", "food_non_veg"]):
+        diet_codes, diet_values = _text(df, "diet")
+        used |= np.isin(_diet_activities(diet_values), list(activities))[diet_codes]
+
+    return used
+
+
+def _upsert_by_date(new_rows, csv_file, header):
+    """
+    Upsert rows keyed by date in one pass.
+
+    Same semantics as update_csv(): a row whose date already exists
+    replaces it in place, new dates are appended.
+
+    Returns:
+        tuple: (rows_updated, rows_appended)
+    """
+    new_rows = new_rows.drop_duplicates("date", keep="last").astype(str)
+
+    if not os.path.exists(csv_file):
+        new_rows.to_csv(csv_file, index=False, columns=header)
+        return 0, len(new_rows)
+
+    # Read as text so untouched rows are written back byte-for-byte
+    existing = pd.read_csv(csv_file, dtype=str, keep_default_na=False)
+    existing = existing.reindex(columns=header, fill_value="")
+
+    by_date = new_rows.set_index("date")
+    replaced = existing["date"].isin(by_date.index)
+    value_cols = header[1:]
+    existing.loc[replaced, value_cols] = (
+        by_date.loc[existing.loc[replaced, "date"], value_cols].to_numpy()
+    )
+
+    appended = new_rows[~new_rows["date"].isin(existing["date"])]
+    final_df = pd.concat([existing, appended], ignore_index=True)
+    final_df.to_csv(csv_file, index=False, columns=header)
+
+    return int(replaced.sum()), len(appended)
+
+
+def write_daily_log(rows, csv_file=CSV_FILE):
+    """
+    Upsert computed rows into the daily log.
+
+    Args:
+        rows (pd.DataFrame): Output of calculate_daily_batch()
+        csv_file (str): Daily log path
+
+    Returns:
+        tuple: (rows_updated, rows_appended)
+    """
+    return _upsert_by_date(rows, csv_file, LOG_HEADER)
+
+
+def write_daily_inputs(inputs, factor_version=None, csv_file=INPUTS_FILE):
+    """
+    Store the raw quantities behind calculated rows, so they can be
+    re-derived when emission factors change.
+
+    Args:
+        inputs: Same inputs passed to calculate_daily_batch()
+        factor_version (str): Version the rows were calculated with
+        csv_file (str): Raw inputs path
+
+    Returns:
+        tuple: (rows_updated, rows_appended)
+    """
+    df = _to_frame(inputs)
+    raw = pd.DataFrame({"date": df["date"].astype(str)})
+    for name in INPUT_HEADER[1:-1]:
+        raw[name] = _column(df, name).to_numpy()
+    raw["factor_version"] = factor_version or FACTORS.version
+    return _upsert_by_date(raw, csv_file, INPUT_HEADER)
+
+
+def load_inputs(path):
+    """Load daily inputs from CSV or Parquet."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Input file not found: {path}")
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute daily CarbonMeter log rows from bulk inputs"
+    )
+    parser.add_argument("--input", required=True,
+                        help="CSV or Parquet file of daily inputs")
+    parser.add_argument("--output", default=CSV_FILE,
+                        help="Daily log to update (default: carbonmeter_daily_log.csv)")
+    parser.add_argument("--inputs-log", default=INPUTS_FILE,
+                        help="Raw inputs file (default: carbonmeter_daily_inputs.csv)")
+    parser.add_argument("--shares", default=SHARES_FILE,
+                        help="Sector share store (default: carbonmeter_sector_shares.npz)")
+    args = parser.parse_args()
+
+    inputs = load_inputs(args.input)
+
+    start = time.perf_counter()
+    rows = calculate_daily_batch(inputs)
+    elapsed = time.perf_counter() - start
+
+    updated, appended = write_daily_log(rows, args.output)
+    write_daily_inputs(inputs, csv_file=args.inputs_log)
+    record_days(rows, args.shares, log_file=args.output)
+
+    print("\n✅ Batch calculation completed")
+    print(f"📅 Days processed : {len(rows)}")
+    print(f"⚡ Throughput     : {len(rows) / max(elapsed, 1e-9):,.0f} days/s")
+    print(f"📝 Rows updated   : {updated}")
+    print(f"➕ Rows appended  : {appended}")
+    print(f"💾 Log file       : {args.output}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,23 +2,32 @@ import csv
 from datetime import datetime
 import os
 
+import ml_root  # noqa: F401  (shared modules in CarbonMeter/ml)
+
+from emission_factors import pinned
+from sector_shares import DEFAULT_USER, load_or_seed
+
 # ======================
 # Emission Factors (India)
 # ======================
-GRID_EF = 0.82
-PETROL_EF = 2.31
-LPG_EF = 3.13
+# Pinned so values in carbonmeter_daily_log.csv stay reproducible
+FACTOR_VERSION = "2024.1"
+FACTORS = pinned(FACTOR_VERSION)
 
-BUS_EF = 0.041
-TRAIN_EF = 0.035
-FLIGHT_EF = 0.15
+GRID_EF = FACTORS.factor("electricity")
+PETROL_EF = FACTORS.factor("petrol")
+LPG_EF = FACTORS.factor("lpg")
 
-DATA_EF = 0.06
-ONLINE_ORDER_EF = 0.5
+BUS_EF = FACTORS.factor("bus")
+TRAIN_EF = FACTORS.factor("train")
+FLIGHT_EF = FACTORS.factor("flight")
+
+DATA_EF = FACTORS.factor("data")
+ONLINE_ORDER_EF = FACTORS.factor("online_order")
 
 FOOD_EF = {
-    "veg": 2.0,
-    "non-veg": 5.0
+    "veg": FACTORS.factor("food_veg"),
+    "non-veg": FACTORS.factor("food_non_veg")
 }
 
 # ======================
@@ -27,10 +36,28 @@ FOOD_EF = {
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CSV_FILE = os.path.join(BASE_DIR, "carbonmeter_daily_log.csv")
 
+LOG_HEADER = [
+    "date", "transport_mode", "public_transport_ratio",
+    "transport_co2", "electricity_co2", "cooking_co2",
+    "food_co2", "waste_co2", "digital_co2",
+    "avoided_co2", "total_co2", "estimated"
+]
+
+# Raw activity quantities behind each calculated row, so log values
+# can be re-derived when emission factors change (recompute_emissions.py)
+INPUTS_FILE = os.path.join(BASE_DIR, "carbonmeter_daily_inputs.csv")
+
+INPUT_HEADER = [
+    "date", "private_mode", "total_km", "public_ratio", "public_mode",
+    "fuel_liters", "electricity_kwh", "lpg_kg", "induction_hours",
+    "diet", "waste_recycled", "data_gb", "online_orders",
+    "solar_water_heater", "led_percentage", "factor_version"
+]
+
 # ======================
 # Transport Calculation
 # ======================
-def calculate_transport():
+def calculate_transport(raw=None):
     print("\nPrivate Vehicle Type:")
     print("1. Bike")
     print("2. Car")
@@ -58,6 +85,13 @@ def calculate_transport():
     else:
         public_emission = 0
 
+    if raw is not None:
+        raw.update(
+            private_mode=private_mode, total_km=total_km,
+            public_ratio=public_ratio, public_mode=public_mode,
+            fuel_liters=fuel_liters
+        )
+
     total_transport = private_emission + public_emission
     transport_meta = f"{private_mode}+{public_mode} ({public_ratio*100:.0f}% public)"
 
@@ -66,51 +100,62 @@ def calculate_transport():
 # ======================
 # Other Calculations
 # ======================
-def calculate_electricity():
-    return float(input("Electricity used (kWh): ")) * GRID_EF
-
-def calculate_cooking():
+# Each calculator records its raw answers into `raw` when given one
+def calculate_electricity(raw=None):
+    kwh = float(input("Electricity used (kWh): "))
+    if raw is not None:
+        raw["electricity_kwh"] = kwh
+    return kwh * GRID_EF
+
+def calculate_cooking(raw=None):
     lpg = float(input("LPG used (kg): "))
     induction = float(input("Induction usage (hours): "))
+    if raw is not None:
+        raw.update(lpg_kg=lpg, induction_hours=induction)
     return (lpg * LPG_EF) + (induction * 1.5 * GRID_EF)
 
-def calculate_food():
-    return FOOD_EF.get(input("Diet type (veg / non-veg): ").strip().lower(), 2.0)
+def calculate_food(raw=None):
+    diet = input("Diet type (veg / non-veg): ").strip().lower()
+    if raw is not None:
+        raw["diet"] = diet
+    return FOOD_EF.get(diet, FOOD_EF["veg"])
 
-def calculate_waste():
-    return -0.2 if int(input("Waste recycled? (1=yes, 0=no): ")) == 1 else 0.0
+def calculate_waste(raw=None):
+    recycled = int(input("Waste recycled? (1=yes, 0=no): "))
+    if raw is not None:
+        raw["waste_recycled"] = recycled
+    return -0.2 if recycled == 1 else 0.0
 
-def calculate_digital():
+def calculate_digital(raw=None):
     data = float(input("Internet data used (GB): "))
     orders = int(input("Online orders today: "))
+    if raw is not None:
+        raw.update(data_gb=data, online_orders=orders)
     return (data * DATA_EF) + (orders * ONLINE_ORDER_EF)
 
-def calculate_avoided():
+def calculate_avoided(raw=None):
     avoided = 0
-    if int(input("Solar water heater used? (1=yes, 0=no): ")) == 1:
+    solar = int(input("Solar water heater used? (1=yes, 0=no): "))
+    if solar == 1:
         avoided += 1.5 * GRID_EF
 
     led = float(input("LED lighting percentage (0–100): "))
     avoided += (led / 100) * 0.8
+
+    if raw is not None:
+        raw.update(solar_water_heater=solar, led_percentage=led)
     return avoided
 
 # ======================
 # CSV Update Logic
 # ======================
 def update_csv(row, date_today):
-    header = [
-        "date", "transport_mode", "public_transport_ratio",
-        "transport_co2", "electricity_co2", "cooking_co2",
-        "food_co2", "waste_co2", "digital_co2",
-        "avoided_co2", "total_co2", "estimated"
-    ]
-
     rows = []
     if os.path.exists(CSV_FILE):
         with open(CSV_FILE, "r", newline="") as f:
             rows = list(csv.reader(f))
 
-    new_rows = [header]
+    new_rows = [LOG_HEADER]
     updated = False
 
     for r in rows[1:]:
@@ -126,19 +171,52 @@ def update_csv(row, date_today):
     with open(CSV_FILE, "w", newline="") as f:
         csv.writer(f).writerows(new_rows)
 
+def update_inputs(raw, date_today):
+    """Store the raw answers for date_today (same upsert as update_csv)."""
+    row = [date_today] + [raw.get(col, "") for col in INPUT_HEADER[1:-1]]
+    row.append(FACTOR_VERSION)
+
+    rows = []
+    if os.path.exists(INPUTS_FILE):
+        with open(INPUTS_FILE, "r", newline="") as f:
+            rows = list(csv.reader(f))
+
+    new_rows = [INPUT_HEADER]
+    updated = False
+
+    for r in rows[1:]:
+        if r and r[0] == date_today:
+            new_rows.append(row)
+            updated = True
+        elif r:
+            new_rows.append(r)
+
+    if not updated:
+        new_rows.append(row)
+
+    with open(INPUTS_FILE, "w", newline="") as f:
+        csv.writer(f).writerows(new_rows)
+
+def update_sector_shares(row, date_today):
+    """Roll the day into the per-user sector share window."""
+    store = load_or_seed(log_file=CSV_FILE)
+    store.update([DEFAULT_USER], [date_today], [row[3:10]])
+    store.save()
+
 # ======================
 # Main Runner
 # ======================
 def run_carbonmeter():
     print("\n--- CarbonMeter : Daily Individual Emission ---\n")
 
-    transport, transport_mode, public_ratio = calculate_transport()
-    electricity = calculate_electricity()
-    cooking = calculate_cooking()
-    food = calculate_food()
-    waste = calculate_waste()
-    digital = calculate_digital()
-    avoided = calculate_avoided()
+    raw = {}
+    transport, transport_mode, public_ratio = calculate_transport(raw)
+    electricity = calculate_electricity(raw)
+    cooking = calculate_cooking(raw)
+    food = calculate_food(raw)
+    waste = calculate_waste(raw)
+    digital = calculate_digital(raw)
+    avoided = calculate_avoided(raw)
 
     total = round(
         transport + electricity + cooking +
@@ -166,6 +244,8 @@ def run_carbonmeter():
     ]
 
     update_csv(row, date_today)
+    update_inputs(raw, date_today)
+    update_sector_shares(row, date_today)
 
     print("\n✅ CSV updated successfully")
     print(f"📅 Date: {date_today}")
@@ -0,0 +1,299 @@
+# ============================================================
+# CarbonMeter - Rolling Sector Share Store
+# - Keeps, per user, the sector CO₂ of the last WINDOW real days
+# - Updated incrementally as days are logged (no log re-scan)
+# - Persisted next to carbonmeter_daily_log.csv (.npz); a missing
+#   store is seeded from that log before the first update
+# - Turns a predicted daily total into sector values with one
+#   lookup + multiply, for one user or many at once
+#
+# USAGE:
+#   store = SectorShareStore.load()
+#   store.update(["me"], ["2026-01-25"], [[2.1, 1.6, 0.9, 2.0, -0.2, 0.3, 0.4]])
+#   store.save()
+#   sectors = store.distribute(["me"], [5.8])   # (1, 7) array
+# ============================================================
+
+import os
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SHARES_FILE = os.path.join(BASE_DIR, "carbonmeter_sector_shares.npz")
+DAILY_LOG = os.path.join(BASE_DIR, "carbonmeter_daily_log.csv")
+
+# Order matches LOG_HEADER in carbonmeter_individual.py
+SECTOR_COLS = [
+    "transport_co2",
+    "electricity_co2",
+    "cooking_co2",
+    "food_co2",
+    "waste_co2",
+    "digital_co2",
+    "avoided_co2"
+]
+
+# avoided_co2 is logged as a positive number but subtracted from the total
+SECTOR_SIGNS = np.array([1, 1, 1, 1, 1, 1, -1], dtype=np.float64)
+EMITTING = SECTOR_SIGNS > 0
+
+# Used when a user has no usable history
+DEFAULT_SHARES = np.where(EMITTING, 1.0 / EMITTING.sum(), 0.0)
+
+WINDOW = 7          # same as recent = real_df.tail(7)
+DEFAULT_USER = "default"
+EMPTY = -1          # day ordinal of an unused window slot
+
+
+def _day_ordinals(dates):
+    """Dates (str / date / datetime) -> int64 days since epoch (EMPTY if invalid)."""
+    days = pd.to_datetime(pd.Series(dates), format="mixed", errors="coerce").dt.normalize()
+    ordinals = (days - pd.Timestamp("1970-01-01")).dt.days
+    return ordinals.fillna(EMPTY).to_numpy(dtype=np.int64)
+
+
+class SectorShareStore:
+    """
+    Per-user rolling window of sector CO₂ with running sums.
+
+    For U users the state is three arrays:
+        window (U, WINDOW, 7)  sector values of each logged day
+        days   (U, WINDOW)     day ordinal of each slot (EMPTY = unused)
+        sums   (U, 7)          window[u].sum(axis=0), kept incrementally
+    """
+
+    def __init__(self, window=WINDOW):
+        self.window_size = window
+        self.users = {}
+        self.window = np.zeros((0, window, len(SECTOR_COLS)))
+        self.days = np.zeros((0, window), dtype=np.int64)
+        self.sums = np.zeros((0, len(SECTOR_COLS)))
+
+    # ======================
+    # Indexing
+    # ======================
+    def _index(self, user_ids, create=False):
+        """Map user ids to row indices (-1 for unknown users)."""
+        user_ids = [str(u) for u in user_ids]
+
+        if create:
+            new = [u for u in dict.fromkeys(user_ids) if u not in self.users]
+            if new:
+                for u in new:
+                    self.users[u] = len(self.users)
+                n = len(new)
+                self.window = np.concatenate(
+                    [self.window, np.zeros((n,) + self.window.shape[1:])]
+                )
+                self.days = np.concatenate(
+                    [self.days, np.full((n, self.window_size), EMPTY, dtype=np.int64)]
+                )
+                self.sums = np.concatenate(
+                    [self.sums, np.zeros((n, len(SECTOR_COLS)))]
+                )
+
+        return np.array([self.users.get(u, -1) for u in user_ids], dtype=np.int64)
+
+    def __contains__(self, user_id):
+        return str(user_id) in self.users
+
+    def __len__(self):
+        return len(self.users)
+
+    # ======================
+    # Incremental Updates
+    # ======================
+    def update(self, user_ids, dates, sectors):
+        """
+        Add logged days to the users' windows.
+
+        Re-logging a date already in the window replaces it (same
+        upsert semantics as update_csv). A newer date evicts the
+        oldest day once the window is full; dates older than the
+        whole window are ignored.
+
+        Args:
+            user_ids: One user id per row
+            dates: One date per row
+            sectors: (rows, 7) sector CO₂ in SECTOR_COLS order
+
+        Returns:
+            int: Rows applied
+        """
+        sectors = np.asarray(sectors, dtype=np.float64).reshape(-1, len(SECTOR_COLS))
+        if len(sectors) == 0:
+            return 0
+
+        days = _day_ordinals(dates)
+        valid = days != EMPTY
+        if not valid.any():
+            return 0
+        users = self._index(np.asarray(user_ids)[valid], create=True)
+        days, sectors = days[valid], sectors[valid]
+
+        # Chronological, and at most one row per user per round so each
+        # round is a single vectorized scatter
+        order = np.lexsort((days, users))
+        users, days, sectors = users[order], days[order], sectors[order]
+        rank = pd.Series(users).groupby(users).cumcount().to_numpy()
+
+        applied = 0
+        for r in range(rank.max() + 1):
+            take = rank == r
+            u, d, v = users[take], days[take], sectors[take]
+            slots_days = self.days[u]
+
+            matched = slots_days == d[:, None]
+            slot = np.where(
+                matched.any(axis=1),
+                matched.argmax(axis=1),
+                slots_days.argmin(axis=1)        # EMPTY first, then oldest
+            )
+            accept = matched.any(axis=1) | (slots_days[np.arange(len(u)), slot] < d)
+            u, d, v, slot = u[accept], d[accept], v[accept], slot[accept]
+
+            self.sums[u] += v - self.window[u, slot]
+            self.window[u, slot] = v
+            self.days[u, slot] = d
+            applied += int(accept.sum())
+
+        return applied
+
+    def rebuild(self, user_ids, dates, sectors):
+        """Drop the given users' windows and rebuild them from rows."""
+        idx = self._index(user_ids)
+        idx = np.unique(idx[idx >= 0])
+        self.window[idx] = 0.0
+        self.days[idx] = EMPTY
+        self.sums[idx] = 0.0
+        return self.update(user_ids, dates, sectors)
+
+    # ======================
+    # Shares & Distribution
+    # ======================
+    def shares(self, user_ids):
+        """
+        Signed sector shares of the window total.
+
+        shares @ [1]*7 == 1 and the avoided share is <= 0, so
+        share * total gives sectors that add back up to total_co2.
+
+        If the window's net total is zero or negative (e.g. avoided
+        emissions outweigh the rest), shares fall back to the emitting
+        sectors' gross split, and to DEFAULT_SHARES when there is no
+        positive history at all.
+
+        Returns:
+            np.ndarray: (len(user_ids), 7)
+        """
+        idx = self._index(user_ids)
+        known = idx >= 0
+        result = np.tile(DEFAULT_SHARES, (len(idx), 1))
+        if not known.any():
+            return result
+
+        signed = self.sums[idx[known]] * SECTOR_SIGNS
+        net = signed.sum(axis=1)
+
+        gross = np.where(EMITTING, np.clip(signed, 0.0, None), 0.0)
+        gross_total = gross.sum(axis=1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shares = np.where(
+                (net > 0)[:, None], signed / net[:, None],
+                np.where((gross_total > 0)[:, None],
+                         gross / gross_total[:, None], DEFAULT_SHARES)
+            )
+
+        result[known] = shares
+        return result
+
+    def distribute(self, user_ids, totals):
+        """
+        Split predicted daily totals into logged sector values.
+
+        Args:
+            user_ids: One user id per total
+            totals: Predicted total_co2 per user
+
+        Returns:
+            np.ndarray: (len(user_ids), 7) in SECTOR_COLS order, with
+                avoided_co2 positive as in the daily log
+        """
+        totals = np.asarray(totals, dtype=np.float64).reshape(-1, 1)
+        # + 0.0 turns -0.0 (no avoided share) into 0.0
+        return np.round(self.shares(user_ids) * totals * SECTOR_SIGNS, 2) + 0.0
+
+    # ======================
+    # Persistence
+    # ======================
+    def save(self, path=SHARES_FILE):
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            users=np.array(list(self.users), dtype=str),
+            window=self.window,
+            days=self.days,
+            sums=self.sums
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=SHARES_FILE, window=WINDOW):
+        """Load a saved store (empty store if the file does not exist)."""
+        if not os.path.exists(path):
+            return cls(window)
+
+        with np.load(path) as data:
+            store = cls(data["days"].shape[1])
+            store.users = {str(u): i for i, u in enumerate(data["users"])}
+            store.window = data["window"]
+            store.days = data["days"]
+            store.sums = data["sums"]
+        return store
+
+    @classmethod
+    def from_log(cls, log_df, user_col=None, window=WINDOW):
+        """
+        Build a store from daily log rows (real rows only).
+
+        Args:
+            log_df (pd.DataFrame): Rows with 'date' and SECTOR_COLS
+            user_col (str): Column holding user ids (None = single user)
+        """
+        store = cls(window)
+        store.update_from_log(log_df, user_col)
+        return store
+
+    def update_from_log(self, log_df, user_col=None):
+        """Apply daily log rows, skipping ML-estimated ones."""
+        if "estimated" in log_df.columns:
+            estimated = pd.to_numeric(log_df["estimated"], errors="coerce").fillna(0)
+            log_df = log_df[estimated == 0]
+
+        users = (log_df[user_col] if user_col
+                 else pd.Series(DEFAULT_USER, index=log_df.index))
+        sectors = log_df[SECTOR_COLS].apply(pd.to_numeric, errors="coerce").fillna(0.0)
+        return self.update(users.to_numpy(), log_df["date"].to_numpy(), sectors.to_numpy())
+
+
+def load_or_seed(path=SHARES_FILE, log_file=DAILY_LOG, user_col=None):
+    """
+    Load the store; when there is none yet, build it from the daily log.
+
+    Without the seed, the first update after an upgrade would create a
+    store holding only that day, and predictions would take their
+    shares from one day instead of the last WINDOW logged days.
+    """
+    if os.path.exists(path) or not os.path.exists(log_file):
+        return SectorShareStore.load(path)
+    return SectorShareStore.from_log(pd.read_csv(log_file), user_col)
+
+
+def record_days(log_rows, path=SHARES_FILE, user_col=None, log_file=DAILY_LOG):
+    """Load (or seed) the store, apply newly logged rows and save it back."""
+    store = load_or_seed(path, log_file, user_col)
+    applied = store.update_from_log(log_rows, user_col)
+    store.save(path)
+    return applied
@@ -0,0 +1,17 @@
+# ============================================================
+# CarbonMeter - Shared ML Module Path
+# - Puts CarbonMeter/ml on sys.path, so the scripts in this
+#   directory can import the shared modules (service_startup,
+#   emission_factors, ...) however they are started
+#
+# USAGE (before the shared imports):
+#   import ml_root  # noqa: F401
+# ============================================================
+
+import os
+import sys
+
+ML_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+if ML_ROOT not in sys.path:
+    sys.path.insert(0, ML_ROOT)
@@ -6,11 +6,17 @@
 # - Updates carbonmeter_daily_log.csv
 # ============================================================
 
+import os
+import sys
 import pandas as pd
 import joblib
 import calendar
 from datetime import timedelta
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "calculation_emission"))
+from sector_shares import SectorShareStore, SECTOR_COLS, DEFAULT_USER
+
 # ------------------------------------------------------------
 # Paths
 # ------------------------------------------------------------
@@ -163,19 +169,17 @@ predicted_daily_co2 = round(predicted_monthly_co2 / days_in_month, 2)
 # ------------------------------------------------------------
 # 6. Sector-wise distribution (keeps CSV consistent)
 # ------------------------------------------------------------
-sector_cols = [
-    "transport_co2",
-    "electricity_co2",
-    "cooking_co2",
-    "food_co2",
-    "waste_co2",
-    "digital_co2",
-    "avoided_co2"
-]
+# Rolling shares are kept up to date as days are logged; build them
+# from the log once if this user has no store yet
+share_store = SectorShareStore.load()
+if DEFAULT_USER not in share_store:
+    share_store = SectorShareStore.from_log(real_df)
+    share_store.save()
 
-sector_mean = recent[sector_cols].mean()
-sector_ratio = sector_mean / sector_mean.sum()
-predicted_sectors = (sector_ratio * predicted_daily_co2).round(2)
+predicted_sectors = pd.Series(
+    share_store.distribute([DEFAULT_USER], [predicted_daily_co2])[0],
+    index=SECTOR_COLS
+)
 
 # Transport mode label
 transport_mode = (
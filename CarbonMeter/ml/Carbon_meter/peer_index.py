@@ -0,0 +1,327 @@
+# ============================================================
+# CarbonMeter - Peer Benchmarking Index
+# - Ranks an organization's emission intensity against the other
+#   organizations of its sector:
+#       per_employee   emission / employee_count
+#       per_revenue    emission / (revenue / 1e6)    (per million)
+#       per_unit       emission / production_units
+# - One sorted list per (sector, metric), latest value per org:
+#   a percentile is two bisects, O(log n)
+# - Every logged prediction is appended to a CSV log; each worker
+#   reads only the bytes appended since its last look, so the
+#   index is refreshed incrementally, never rebuilt from scratch
+#   (a compacted log is detected and re-read once)
+#
+# USAGE:
+#   index = PeerIndex.load()
+#   index.benchmark("org-1", "Manufacturing", 310.0, employee_count=120)
+#   index.record("org-1", "Manufacturing", 310.0, employee_count=120)
+#
+#   python peer_index.py --seed data/org_daily_emissions.csv
+#   python peer_index.py --compact
+# ============================================================
+
+import argparse
+import csv
+import io
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+
+import pandas as pd
+
+from sector_baselines import BASE_DIR, MIN_DAYS, load_org_days, sector_key
+
+LOG_FILE = os.path.join(BASE_DIR, "data", "org_prediction_log.csv")
+LOG_HEADER = [
+    "logged_at",
+    "organization_id",
+    "sector",
+    "employee_count",
+    "revenue",
+    "production_units",
+    "emission"
+]
+
+METRICS = ("per_employee", "per_revenue", "per_unit")
+REVENUE_SCALE = 1e6   # per_revenue is per million of revenue
+MIN_PEERS = 5         # fewer other orgs: no percentile for the metric
+
+
+def intensities(emission, employee_count=0, revenue=0, production_units=0):
+    """Normalised intensities whose denominator is known (> 0)."""
+    values = {}
+    for metric, denominator in (
+        ("per_employee", employee_count),
+        ("per_revenue", revenue / REVENUE_SCALE if revenue else 0),
+        ("per_unit", production_units),
+    ):
+        if denominator and denominator > 0:
+            values[metric] = emission / denominator
+    return values
+
+
+def _number(value):
+    try:
+        return float(value) if value not in ("", None) else 0.0
+    except ValueError:
+        return 0.0
+
+
+class PeerIndex:
+    """
+    Sorted intensities per (sector, metric), fed by the prediction log.
+
+    State:
+        sorted  {(sector, metric): sorted list of intensities}
+        latest  {organization_id: (sector, {metric: intensity})}
+    An org logged again has its previous values taken out of the
+    lists first, so each org counts once, with its latest numbers.
+    """
+
+    def __init__(self, path=LOG_FILE, min_peers=MIN_PEERS):
+        self.path = path
+        self.min_peers = min_peers
+        self.sorted = {}
+        self.latest = {}
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._inode = None
+
+    def __len__(self):
+        return len(self.latest)
+
+    # ======================
+    # Incremental Updates
+    # ======================
+    def _apply(self, organization_id, sector, values):
+        previous = self.latest.get(organization_id)
+        if previous is not None:
+            old_sector, old_values = previous
+            for metric, value in old_values.items():
+                peers = self.sorted[old_sector, metric]
+                del peers[bisect_left(peers, value)]
+        for metric, value in values.items():
+            insort(self.sorted.setdefault((sector, metric), []), value)
+        self.latest[organization_id] = (sector, values)
+
+    def _apply_rows(self, text):
+        for row in csv.reader(io.StringIO(text)):
+            if len(row) != len(LOG_HEADER) or row[0] == LOG_HEADER[0]:
+                continue
+            _, organization_id, sector, employees, revenue, units, emission = row
+            self._apply(organization_id, sector_key(sector), intensities(
+                _number(emission), _number(employees), _number(revenue), _number(units)))
+
+    def refresh(self):
+        """
+        Apply log rows appended since the last refresh.
+
+        Returns:
+            int: Bytes read (0 when nothing new was logged)
+        """
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return 0
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                # New or compacted log: start over
+                self.sorted, self.latest = {}, {}
+                self._offset, self._inode = 0, stat.st_ino
+            if stat.st_size == self._offset:
+                return 0
+
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                chunk = f.read(stat.st_size - self._offset)
+            end = chunk.rfind(b"\n") + 1   # a row still being written waits
+            self._apply_rows(chunk[:end].decode("utf-8"))
+            self._offset += end
+            return end
+
+    def record(self, organization_id, sector, emission, employee_count=0, revenue=0,
+               production_units=0):
+        """
+        Log a prediction and apply it (with other workers' new rows).
+
+        The row goes out in one O_APPEND write, so workers sharing
+        the log do not interleave rows.
+        """
+        self.log([(organization_id, sector, emission, employee_count, revenue,
+                   production_units)])
+        self.refresh()
+
+    def log(self, predictions):
+        """
+        Append prediction rows to the log (applied on the next refresh).
+
+        Args:
+            predictions: (organization_id, sector, emission,
+                employee_count, revenue, production_units) tuples
+        """
+        lines = io.StringIO()
+        writer = csv.writer(lines, lineterminator="\n")
+        logged_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        for organization_id, sector, emission, employees, revenue, units in predictions:
+            writer.writerow([
+                logged_at, organization_id, sector,
+                repr(float(employees or 0)), repr(float(revenue or 0)),
+                repr(float(units or 0)), repr(float(emission))
+            ])
+        data = lines.getvalue().encode("utf-8")
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size == 0:
+                data = (",".join(LOG_HEADER) + "\n").encode("utf-8") + data
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    # ======================
+    # Percentiles
+    # ======================
+    def percentile(self, value, sector, metric="per_employee", exclude=None):
+        """
+        Benchmark percentile of an intensity within its sector.
+
+        Share of peers with a higher intensity (ties count half), so
+        lower emissions give a higher percentile. The organization
+        `exclude` is not counted as its own peer.
+
+        Returns:
+            tuple: (percentile 0-100, peers), or None with fewer than
+                min_peers peers
+        """
+        sector = sector_key(sector)
+        peers = self.sorted.get((sector, metric), ())
+        below, above = bisect_left(peers, value), bisect_right(peers, value)
+        total, higher, ties = len(peers), len(peers) - above, above - below
+
+        own_sector, own_values = self.latest.get(exclude, (None, {}))
+        if own_sector == sector and metric in own_values:
+            total -= 1
+            if own_values[metric] > value:
+                higher -= 1
+            elif own_values[metric] == value:
+                ties -= 1
+        if total < self.min_peers:
+            return None
+        return round(100.0 * (higher + ties / 2) / total, 1), total
+
+    def benchmark(self, organization_id, sector, emission, employee_count=0, revenue=0,
+                  production_units=0):
+        """
+        Percentile of every known intensity of a prediction.
+
+        Returns:
+            dict: {metric: {"intensity", "percentile", "peers"}} for the
+                metrics with enough peers in the sector
+        """
+        self.refresh()
+        result = {}
+        with self._lock:
+            for metric, value in intensities(emission, employee_count, revenue,
+                                             production_units).items():
+                found = self.percentile(value, sector, metric, exclude=organization_id)
+                if found is not None:
+                    result[metric] = {
+                        "intensity": round(value, 4),
+                        "percentile": found[0],
+                        "peers": found[1],
+                    }
+        return result
+
+    # ======================
+    # Persistence
+    # ======================
+    @classmethod
+    def load(cls, path=LOG_FILE, min_peers=MIN_PEERS):
+        """Index of everything logged so far (empty if there is no log)."""
+        index = cls(path, min_peers)
+        index.refresh()
+        return index
+
+    def compact(self):
+        """Rewrite the log with only each organization's latest row."""
+        self.refresh()
+        with open(self.path, newline="", encoding="utf-8") as f:
+            latest = {row[1]: row for row in csv.reader(f)
+                      if len(row) == len(LOG_HEADER) and row[0] != LOG_HEADER[0]}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(LOG_HEADER)
+            writer.writerows(latest.values())
+        os.replace(tmp_path, self.path)
+        return len(latest)
+
+
+def seed_from_org_days(index, org_days, min_days=MIN_DAYS):
+    """
+    Log each organization's mean daily emission from the export CSV
+    (one append for all of them).
+
+    Returns:
+        int: Organizations seeded
+    """
+    def numeric(column):
+        if column not in org_days.columns:
+            return pd.Series(0.0, index=org_days.index)
+        return pd.to_numeric(org_days[column], errors="coerce").fillna(0.0)
+
+    days = pd.DataFrame({
+        "org": org_days["organization_id"].astype(str),
+        "sector": org_days["sector"],
+        "employees": numeric("employee_count"),
+        "revenue": numeric("annual_revenue"),
+        "emission": pd.to_numeric(org_days["emission"], errors="coerce"),
+    }).dropna(subset=["emission"])
+
+    orgs = days.groupby("org").agg(
+        sector=("sector", "last"),
+        employees=("employees", "last"),
+        revenue=("revenue", "last"),
+        emission=("emission", "mean"),
+        days=("emission", "size"),
+    )
+    orgs = orgs[orgs["days"] >= min_days]
+
+    index.log(zip(orgs.index, orgs["sector"], orgs["emission"], orgs["employees"],
+                  orgs["revenue"], [0] * len(orgs)))
+    index.refresh()
+    return len(orgs)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Inspect, seed or compact the organization peer index"
+    )
+    parser.add_argument("--log", default=LOG_FILE,
+                        help="Prediction log (default: data/org_prediction_log.csv)")
+    parser.add_argument("--seed",
+                        help="Daily org emissions CSV to seed the index from "
+                             "(backend/export-org-emissions.js)")
+    parser.add_argument("--compact", action="store_true",
+                        help="Keep only the latest row per organization")
+    args = parser.parse_args()
+
+    index = PeerIndex.load(args.log)
+    if args.seed:
+        seeded = seed_from_org_days(index, load_org_days(args.seed))
+        print(f"\n🌱 Seeded organizations : {seeded}")
+    if args.compact and os.path.exists(args.log):
+        print(f"🗜️  Compacted log rows   : {index.compact()}")
+
+    print("\n✅ Peer index")
+    print(f"🏭 Organizations : {len(index)}")
+    for (sector, metric), peers in sorted(index.sorted.items()):
+        print(f"   {sector:<32} {metric:<13} {len(peers):>6} orgs")
+    print(f"💾 Log file      : {args.log}\n")
+
+
+if __name__ == "__main__":
+    main()
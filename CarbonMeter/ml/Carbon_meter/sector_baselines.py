@@ -0,0 +1,257 @@
+# ============================================================
+# CarbonMeter - Sector Emission Baselines (offline)
+# - Per-sector distribution of organizations' mean daily CO₂e,
+#   by employee-count band, from the backend's stored org data
+#   (backend/export-org-emissions.js)
+# - 101-point percentile table + median + org count per group,
+#   persisted next to the org data (.npz)
+# - Used by /predict/organization when it cannot run the model or
+#   has no history: the peer median replaces the fixed sector
+#   defaults; benchmark_percentile is a binary search of the
+#   prediction in the peers' percentile table whenever the live
+#   peer index (peer_index.py) has too few organizations
+#
+# USAGE:
+#   node ../../backend/export-org-emissions.js
+#   python sector_baselines.py
+#   python sector_baselines.py --input org_daily_emissions.csv --min-orgs 3
+#
+#   baselines = SectorBaselines.load()
+#   baselines.median("Manufacturing", 120)
+#   baselines.benchmark_percentile(310.0, "Manufacturing", 120)
+# ============================================================
+
+import argparse
+import os
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FILE = os.path.join(BASE_DIR, "data", "org_daily_emissions.csv")
+BASELINES_FILE = os.path.join(BASE_DIR, "data", "org_sector_baselines.npz")
+
+ALL = "all"
+
+# Employee-count bands: [1, 10) -> "1-9", ..., [1000, inf) -> "1000+"
+BAND_EDGES = (10, 50, 250, 1000)
+BAND_LABELS = ("1-9", "10-49", "50-249", "250-999", "1000+")
+
+QUANTILES = np.arange(101)   # 0th..100th percentile
+MIN_ORGS = 5                 # smaller groups defer to a wider one
+MIN_DAYS = 7                 # days of data before an org counts
+
+
+# ======================
+# Grouping Keys
+# ======================
+def sector_key(sector):
+    """'  Heavy  Manufacturing ' -> 'heavy manufacturing' ('' -> 'unknown')."""
+    return " ".join(str(sector or "").split()).casefold() or "unknown"
+
+
+def employee_band(employee_count):
+    """Band label of a head count (ALL when unknown)."""
+    try:
+        count = float(employee_count)
+    except (TypeError, ValueError):
+        return ALL
+    if not count > 0:
+        return ALL
+    return BAND_LABELS[bisect_right(BAND_EDGES, count)]
+
+
+# ======================
+# Offline Build
+# ======================
+def load_org_days(path=SOURCE_FILE):
+    """Daily org emissions CSV (organization_id, sector, employee_count, date, emission)."""
+    df = pd.read_csv(path, dtype={"organization_id": str, "sector": str})
+    missing = {"organization_id", "sector", "emission"} - set(df.columns)
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(sorted(missing))}")
+    return df
+
+
+def build_baselines(org_days, min_days=MIN_DAYS):
+    """
+    Percentile tables of organizations' mean daily emission.
+
+    Every organization counts once in each of four groups: its
+    (sector, band), (sector, ALL), (ALL, band) and (ALL, ALL), so a
+    small group can defer to a wider one at lookup time.
+
+    Args:
+        org_days (pd.DataFrame): One row per organization per day
+        min_days (int): Days an organization needs to be included
+
+    Returns:
+        dict: keys ('sector|band'), quantiles (K, 101), medians (K,),
+            counts (K,) - the arrays save() writes
+    """
+    emission = pd.to_numeric(org_days["emission"], errors="coerce")
+    employees = (pd.to_numeric(org_days["employee_count"], errors="coerce")
+                 if "employee_count" in org_days.columns
+                 else pd.Series(np.nan, index=org_days.index))
+    days = pd.DataFrame({
+        "org": org_days["organization_id"].astype(str),
+        "sector": org_days["sector"],
+        "employees": employees,
+        "emission": emission,
+    }).dropna(subset=["emission"])
+
+    orgs = days.groupby("org").agg(
+        sector=("sector", "last"),
+        employees=("employees", "last"),
+        emission=("emission", "mean"),
+        days=("emission", "size"),
+    )
+    orgs = orgs[orgs["days"] >= min_days]
+
+    # Sector / band normalised per distinct value, not per row
+    sectors = orgs["sector"].map({s: sector_key(s) for s in orgs["sector"].unique()})
+    bands = orgs["employees"].map(employee_band)
+    values = orgs["emission"].to_numpy(dtype=np.float64)
+
+    groups = {}
+    for sector_col, band_col in ((sectors, bands), (sectors, None), (None, bands), (None, None)):
+        labels = pd.DataFrame({
+            "sector": sector_col if sector_col is not None else ALL,
+            "band": band_col if band_col is not None else ALL,
+        }, index=orgs.index)
+        for (sector, band), rows in labels.groupby(["sector", "band"]).indices.items():
+            groups[f"{sector}|{band}"] = values[rows]
+
+    keys = sorted(groups)
+    quantiles = np.array([np.percentile(groups[k], QUANTILES) for k in keys]).reshape(-1, len(QUANTILES))
+    return {
+        "keys": np.array(keys, dtype=str),
+        "quantiles": quantiles,
+        "medians": quantiles[:, 50] if len(keys) else np.zeros(0),
+        "counts": np.array([len(groups[k]) for k in keys], dtype=np.int64),
+    }
+
+
+# ======================
+# Lookup
+# ======================
+class SectorBaselines:
+    """
+    Read-only lookup over precomputed percentile tables.
+
+    The tables are kept as tuples of floats, one per group, behind a
+    dict keyed by (sector, band), so a lookup is a dict probe plus a
+    bisect over 101 sorted values (no NumPy per request).
+    """
+
+    def __init__(self, keys=(), quantiles=(), counts=(), min_orgs=MIN_ORGS):
+        self.min_orgs = min_orgs
+        self.tables = {}
+        self.counts = {}
+        for key, table, count in zip(keys, quantiles, counts):
+            sector, band = str(key).split("|", 1)
+            self.tables[sector, band] = tuple(float(v) for v in table)
+            self.counts[sector, band] = int(count)
+
+    def __len__(self):
+        return len(self.tables)
+
+    def group(self, sector, employee_count=None):
+        """
+        Most specific group with at least min_orgs organizations.
+
+        Tries (sector, band), (sector, ALL), (ALL, band), (ALL, ALL).
+
+        Returns:
+            tuple: (sector, band) key, or None when no group qualifies
+        """
+        sector, band = sector_key(sector), employee_band(employee_count)
+        for key in ((sector, band), (sector, ALL), (ALL, band), (ALL, ALL)):
+            if self.counts.get(key, 0) >= self.min_orgs:
+                return key
+        return None
+
+    def median(self, sector, employee_count=None):
+        """Peers' median mean-daily emission, or None."""
+        key = self.group(sector, employee_count)
+        return None if key is None else self.tables[key][50]
+
+    def percentile_rank(self, value, sector, employee_count=None):
+        """
+        Share of peers (0-100) emitting less than value, or None.
+
+        Binary search in the group's percentile table, interpolating
+        linearly between neighbouring percentiles.
+        """
+        key = self.group(sector, employee_count)
+        if key is None:
+            return None
+        table = self.tables[key]
+        lo, hi = bisect_left(table, value), bisect_right(table, value)
+        if lo != hi:                    # on a flat stretch of the table
+            return (lo + hi - 1) / 2
+        if lo == 0:
+            return 0.0
+        if lo == len(table):
+            return 100.0
+        below, above = table[lo - 1], table[lo]
+        return (lo - 1) + (value - below) / (above - below)
+
+    def benchmark_percentile(self, value, sector, employee_count=None):
+        """Benchmark score: 100 - percentile rank (lower emission = higher), or None."""
+        rank = self.percentile_rank(value, sector, employee_count)
+        return None if rank is None else round(100.0 - rank, 1)
+
+    def describe(self, sector, employee_count=None):
+        """{'sector', 'employee_band', 'organizations'} of the peer group, or None."""
+        key = self.group(sector, employee_count)
+        if key is None:
+            return None
+        return {"sector": key[0], "employee_band": key[1], "organizations": self.counts[key]}
+
+    # ======================
+    # Persistence
+    # ======================
+    @staticmethod
+    def save(baselines, path=BASELINES_FILE):
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, **baselines)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=BASELINES_FILE, min_orgs=MIN_ORGS):
+        """Load saved tables (empty lookup if the file does not exist)."""
+        if not os.path.exists(path):
+            return cls(min_orgs=min_orgs)
+        with np.load(path) as data:
+            return cls(data["keys"], data["quantiles"], data["counts"], min_orgs=min_orgs)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build per-sector organization emission baselines"
+    )
+    parser.add_argument("--input", default=SOURCE_FILE,
+                        help="Daily org emissions CSV (default: data/org_daily_emissions.csv)")
+    parser.add_argument("--output", default=BASELINES_FILE,
+                        help="Baselines file (default: data/org_sector_baselines.npz)")
+    parser.add_argument("--min-days", type=int, default=MIN_DAYS,
+                        help=f"Days of data an organization needs (default: {MIN_DAYS})")
+    parser.add_argument("--min-orgs", type=int, default=MIN_ORGS,
+                        help=f"Organizations a group needs to be shown (default: {MIN_ORGS})")
+    args = parser.parse_args()
+
+    baselines = build_baselines(load_org_days(args.input), min_days=args.min_days)
+    SectorBaselines.save(baselines, args.output)
+
+    print("\n✅ Sector baselines built")
+    print(f"🏭 Groups          : {len(baselines['keys'])}")
+    for key, median, count in zip(baselines["keys"], baselines["medians"], baselines["counts"]):
+        if key.endswith(f"|{ALL}") and count >= args.min_orgs:
+            print(f"   {key.split('|')[0]:<32} median {median:>10.2f}  ({count} orgs)")
+    print(f"💾 Baselines file  : {args.output}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+============================================================
+CARBONMETER - ADMISSION CONTROL FOR THE MODEL ENDPOINTS
+============================================================
+
+PURPOSE:
+    An overloaded worker used to queue prediction requests until the
+    Node backend's axios timeout fired. Now at most ADMISSION_LIMIT
+    requests per process run the model path at once; the others wait
+    in a bounded queue, and a request that cannot start in time is
+    not kept waiting:
+
+        admitted    a slot was free (or freed up within the deadline)
+        degraded    served by the endpoint's cheap fallback estimator
+                    (no model), marked in the body and headers
+        rejected    503 + Retry-After (endpoints without a fallback,
+                    or ADMISSION_MODE=reject)
+
+    A request is turned away when
+        - the queue already holds ADMISSION_QUEUE requests
+        - its estimated wait (requests ahead x recent model-path time
+          / limit) exceeds the deadline, so waiting would not help
+        - no slot frees up before the deadline
+        - it already spent the deadline queued before reaching Flask
+          (X-Request-Start from the proxy, in s, ms or us since epoch)
+
+    The deadline is ADMISSION_TIMEOUT_MS (default 500), shortened to
+    half of the caller's X-Request-Timeout-Ms when the backend sends
+    it.
+
+    Every decision is counted on /metrics:
+        admission_decisions_total{endpoint,outcome,reason}
+        admission_wait_seconds                          (histogram)
+        admission_in_flight, admission_waiting, admission_limit
+    and the response carries X-Admission: admitted|degraded|rejected.
+
+    With sync gunicorn workers each worker handles one request at a
+    time, so the queue is the listen socket: there X-Request-Start is
+    what sheds load. Threaded servers use the in-process queue too.
+
+    ADMISSION=0 turns it off.
+
+USAGE:
+    from admission import AdmissionControl
+
+    admission = AdmissionControl(app, metrics=metrics)
+
+    @app.route("/predict", methods=["POST"])
+    @admission.guard()                 # degrade=False: 503 instead
+    def predict():
+        if admission.degraded:
+            metrics.fallback("overloaded")
+            return cheap_estimate()
+        ...
+============================================================
+"""
+
+import functools
+import os
+import threading
+import time
+
+from flask import g, jsonify, request
+
+from service_metrics import Counter, Gauge, Histogram
+
+ADMISSION_ENV = "ADMISSION"
+LIMIT_ENV = "ADMISSION_LIMIT"
+QUEUE_ENV = "ADMISSION_QUEUE"
+TIMEOUT_ENV = "ADMISSION_TIMEOUT_MS"
+MODE_ENV = "ADMISSION_MODE"
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+EWMA_ALPHA = 0.2
+
+
+def _request_start():
+    """Epoch seconds from X-Request-Start ('t=...' in s, ms or us), or None."""
+    value = (request.headers.get("X-Request-Start") or "").strip()
+    if value.startswith("t="):
+        value = value[2:]
+    try:
+        start = float(value)
+    except ValueError:
+        return None
+    while start > 1e11:  # ms / us since epoch
+        start /= 1000
+    return start
+
+
+class AdmissionControl:
+    """Concurrency limit, bounded queue and deadline for model endpoints."""
+
+    def __init__(self, app=None, metrics=None, limit=None, max_queue=None,
+                 timeout_ms=None, mode=None, enabled=None):
+        """
+        Args:
+            app (Flask): App to hook (or call init_app later)
+            metrics (ServiceMetrics): Where decisions are reported
+            limit (int): Concurrent model-path requests
+                (default: $ADMISSION_LIMIT or 4)
+            max_queue (int): Requests allowed to wait for a slot
+                (default: $ADMISSION_QUEUE or 2 x limit)
+            timeout_ms (float): Queue deadline
+                (default: $ADMISSION_TIMEOUT_MS or 500)
+            mode (str): 'fallback' or 'reject' when not admitted
+                (default: $ADMISSION_MODE or 'fallback')
+            enabled (bool): Default: $ADMISSION (on)
+        """
+        if enabled is None:
+            enabled = os.environ.get(ADMISSION_ENV, "1").lower() not in ("0", "false", "no")
+        self.enabled = enabled
+        self.limit = max(1, int(os.environ.get(LIMIT_ENV, 4) if limit is None else limit))
+        self.max_queue = int(os.environ.get(QUEUE_ENV, 2 * self.limit) if max_queue is None else max_queue)
+        self.timeout = float(os.environ.get(TIMEOUT_ENV, 500) if timeout_ms is None else timeout_ms) / 1000
+        self.mode = (os.environ.get(MODE_ENV, "fallback") if mode is None else mode).lower()
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._service_time = None  # EWMA of the model path, seconds
+
+        self.decisions = Counter(
+            "admission_decisions_total", "Admission decisions by endpoint, outcome and reason",
+            ("endpoint", "outcome", "reason"))
+        self.wait = Histogram(
+            "admission_wait_seconds", "Time admitted requests waited for a slot",
+            ("endpoint",), WAIT_BUCKETS)
+        self.metrics = metrics
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not self.enabled:
+            return
+        app.after_request(self._after)
+        if self.metrics is not None:
+            self.metrics.register(
+                self.decisions, self.wait,
+                Gauge("admission_in_flight", "Requests running the model path",
+                      collect=lambda: {(): self._in_flight}),
+                Gauge("admission_waiting", "Requests waiting for a model slot",
+                      collect=lambda: {(): self._waiting}),
+                Gauge("admission_limit", "Concurrent model-path requests allowed",
+                      collect=lambda: {(): self.limit}),
+            )
+
+    # ------------------------------------------------------------
+    # Decisions
+    # ------------------------------------------------------------
+    @property
+    def degraded(self):
+        """True when the current request must skip the model."""
+        return g.get("_admission") == "degraded"
+
+    def _deadline(self):
+        """(seconds this request may wait for a slot, queued too long upstream)."""
+        deadline = self.timeout
+        caller = request.headers.get("X-Request-Timeout-Ms")
+        if caller:
+            try:
+                deadline = min(deadline, float(caller) / 2000)
+            except ValueError:
+                pass
+        start = _request_start()
+        if start is None:
+            return deadline, False
+        deadline -= max(0.0, time.time() - start)
+        return deadline, deadline <= 0
+
+    def _acquire(self):
+        """(admitted, reason, seconds waited)."""
+        deadline, late = self._deadline()
+        if late:
+            return False, "queued_upstream", 0.0
+        began = time.monotonic()
+        with self._cond:
+            if self._in_flight < self.limit:
+                self._in_flight += 1
+                return True, "free", 0.0
+            if deadline <= 0:
+                return False, "deadline", 0.0
+            if self._waiting >= self.max_queue:
+                return False, "queue_full", 0.0
+            if self._service_time is not None:
+                expected = (self._waiting + 1) * self._service_time / self.limit
+                if expected > deadline:
+                    return False, "expected_late", 0.0
+
+            self._waiting += 1
+            try:
+                while self._in_flight >= self.limit:
+                    remaining = deadline - (time.monotonic() - began)
+                    if remaining <= 0:
+                        return False, "deadline", time.monotonic() - began
+                    self._cond.wait(remaining)
+                self._in_flight += 1
+                return True, "queued", time.monotonic() - began
+            finally:
+                self._waiting -= 1
+
+    def _release(self, held):
+        with self._cond:
+            self._in_flight -= 1
+            if self._service_time is None:
+                self._service_time = held
+            else:
+                self._service_time += EWMA_ALPHA * (held - self._service_time)
+            self._cond.notify()
+
+    def _record(self, outcome, reason, waited=None):
+        g._admission = outcome
+        endpoint = request.url_rule.rule if request.url_rule else request.path
+        self.decisions.inc(endpoint, outcome, reason)
+        if waited is not None:
+            self.wait.observe(waited, endpoint)
+
+    def _reject(self, reason):
+        response = jsonify({
+            "error": "Service overloaded",
+            "message": f"Request not admitted ({reason}); retry shortly",
+            "reason": reason,
+        })
+        response.status_code = 503
+        response.headers["Retry-After"] = "1"
+        return response
+
+    def guard(self, degrade=True):
+        """
+        Decorator admitting a view through the limit.
+
+        Args:
+            degrade (bool): Run the view with admission.degraded set
+                when not admitted (it must then skip the model);
+                False answers 503. ADMISSION_MODE=reject forces 503.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapped(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+
+                admitted, reason, waited = self._acquire()
+                if admitted:
+                    self._record("admitted", reason, waited)
+                    started = time.monotonic()
+                    try:
+                        return view(*args, **kwargs)
+                    finally:
+                        self._release(time.monotonic() - started)
+
+                if degrade and self.mode != "reject":
+                    self._record("degraded", reason)
+                    return view(*args, **kwargs)
+                self._record("rejected", reason)
+                return self._reject(reason)
+            return wrapped
+        return decorator
+
+    def _after(self, response):
+        outcome = g.get("_admission")
+        if outcome is not None:
+            response.headers["X-Admission"] = outcome
+        return response
@@ -0,0 +1,556 @@
+"""
+============================================================
+CARBONMETER - LOAD TEST / SATURATION CURVES
+============================================================
+
+PURPOSE:
+    Find how many concurrent users the ML services sustain before
+    latency collapses.
+
+    This script stands in for the Node backend: it sends the request
+    bodies routes/orgPrediction.js sends (historical_data per day,
+    /save-csv) plus input_features bodies and /predict/missing-day
+    with 5-90 day histories, mixed by weight, at a fixed offered rate
+    (open loop: requests are scheduled on a clock, and latency counts
+    from the scheduled time, so a saturated server cannot hide its
+    queueing delay).
+
+    For each worker count the service is started locally on a
+    scratch copy of ml/ the way production runs it (gunicorn -w N:
+    N pre-forked single-threaded workers on one listening socket;
+    gunicorn itself is used when installed). Each offered rate is
+    then run for --duration seconds.
+
+    Report per (workers, rate): achieved throughput, error rate,
+    fallback rate, latency p50/p90/p95/p99/max, and per request kind.
+    Saturation = the first rate where throughput falls below 90%
+    of the offered rate, more than 1% of requests fail, or p99
+    exceeds --slo-ms.
+
+RESULTS:
+    benchmarks/results/load_<service>_<timestamp>.json (+ .png with --plot)
+
+USAGE:
+    python benchmarks/load_test.py run --service org --workers 1,2,4 --rates 10,25,50,100
+    python benchmarks/load_test.py run --service individual --duration 20 --plot
+    python benchmarks/load_test.py run --service org --url http://localhost:8001 --rates 5,10
+    python benchmarks/load_test.py run --service org --mix historical_data=3,save_csv=1
+============================================================
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from run_benchmarks import ML_ROOT, RESULTS_DIR, SCRATCH_IGNORE, load_module, machine_metadata
+
+SERVICES = {
+    "individual": {"dir": "Carbon_meter"},
+    "org": {"dir": "predict_org_emissions"},
+}
+
+# Default request mixes (kind: weight)
+DEFAULT_MIX = {
+    "individual": {"missing_day": 8, "organization": 2},
+    "org": {"historical_data": 5, "input_features": 3, "save_csv": 2},
+}
+
+PERCENTILES = (50, 90, 95, 99)
+SATURATION_THROUGHPUT = 0.90
+
+
+# ============================================================
+# REQUEST MIX (what the Node backend sends)
+# ============================================================
+class RequestMix:
+    """Weighted request kinds with pre-built bodies."""
+
+    def __init__(self, service, weights, root=ML_ROOT, seed=0, plants=200):
+        self.rng = np.random.default_rng(seed)
+        self.builders = {}
+        if service == "individual":
+            self._individual()
+        else:
+            self._org(root, seed, plants)
+
+        unknown = [kind for kind in weights if kind not in self.builders]
+        if unknown:
+            raise ValueError(f"Unknown request kinds {unknown} for {service}; use {sorted(self.builders)}")
+        self.kinds = [kind for kind, weight in weights.items() if weight > 0]
+        total = float(sum(weights[kind] for kind in self.kinds))
+        self.probabilities = [weights[kind] / total for kind in self.kinds]
+
+    def _individual(self):
+        histories = [np.round(self.rng.uniform(2.0, 9.0, 90), 2).tolist() for _ in range(100)]
+
+        def missing_day(i):
+            days = int(self.rng.integers(5, 91))
+            return "POST", "/predict/missing-day", {
+                "userId": f"user-{i % 1000}",
+                "emission_history": histories[i % len(histories)][:days],
+            }
+
+        def organization(i):
+            return "POST", "/predict/organization", {
+                "organizationId": f"org-{i % 100}",
+                "sector": "Manufacturing",
+                "emission_history": histories[i % len(histories)][:30],
+                "employee_count": 250,
+                "period": "2026-02",
+            }
+
+        self.builders = {"missing_day": missing_day, "organization": organization}
+
+    def _org(self, root, seed, plants):
+        org_dir = os.path.join(root, SERVICES["org"]["dir"])
+        if org_dir not in sys.path:
+            sys.path.insert(0, org_dir)
+        from generate_input_template import build_windows, api_payloads
+
+        windows = build_windows(plants, 30, seed=seed)
+        payloads = api_payloads(windows)
+        start = datetime.now() - timedelta(days=30)
+        dates = [(start + timedelta(days=d)).isoformat() for d in range(30)]
+
+        # orgPrediction.js: one object per day, period instead of historical_days
+        backend_bodies = []
+        for body in payloads:
+            series = body["input_features"]
+            backend_bodies.append({
+                "organization_id": body["organizationId"],
+                "industry": body["industry"].capitalize(),
+                "period": "next_30_days",
+                "historical_data": [
+                    {"date": dates[d], **{key: values[d] for key, values in series.items()},
+                     "total_emission": 0}
+                    for d in range(30)
+                ],
+            })
+
+        def historical_data(i):
+            return "POST", "/predict/org", backend_bodies[i % len(backend_bodies)]
+
+        def input_features(i):
+            return "POST", "/predict/org", payloads[i % len(payloads)]
+
+        def save_csv(i):
+            return "POST", "/save-csv", {
+                "organization_id": f"plant-{i % plants:05d}",
+                "industry": "Manufacturing",
+                "period": "next_30_days",
+                "predicted_emission": 1500.0 + i % 500,
+                "confidence": 0.87,
+                "breakdown": {"scope1_percentage": 45, "scope2_percentage": 55},
+                "recommendations": ["Upgrade to energy-efficient machinery", "Use renewable electricity"],
+            }
+
+        self.builders = {"historical_data": historical_data, "input_features": input_features,
+                         "save_csv": save_csv}
+
+    def schedule(self, count):
+        """`count` (kind, method, path, body-bytes) tuples in send order."""
+        kinds = self.rng.choice(len(self.kinds), size=count, p=self.probabilities)
+        plan = []
+        for i, k in enumerate(kinds):
+            kind = self.kinds[k]
+            method, path, body = self.builders[kind](i)
+            plan.append((kind, method, path, json.dumps(body).encode()))
+        return plan
+
+
+def parse_mix(text, service):
+    if not text:
+        return dict(DEFAULT_MIX[service])
+    weights = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        weights[kind.strip()] = float(weight or 1)
+    return weights
+
+
+# ============================================================
+# CLIENT
+# ============================================================
+class Client:
+    """One keep-alive HTTP connection per client thread."""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def send(self, method, path, body):
+        """(status, response body); raises on connection errors/timeouts."""
+        conn = self._connection()
+        try:
+            conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            data = response.read()
+            if response.will_close:
+                conn.close()
+            return response.status, data
+        except Exception:
+            conn.close()
+            self._local.conn = None
+            raise
+
+
+def is_fallback(data):
+    try:
+        body = json.loads(data)
+    except ValueError:
+        return False
+    return bool(body.get("is_fallback") or body.get("demo")) or body.get("source") == "Error Fallback"
+
+
+def run_load(base_url, mix, rate, duration, concurrency=64, timeout=30.0):
+    """
+    Send mix requests at `rate` per second for `duration` seconds.
+
+    Returns:
+        dict: Throughput, error/fallback rates and latency percentiles
+    """
+    plan = mix.schedule(max(1, int(rate * duration)))
+    client = Client(base_url, timeout)
+    records = [None] * len(plan)
+
+    def send(i, scheduled):
+        kind, method, path, body = plan[i]
+        try:
+            status, data = client.send(method, path, body)
+            error = None if status < 400 else f"HTTP {status}"
+            fallback = error is None and is_fallback(data)
+        except Exception as e:
+            error, fallback = type(e).__name__, False
+        records[i] = (kind, time.perf_counter() - scheduled, error, fallback)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(len(plan)):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, i, scheduled)
+    # At least the scheduled window: an idle tail must not inflate throughput
+    elapsed = max(time.perf_counter() - start, len(plan) / rate)
+
+    return summarize_records(records, rate, elapsed)
+
+
+def latency_stats(latencies):
+    if len(latencies) == 0:
+        return {}
+    ms = np.asarray(latencies) * 1000
+    stats = {f"p{p}_ms": round(float(np.percentile(ms, p)), 2) for p in PERCENTILES}
+    stats["mean_ms"] = round(float(ms.mean()), 2)
+    stats["max_ms"] = round(float(ms.max()), 2)
+    return stats
+
+
+def summarize_records(records, rate, elapsed):
+    records = [r for r in records if r is not None]
+    ok = [r for r in records if r[2] is None]
+    errors = {}
+    for r in records:
+        if r[2] is not None:
+            errors[r[2]] = errors.get(r[2], 0) + 1
+
+    by_kind = {}
+    for kind in sorted({r[0] for r in records}):
+        rows = [r for r in records if r[0] == kind]
+        kind_ok = [r[1] for r in rows if r[2] is None]
+        by_kind[kind] = {
+            "requests": len(rows),
+            "errors": len(rows) - len(kind_ok),
+            "fallbacks": sum(1 for r in rows if r[3]),
+            **latency_stats(kind_ok),
+        }
+
+    return {
+        "offered_rps": rate,
+        "requests": len(records),
+        "seconds": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(1 - len(ok) / len(records), 4) if records else 0.0,
+        "fallback_rate": round(sum(1 for r in ok if r[3]) / len(ok), 4) if ok else 0.0,
+        "errors": errors,
+        **latency_stats([r[1] for r in ok]),
+        "by_kind": by_kind,
+    }
+
+
+# ============================================================
+# SERVER (gunicorn -w N, or the same pre-fork model with werkzeug)
+# ============================================================
+def serve(root, service, port, workers, host="127.0.0.1"):
+    """
+    Serve one ML service with `workers` pre-forked single-threaded
+    processes sharing one listening socket (gunicorn's sync model).
+    """
+    import logging
+    from werkzeug.serving import make_server
+
+    service_dir = os.path.join(root, SERVICES[service]["dir"])
+    os.chdir(service_dir)
+    api = load_module(f"loadtest_{service}_api", os.path.join(service_dir, "api.py"))
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(1024)
+    listener.set_inheritable(True)
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            make_server(host, port, api.app, threaded=False, fd=listener.fileno()).serve_forever()
+            os._exit(0)
+        children.append(pid)
+
+    def stop(*_):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_service(root, service, workers, port):
+    """Start the service in a subprocess; gunicorn when installed."""
+    service_dir = os.path.join(root, SERVICES[service]["dir"])
+    env = dict(os.environ, FLASK_DEBUG="0", MPLBACKEND="Agg")
+    if shutil.which("gunicorn"):
+        command = ["gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}", "api:app"]
+    else:
+        command = [sys.executable, os.path.abspath(__file__), "serve", "--root", root,
+                   "--service", service, "--port", str(port), "--workers", str(workers)]
+    return subprocess.Popen(command, cwd=service_dir, env=env, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def stop_service(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=10)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def wait_ready(base_url, timeout=30.0):
+    client = Client(base_url, 2.0)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if client.send("GET", "/health", None)[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{base_url} did not answer /health within {timeout:.0f}s")
+
+
+# ============================================================
+# SATURATION CURVES
+# ============================================================
+def saturation_point(runs, slo_ms):
+    """First offered rate the service could not keep up with (None if all held)."""
+    for run in runs:
+        if (run["throughput_rps"] < SATURATION_THROUGHPUT * run["offered_rps"]
+                or run["error_rate"] > 0.01 or run.get("p99_ms", 0) > slo_ms):
+            return run["offered_rps"]
+    return None
+
+
+def print_run(workers, run):
+    print(f"   {workers:>7} {run['offered_rps']:>9.1f} {run['throughput_rps']:>10.1f} "
+          f"{run['error_rate'] * 100:>6.1f}% {run['fallback_rate'] * 100:>8.1f}% "
+          f"{run.get('p50_ms', 0):>9.1f} {run.get('p95_ms', 0):>9.1f} {run.get('p99_ms', 0):>9.1f} "
+          f"{run.get('max_ms', 0):>9.1f}")
+
+
+def plot_curves(report, path):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, (ax_tp, ax_lat) = plt.subplots(1, 2, figsize=(13, 5))
+    for workers, curve in report["curves"].items():
+        rates = [r["offered_rps"] for r in curve["runs"]]
+        ax_tp.plot(rates, [r["throughput_rps"] for r in curve["runs"]], marker="o", label=f"{workers} workers")
+        ax_lat.plot(rates, [r.get("p99_ms", np.nan) for r in curve["runs"]], marker="o", label=f"{workers} workers")
+    top = max(r["offered_rps"] for c in report["curves"].values() for r in c["runs"])
+    ax_tp.plot([0, top], [0, top], linestyle="--", color="gray", linewidth=1, label="offered")
+    ax_tp.set(title="Throughput", xlabel="Offered load (req/s)", ylabel="Completed (req/s)")
+    ax_lat.axhline(report["slo_ms"], linestyle="--", color="red", linewidth=1, label="SLO")
+    ax_lat.set(title="p99 latency", xlabel="Offered load (req/s)", ylabel="ms", yscale="log")
+    for ax in (ax_tp, ax_lat):
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+    fig.suptitle(f"{report['service']} service saturation")
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+def run(service, workers_list, rates, duration, mix_weights, url=None, concurrency=64,
+        timeout=30.0, slo_ms=1000.0, warmup=20, seed=0):
+    """
+    Saturation curves: every offered rate against every worker count.
+
+    Returns:
+        dict: meta, settings and {workers: {"runs": [...], "saturation_rps": ...}}
+    """
+    scratch_root = None
+    root = ML_ROOT
+    if url is None:
+        scratch_root = tempfile.mkdtemp(prefix="carbonmeter_load_")
+        root = os.path.join(scratch_root, "ml")
+        shutil.copytree(ML_ROOT, root, ignore=SCRATCH_IGNORE)
+
+    mix = RequestMix(service, mix_weights, root=root, seed=seed)
+    report = {
+        "meta": machine_metadata(),
+        "service": service,
+        "duration": duration,
+        "mix": mix_weights,
+        "slo_ms": slo_ms,
+        "server": "external" if url else ("gunicorn" if shutil.which("gunicorn") else "werkzeug-prefork"),
+        "curves": {},
+    }
+
+    print(f"\n🔥 Load test: {service} service ({report['server']}), mix {mix_weights}")
+    print(f"   {'workers':>7} {'offered':>9} {'done/s':>10} {'errors':>7} {'fallback':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    try:
+        for workers in ([None] if url else workers_list):
+            process = None
+            base_url = url
+            if url is None:
+                port = free_port()
+                base_url = f"http://127.0.0.1:{port}"
+                process = start_service(root, service, workers, port)
+            try:
+                wait_ready(base_url)
+                # Lazy imports / model loads happen in every worker's first requests
+                run_load(base_url, mix, rate=max(5, warmup), duration=1,
+                         concurrency=concurrency, timeout=timeout)
+                runs = []
+                for rate in rates:
+                    result = run_load(base_url, mix, rate, duration, concurrency, timeout)
+                    runs.append(result)
+                    print_run(workers or "-", result)
+                label = str(workers or "external")
+                report["curves"][label] = {"runs": runs, "saturation_rps": saturation_point(runs, slo_ms)}
+            finally:
+                if process is not None:
+                    stop_service(process)
+    finally:
+        if scratch_root:
+            shutil.rmtree(scratch_root, ignore_errors=True)
+
+    print("\n📈 Saturation (throughput < 90% of offered, >1% errors, or p99 > SLO):")
+    for label, curve in report["curves"].items():
+        point = curve["saturation_rps"]
+        print(f"   {label:>8} workers: " + (f"saturates at {point:g} req/s" if point else
+                                             f"held every rate up to {rates[-1]:g} req/s"))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CarbonMeter ML services load test")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Measure saturation curves")
+    run_parser.add_argument("--service", choices=list(SERVICES), default="org")
+    run_parser.add_argument("--workers", default="1,2,4", help="Worker counts (default: 1,2,4)")
+    run_parser.add_argument("--rates", default="5,10,25,50,100", help="Offered req/s (default: 5,10,25,50,100)")
+    run_parser.add_argument("--duration", type=float, default=10, help="Seconds per rate (default: 10)")
+    run_parser.add_argument("--mix", default=None,
+                            help="kind=weight,... (org: historical_data, input_features, save_csv; "
+                                 "individual: missing_day, organization)")
+    run_parser.add_argument("--url", default=None, help="Test an already running service instead")
+    run_parser.add_argument("--concurrency", type=int, default=64, help="Client threads (default: 64)")
+    run_parser.add_argument("--timeout", type=float, default=30, help="Request timeout in seconds")
+    run_parser.add_argument("--slo-ms", type=float, default=1000, help="p99 latency objective (default: 1000)")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", default=None, help="Result JSON path")
+    run_parser.add_argument("--plot", action="store_true", help="Also save a PNG of the curves")
+
+    serve_parser = commands.add_parser("serve", help=argparse.SUPPRESS)
+    serve_parser.add_argument("--root", required=True)
+    serve_parser.add_argument("--service", choices=list(SERVICES), required=True)
+    serve_parser.add_argument("--port", type=int, required=True)
+    serve_parser.add_argument("--workers", type=int, default=1)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.root, args.service, args.port, args.workers)
+        return 0
+
+    report = run(
+        args.service,
+        [int(w) for w in args.workers.split(",")],
+        [float(r) for r in args.rates.split(",")],
+        args.duration,
+        parse_mix(args.mix, args.service),
+        url=args.url,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        slo_ms=args.slo_ms,
+        seed=args.seed,
+    )
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"load_{args.service}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to: {output}")
+    if args.plot:
+        plot_path = os.path.splitext(output)[0] + ".png"
+        plot_curves(report, plot_path)
+        print(f"📊 Curves saved to: {plot_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,703 @@
+"""
+============================================================
+CARBONMETER - BENCHMARK SUITE
+============================================================
+
+PURPOSE:
+    Tell whether a change made the ML tier faster or slower.
+
+    Groups:
+        api_individual  Every Carbon_meter/api.py endpoint (Flask test
+                        client): single-request latency + batch throughput
+        api_org         Every predict_org_emissions/api.py endpoint,
+                        same measurements
+        forecast        predict_next_days at 7 / 30 / 180 days
+        training        Wall time of each training script
+        io              Dataset CSV write/read, daily-log upsert,
+                        summary cube and prediction index writes
+        charts          Comparison and dashboard rendering
+        parsing         Request handling of 1k-element arrays: JSON
+                        decode/encode (stdlib vs orjson), hand-written
+                        float() loops vs the compiled request schemas,
+                        /predict/org + /chart-data end to end with
+                        either JSON provider, a 1k-day history sent as
+                        JSON rows / JSON columns / Arrow / MessagePack,
+                        and a gzipped /chart-data response
+
+    Inputs come from the fixture generators (data/generate_data.py,
+    generate_input_template.py). Everything runs in a scratch copy
+    of ml/, so no tracked CSV, cube or index is touched.
+
+    Benchmarks whose requirements are missing (model file, xgboost,
+    scikit-learn, ...) are recorded as skipped with the reason.
+
+RESULTS:
+    JSON in benchmarks/results/<timestamp>_<commit>.json:
+        {"meta": {machine, python, packages, commit, ...},
+         "results": {"group/name": {median_ms, p95_ms, ...}}}
+
+USAGE:
+    python benchmarks/run_benchmarks.py run
+    python benchmarks/run_benchmarks.py run --groups api_org,forecast --quick
+    python benchmarks/run_benchmarks.py compare results/base.json results/new.json --threshold 0.10
+============================================================
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ML_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+GROUPS = ["api_individual", "api_org", "forecast", "training", "io", "charts", "parsing"]
+PACKAGES = ["numpy", "pandas", "flask", "joblib", "matplotlib", "xgboost", "scikit-learn", "pyarrow",
+            "orjson", "msgpack"]
+DEFAULT_THRESHOLD = 0.10
+
+# Not copied into the scratch tree
+SCRATCH_IGNORE = shutil.ignore_patterns("__pycache__", "results", "*.db", "forecast_cache")
+
+
+# ============================================================
+# TIMING
+# ============================================================
+def summarize(samples, items=1):
+    """Latency statistics (ms) of a list of durations in seconds."""
+    ms = sorted(s * 1000 for s in samples)
+    median = statistics.median(ms)
+    return {
+        "runs": len(ms),
+        "items": items,
+        "min_ms": round(ms[0], 4),
+        "median_ms": round(median, 4),
+        "mean_ms": round(statistics.fmean(ms), 4),
+        "p95_ms": round(ms[min(len(ms) - 1, int(round(0.95 * (len(ms) - 1))))], 4),
+        "stdev_ms": round(statistics.stdev(ms), 4) if len(ms) > 1 else 0.0,
+        "items_per_second": round(items / (median / 1000), 2) if median else None,
+    }
+
+
+def measure(func, repeat=20, warmup=2, items=1):
+    """Time func() `repeat` times after `warmup` untimed calls."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, items)
+
+
+class Skip(Exception):
+    """Raised by a group or case whose requirements are missing."""
+
+
+def require(*modules):
+    missing = [m for m in modules if importlib.util.find_spec(m) is None]
+    if missing:
+        raise Skip(f"not installed: {', '.join(missing)}")
+
+
+def skip_case(reason):
+    """A case that is always recorded as skipped."""
+    def case():
+        raise Skip(reason)
+    return case
+
+
+@contextlib.contextmanager
+def working_dir(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def load_module(name, path):
+    """Import a script by path under a unique module name."""
+    directory = os.path.dirname(path)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    with working_dir(directory):
+        spec.loader.exec_module(module)
+    return module
+
+
+# ============================================================
+# SUITE
+# ============================================================
+class Suite:
+    """Cases registered by the group functions below."""
+
+    def __init__(self, scratch, repeat=20, batch=100, quick=False):
+        self.scratch = scratch
+        self.repeat = 5 if quick else repeat
+        self.batch = 20 if quick else batch
+        self.quick = quick
+        self.cases = []
+
+    def add(self, name, func, repeat=None, items=1, cwd=None):
+        self.cases.append((name, func, repeat or self.repeat, items, cwd))
+
+    def path(self, *parts):
+        return os.path.join(self.scratch, *parts)
+
+
+def expect_ok(response):
+    if response.status_code >= 500:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+def group_api_individual(suite):
+    service_dir = suite.path("Carbon_meter")
+    api = load_module("bench_individual_api", os.path.join(service_dir, "api.py"))
+    client = api.app.test_client()
+    history = [3.0 + (i % 7) * 0.2 for i in range(90)]
+
+    def post(path, body):
+        return lambda: expect_ok(client.post(path, json=body))
+
+    suite.add("health", lambda: expect_ok(client.get("/health")))
+    for days in (5, 30, 90):
+        suite.add(f"predict_missing_day_{days}d",
+                  post("/predict/missing-day", {"emission_history": history[:days]}))
+    org_body = {"organizationId": "bench", "sector": "Manufacturing",
+                "emission_history": history[:30], "employee_count": 250}
+    suite.add("predict_organization", post("/predict/organization", org_body))
+
+    missing_day = post("/predict/missing-day", {"emission_history": history[:30]})
+    suite.add(f"batch_predict_missing_day_x{suite.batch}",
+              lambda: [missing_day() for _ in range(suite.batch)],
+              repeat=max(3, suite.repeat // 4), items=suite.batch)
+
+
+def group_api_org(suite):
+    service_dir = suite.path("predict_org_emissions")
+    api = load_module("bench_org_api", os.path.join(service_dir, "api.py"))
+    from generate_input_template import build_windows, api_payloads
+
+    client = api.app.test_client()
+    payloads = api_payloads(build_windows(plants=50, days=30, seed=1))
+    historical_body = {
+        "organizationId": "bench-historical",
+        "industry": "steel",
+        "historical_data": [
+            {key: series[i] for key, series in payloads[1]["input_features"].items()}
+            for i in range(30)
+        ],
+    }
+    chart_body = {
+        "organizationId": "bench",
+        "historical_co2": [40000 + 50 * i for i in range(30)],
+        "predicted_co2": [41500 + 40 * i for i in range(180)],
+    }
+    save_body = {"organization_id": "bench", "industry": "cement",
+                 "period": "next_30_days", "predicted_emission": 3200.0,
+                 "recommendations": ["a", "b", "c"]}
+
+    def get(path):
+        return lambda: expect_ok(client.get(path))
+
+    def post(path, body):
+        return lambda: expect_ok(client.post(path, json=body))
+
+    counter = iter(range(10 ** 9))
+
+    def chart_miss():
+        # A new width each call: always a cache miss, i.e. a real render
+        body = dict(chart_body, width=800 + next(counter) % 2000, dpi=100)
+        return expect_ok(client.post("/chart/comparison", json=body))
+
+    suite.add("health", get("/health"), cwd=service_dir)
+    suite.add("industries", get("/industries"), cwd=service_dir)
+    suite.add("predict_org_input_features", post("/predict/org", payloads[0]), cwd=service_dir)
+    suite.add("predict_org_historical_data", post("/predict/org", historical_body), cwd=service_dir)
+    suite.add("save_csv", post("/save-csv", save_body), cwd=service_dir)
+    suite.add("chart_comparison_render", chart_miss, repeat=max(3, suite.repeat // 4), cwd=service_dir)
+    suite.add("chart_comparison_cached", post("/chart/comparison", chart_body), cwd=service_dir)
+    suite.add("chart_data", post("/chart-data", dict(chart_body, points=100)), cwd=service_dir)
+
+    def batch():
+        for i in range(suite.batch):
+            expect_ok(client.post("/predict/org", json=payloads[i % len(payloads)]))
+
+    suite.add(f"batch_predict_org_x{suite.batch}", batch,
+              repeat=max(3, suite.repeat // 4), items=suite.batch, cwd=service_dir)
+
+
+def group_forecast(suite):
+    service_dir = suite.path("predict_org_emissions")
+    model_path = os.path.join(service_dir, "industry_xgboost_final.pkl")
+    if not os.path.exists(model_path):
+        raise Skip("industry_xgboost_final.pkl not found")
+
+    sys.path.insert(0, service_dir)
+    from predict_future_emissions import IndustryEmissionPredictor
+    from generate_input_template import build_template
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        predictor = IndustryEmissionPredictor(model_path)
+    window = build_template(30)
+
+    def forecast(days):
+        def run():
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                predictor.predict_next_days(window, forecast_days=days)
+        return run
+
+    for days in (7, 30, 180):
+        suite.add(f"predict_next_days_{days}", forecast(days),
+                  repeat=max(3, suite.repeat // (4 if days == 180 else 2)), items=days)
+
+
+TRAINING_SCRIPTS = [
+    # (name, script relative to ml/, modules it needs)
+    ("train_idust", "predict_org_emissions/old_training_scripts/training_models/train_idust.py",
+     ("xgboost", "sklearn")),
+    ("new_XGboost", "predict_org_emissions/old_training_scripts/training_models/new_XGboost.py",
+     ("xgboost", "sklearn")),
+    ("new_train", "predict_org_emissions/old_training_scripts/training_models/new_train.py",
+     ("xgboost", "sklearn")),
+    ("behavioral_train", "Carbon_meter/model_training/train.py", ("xgboost", "sklearn")),
+]
+
+
+def group_training(suite):
+    # Training scripts read old_training_scripts/industry_emission_10k.csv
+    generate_data = load_module(
+        "bench_generate_data", suite.path("predict_org_emissions", "data", "generate_data.py")
+    )
+    rows = 2000 if suite.quick else 10000
+    generate_data.write_dataset(
+        generate_data.DatasetSpec(rows=rows),
+        suite.path("predict_org_emissions", "old_training_scripts", "industry_emission_10k.csv"),
+        verbose=False,
+    )
+
+    for name, script, modules in TRAINING_SCRIPTS:
+        missing = [m for m in modules if importlib.util.find_spec(m) is None]
+        path = suite.path(*script.split("/"))
+        # train.py uses paths relative to Carbon_meter/
+        cwd = suite.path("Carbon_meter") if name == "behavioral_train" else os.path.dirname(path)
+
+        def run(path=path, cwd=cwd, missing=missing):
+            if missing:
+                raise Skip(f"not installed: {', '.join(missing)}")
+            result = subprocess.run(
+                [sys.executable, path], cwd=cwd, capture_output=True, text=True,
+                env=dict(os.environ, MPLBACKEND="Agg")
+            )
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "failed")
+
+        suite.add(name, run, repeat=1 if suite.quick else 3)
+
+
+def group_io(suite):
+    generate_data = load_module(
+        "bench_generate_data", suite.path("predict_org_emissions", "data", "generate_data.py")
+    )
+    import pandas as pd
+
+    rows = 20000 if suite.quick else 100000
+    dataset = generate_data.generate_chunk(generate_data.DatasetSpec(rows=rows, chunk_rows=rows), 0)
+    csv_path = suite.path("bench_dataset.csv")
+    dataset.to_csv(csv_path, index=False)
+
+    suite.add(f"dataset_csv_write_{rows}", lambda: dataset.to_csv(csv_path, index=False),
+              repeat=max(3, suite.repeat // 4), items=rows)
+    suite.add(f"dataset_csv_read_{rows}", lambda: pd.read_csv(csv_path),
+              repeat=max(3, suite.repeat // 4), items=rows)
+
+    # Daily log upsert (rewrites the whole file) on a one-year log
+    individual = load_module(
+        "bench_carbonmeter_individual",
+        suite.path("Carbon_meter", "calculation_emission", "carbonmeter_individual.py")
+    )
+    individual.CSV_FILE = suite.path("bench_daily_log.csv")
+    days = pd.date_range("2025-01-01", periods=365).strftime("%Y-%m-%d")
+    for day in days:
+        individual.update_csv([day, "bike", 0.5, 1, 2, 3, 4, 5, 6, -1, 20, 0], day)
+    suite.add("daily_log_upsert_365d",
+              lambda: individual.update_csv([days[-1], "bus", 1, 1, 1, 1, 1, 1, 1, 0, 7, 0], days[-1]))
+
+    service_dir = suite.path("predict_org_emissions")
+    sys.path.insert(0, service_dir)
+    from summary_cube import record_forecast
+    from prediction_index import PredictionIndex
+
+    forecast = pd.DataFrame({"predicted_co2_kg": [41000.0 + i for i in range(30)],
+                             "day_ahead": range(1, 31)})
+    cube_path = suite.path("bench_cube.json")
+    suite.add("summary_cube_record_30d",
+              lambda: record_forecast(forecast, "bench", horizon=30, path=cube_path))
+
+    index = PredictionIndex(suite.path("bench_index.db"))
+    counter = iter(range(10 ** 9))
+    suite.add("prediction_index_register",
+              lambda: index.register(suite.path(f"forecast_{next(counter)}.csv"), forecast))
+
+
+def group_charts(suite):
+    require("matplotlib")
+    service_dir = suite.path("predict_org_emissions")
+    sys.path.insert(0, service_dir)
+    from visualize_predictions import EmissionVisualizer
+    import pandas as pd
+
+    historical = pd.DataFrame({"co2_emission": [40000 + 50 * i for i in range(30)]})
+    predicted = pd.DataFrame({"predicted_co2_kg": [41500 + 40 * i for i in range(180)]})
+    visualizer = EmissionVisualizer(suite.path("bench_charts"), headless=True, dpi=100, verbose=False)
+
+    for chart in ("comparison", "dashboard"):
+        suite.add(f"render_{chart}_png",
+                  lambda chart=chart: visualizer.render_bytes(chart, historical, predicted),
+                  repeat=max(3, suite.repeat // 4))
+
+
+def group_parsing(suite):
+    sys.path.insert(0, suite.path())
+    import numpy as np
+    from request_schemas import Schema, FloatArray, FloatArrayMap, Records, String
+    from json_provider import OrjsonProvider, orjson
+
+    n = 1000
+    columns = ("electricity_kwh", "diesel_liters", "natural_gas_m3", "production_units")
+    history = [round(3.0 + (i % 7) * 0.21, 2) for i in range(n)]
+    features = {"organizationId": "bench", "industry": "cement",
+                "input_features": {c: [v * 1000 for v in history] for c in columns}}
+    records = {"organizationId": "bench", "industry": "cement",
+               "historical_data": [{c: v * 1000 for c in columns} for v in history]}
+    raw = {name: json.dumps(body).encode() for name, body in
+           (("history", {"emission_history": history}), ("features", features), ("records", records))}
+
+    def needs_orjson(func):
+        def case():
+            if orjson is None:
+                raise Skip("not installed: orjson")
+            return func()
+        return case
+
+    for name, data in raw.items():
+        suite.add(f"decode_{name}_1k_stdlib", lambda data=data: json.loads(data))
+        suite.add(f"decode_{name}_1k_orjson", needs_orjson(lambda data=data: orjson.loads(data)))
+
+    # Validation as the handlers did it before request_schemas ...
+    decoded = {name: json.loads(data) for name, data in raw.items()}
+
+    def handwritten_records():
+        rows = decoded["records"]["historical_data"]
+        return {c: [float(row.get(c, 0) or 0) for row in rows] for c in columns}
+
+    suite.add("validate_history_1k_handwritten",
+              lambda: [float(x) for x in decoded["history"]["emission_history"]])
+    suite.add("validate_features_1k_handwritten",
+              lambda: {c: [float(x) for x in v] for c, v in decoded["features"]["input_features"].items()})
+    suite.add("validate_records_1k_handwritten", handwritten_records)
+
+    # ... and through the compiled schemas (float64 arrays out)
+    history_schema = Schema("history", emission_history=FloatArray())
+    org_schema = Schema("org", organizationId=String(default="unknown"), industry=String(lower=True),
+                        input_features=FloatArrayMap(), historical_data=Records(columns))
+    suite.add("validate_history_1k_schema", lambda: history_schema.validate(decoded["history"]))
+    suite.add("validate_features_1k_schema", lambda: org_schema.validate(decoded["features"]))
+    suite.add("validate_records_1k_schema", lambda: org_schema.validate(decoded["records"]))
+
+    response = {"historical": {"x": list(range(n)), "y": history},
+                "predicted": {"x": list(range(n)), "y": history}}
+    response_np = {k: {"x": np.arange(n), "y": np.asarray(history)} for k in response}
+    suite.add("encode_response_1k_stdlib", lambda: json.dumps(response, sort_keys=True))
+    suite.add("encode_response_1k_orjson", needs_orjson(lambda: orjson.dumps(
+        response_np, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS)))
+
+    # End to end: same endpoints, JSON provider swapped on the app
+    service_dir = suite.path("predict_org_emissions")
+    api = load_module("bench_parsing_org_api", os.path.join(service_dir, "api.py"))
+    client = api.app.test_client()
+    providers = {"stdlib": api.app.json_provider_class(api.app)}
+    if orjson is not None:
+        providers["orjson"] = OrjsonProvider(api.app)
+    chart_body = {"organizationId": "bench", "historical_co2": [v * 1000 for v in history],
+                  "predicted_co2": [v * 1000 for v in history], "points": n}
+
+    def endpoint(path, data, provider, content_type="application/json", headers=None):
+        def case():
+            api.app.json = providers[provider]
+            return expect_ok(client.post(path, data=data, content_type=content_type, headers=headers))
+        return case
+
+    for provider in ("stdlib", "orjson"):
+        wrap = needs_orjson if provider == "orjson" else (lambda func: func)
+        suite.add(f"predict_org_features_1k_{provider}",
+                  wrap(endpoint("/predict/org", raw["features"], provider)), cwd=service_dir)
+        suite.add(f"chart_data_1k_{provider}",
+                  wrap(endpoint("/chart-data", json.dumps(chart_body), provider)), cwd=service_dir)
+
+    # The same 1k-day history uploaded row-wise and column-wise (columnar.py)
+    provider = "orjson" if orjson is not None else "stdlib"
+    series = {c: np.asarray(v) for c, v in features["input_features"].items()}
+    uploads = {
+        "records_json": (raw["records"], "application/json"),
+        "columns_json": (json.dumps({"organizationId": "bench", "industry": "cement",
+                                     "historical_data": features["input_features"]}), "application/json"),
+    }
+    if importlib.util.find_spec("pyarrow") is not None:
+        import pyarrow as pa
+
+        table = pa.table(series).replace_schema_metadata({"organizationId": "bench", "industry": "cement"})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        uploads["arrow"] = (sink.getvalue().to_pybytes(), "application/vnd.apache.arrow.stream")
+    if importlib.util.find_spec("msgpack") is not None:
+        import msgpack
+
+        uploads["msgpack"] = (msgpack.packb({
+            "organizationId": "bench", "industry": "cement",
+            "historical_data": {c: v.astype("<f8").tobytes() for c, v in series.items()},
+        }), "application/msgpack")
+
+    for fmt in ("records_json", "columns_json", "arrow", "msgpack"):
+        name = f"predict_org_history_1k_{fmt}"
+        if fmt not in uploads:
+            package = "pyarrow" if fmt == "arrow" else fmt
+            suite.add(name, skip_case(f"not installed: {package}"))
+            continue
+        data, content_type = uploads[fmt]
+        suite.add(name, endpoint("/predict/org", data, provider, content_type), cwd=service_dir)
+
+    suite.add("chart_data_1k_gzip",
+              endpoint("/chart-data", json.dumps(chart_body), provider,
+                       headers={"Accept-Encoding": "gzip"}), cwd=service_dir)
+
+
+GROUP_FUNCTIONS = {
+    "api_individual": group_api_individual,
+    "api_org": group_api_org,
+    "forecast": group_forecast,
+    "training": group_training,
+    "io": group_io,
+    "charts": group_charts,
+    "parsing": group_parsing,
+}
+
+
+# ============================================================
+# RUN / COMPARE
+# ============================================================
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ML_ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def machine_metadata():
+    """Enough to tell whether two result files are comparable."""
+    from importlib import metadata
+
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+
+    memory_gb = None
+    if os.path.exists("/proc/meminfo"):
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    memory_gb = round(int(line.split()[1]) / 1024 ** 2, 1)
+                    break
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "cpu_count": os.cpu_count(),
+        "memory_gb": memory_gb,
+        "python": platform.python_version(),
+        "packages": versions,
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--", ".")),
+    }
+
+
+def run(groups, repeat=20, batch=100, quick=False, match=None):
+    """
+    Run the selected groups in a scratch copy of ml/.
+
+    Returns:
+        dict: {"meta": ..., "results": {"group/name": stats or {"skipped": reason}}}
+    """
+    scratch_root = tempfile.mkdtemp(prefix="carbonmeter_bench_")
+    scratch = os.path.join(scratch_root, "ml")
+    shutil.copytree(ML_ROOT, scratch, ignore=SCRATCH_IGNORE)
+    os.environ.setdefault("MPLBACKEND", "Agg")
+
+    results = {}
+    devnull = open(os.devnull, "w")
+    try:
+        for group in groups:
+            print(f"\n⏱️  {group}")
+            suite = Suite(scratch, repeat=repeat, batch=batch, quick=quick)
+            try:
+                with contextlib.redirect_stdout(devnull):
+                    GROUP_FUNCTIONS[group](suite)
+            except Skip as e:
+                results[f"{group}/*"] = {"skipped": str(e)}
+                print(f"   ⏭️  skipped: {e}")
+                continue
+
+            for name, func, case_repeat, items, cwd in suite.cases:
+                key = f"{group}/{name}"
+                if match and match not in key:
+                    continue
+                try:
+                    with working_dir(cwd or os.getcwd()), contextlib.redirect_stdout(devnull):
+                        stats = measure(func, repeat=case_repeat,
+                                        warmup=0 if group == "training" else 2, items=items)
+                except Skip as e:
+                    results[key] = {"skipped": str(e)}
+                    print(f"   ⏭️  {name:<38} skipped: {e}")
+                    continue
+                except Exception as e:
+                    results[key] = {"error": str(e)}
+                    print(f"   ❌ {name:<38} error: {e}")
+                    continue
+
+                results[key] = stats
+                rate = f"{stats['items_per_second']:>10,.1f}/s" if stats["items"] > 1 else ""
+                print(f"   {name:<41} median {stats['median_ms']:>10.3f} ms  "
+                      f"p95 {stats['p95_ms']:>10.3f} ms  {rate}")
+    finally:
+        devnull.close()
+        shutil.rmtree(scratch_root, ignore_errors=True)
+
+    return {"meta": machine_metadata(), "results": results}
+
+
+def save_results(report, output=None):
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{report['meta']['commit'] or 'nogit'}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    return output
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, metric="median_ms"):
+    """
+    Compare two result files on `metric` (lower is better).
+
+    Returns:
+        list: (key, base, new, ratio, verdict) rows; verdict is
+        'regression', 'improvement', 'same' or 'n/a'
+    """
+    rows = []
+    keys = sorted(set(baseline["results"]) | set(current["results"]))
+    for key in keys:
+        base = baseline["results"].get(key, {}).get(metric)
+        new = current["results"].get(key, {}).get(metric)
+        if base is None or new is None or base == 0:
+            rows.append((key, base, new, None, "n/a"))
+            continue
+        ratio = new / base
+        if ratio > 1 + threshold:
+            verdict = "regression"
+        elif ratio < 1 - threshold:
+            verdict = "improvement"
+        else:
+            verdict = "same"
+        rows.append((key, base, new, ratio, verdict))
+    return rows
+
+
+def print_comparison(rows, baseline, current, threshold):
+    for label, report in (("baseline", baseline), ("current", current)):
+        meta = report["meta"]
+        print(f"{label:<9}: {meta.get('commit')}{' (dirty)' if meta.get('dirty') else ''} "
+              f"{meta.get('timestamp')} | {meta.get('cpu_count')} CPU | Python {meta.get('python')}")
+    if (baseline["meta"].get("hostname"), baseline["meta"].get("cpu_count")) != \
+            (current["meta"].get("hostname"), current["meta"].get("cpu_count")):
+        print("⚠️  Results come from different machines; differences may not be meaningful")
+
+    icons = {"regression": "🔴", "improvement": "🟢", "same": "  ", "n/a": "  "}
+    print(f"\n{'benchmark':<52}{'base ms':>12}{'new ms':>12}{'change':>10}")
+    print("-" * 88)
+    for key, base, new, ratio, verdict in rows:
+        base_s = f"{base:.3f}" if base is not None else "-"
+        new_s = f"{new:.3f}" if new is not None else "-"
+        change = f"{(ratio - 1) * 100:+.1f}%" if ratio is not None else verdict
+        print(f"{icons[verdict]} {key:<50}{base_s:>12}{new_s:>12}{change:>10}")
+
+    regressions = [row for row in rows if row[4] == "regression"]
+    print("-" * 88)
+    print(f"{len(regressions)} regression(s) beyond {threshold * 100:.0f}%")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CarbonMeter ML benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmarks and store JSON results")
+    run_parser.add_argument("--groups", default=",".join(GROUPS),
+                            help=f"Comma-separated groups (default: all of {','.join(GROUPS)})")
+    run_parser.add_argument("--match", default=None, help="Only benchmarks whose name contains this")
+    run_parser.add_argument("--repeat", type=int, default=20, help="Timed runs per benchmark")
+    run_parser.add_argument("--batch", type=int, default=100, help="Requests per batch benchmark")
+    run_parser.add_argument("--quick", action="store_true", help="Fewer runs, smaller inputs")
+    run_parser.add_argument("--output", default=None, help="Result file (default: results/<time>_<commit>.json)")
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions between two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="Relative slowdown counted as a regression (default: 0.10)")
+    compare_parser.add_argument("--metric", default="median_ms", help="Statistic to compare")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        groups = [g.strip() for g in args.groups.split(",") if g.strip()]
+        unknown = [g for g in groups if g not in GROUP_FUNCTIONS]
+        if unknown:
+            parser.error(f"unknown group(s) {unknown}; choose from {GROUPS}")
+        report = run(groups, repeat=args.repeat, batch=args.batch, quick=args.quick, match=args.match)
+        print(f"\n💾 Results saved to: {save_results(report, args.output)}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold, args.metric)
+    regressions = print_comparison(rows, baseline, current, args.threshold)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+============================================================
+CARBONMETER - COLUMNAR REQUEST BODIES (JSON / ARROW / MSGPACK)
+============================================================
+
+PURPOSE:
+    A year of history from many plants posted as JSON objects, one
+    per day, repeats every key on every row and is then pulled apart
+    again in Python. /predict/org also accepts the same series
+    column by column, picked by Content-Type:
+
+    application/json (as before)
+        rows:     {"historical_data": [{"electricity_kwh": 1200, ...}, ...]}
+        columns:  {"historical_data": {"electricity_kwh": [1200, ...], ...}}
+
+    application/vnd.apache.arrow.stream  (or .file)   needs pyarrow
+        An Arrow IPC table with one numeric column per series. The
+        other fields (organizationId, industry, period,
+        historical_days) come from the query string or the schema
+        metadata. Columns become float64 NumPy arrays inside Arrow;
+        no Python object is created per value.
+
+    application/msgpack  (or application/x-msgpack)   needs msgpack
+        The JSON body's shape in MessagePack. A series may be a bin
+        of little-endian float64 values, read with np.frombuffer
+        (no copy); plain arrays work too.
+
+    Content-Encoding: gzip (or deflate) request bodies are
+    decompressed first, up to MAX_BODY_MB (default 64) of output.
+    A format whose package is not installed, or an unknown
+    Content-Type, is answered with 415.
+
+USAGE:
+    from columnar import read_body
+
+    try:
+        data = read_body(request, columns=FEATURE_COLUMNS, target="historical_data")
+    except SchemaError as e:
+        return e.response()
+
+    curl -X POST localhost:8001/predict/org?organizationId=p1&industry=cement \\
+         -H "Content-Type: application/vnd.apache.arrow.stream" \\
+         --data-binary @history.arrow
+============================================================
+"""
+
+import os
+import zlib
+
+from flask import current_app
+
+from request_schemas import SchemaError
+from service_startup import lazy_module, module_available
+
+# Imported by the first body that needs them, so startup stays
+# Flask-only; a missing package answers that body with 415
+np = lazy_module("numpy")
+pa = lazy_module("pyarrow")
+msgpack = lazy_module("msgpack")
+
+JSON_TYPES = ("application/json",)
+ARROW_STREAM_TYPES = ("application/vnd.apache.arrow.stream",)
+ARROW_FILE_TYPES = ("application/vnd.apache.arrow.file", "application/x-apache-arrow")
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+MAX_BODY_BYTES = int(float(os.environ.get("MAX_BODY_MB", 64)) * 1024 * 1024)
+ENCODINGS = {"gzip": 16 + zlib.MAX_WBITS, "x-gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+# Scalar fields a binary body can take from the query string / metadata
+SCALAR_FIELDS = ("organizationId", "organization_id", "industry", "period", "historical_days")
+
+
+def _unsupported(message):
+    return SchemaError([(None, message)], status=415)
+
+
+def _invalid(message):
+    return SchemaError([(None, message)])
+
+
+def raw_body(request):
+    """Request body bytes, decompressed when Content-Encoding says so."""
+    data = request.get_data(cache=True)
+    encoding = (request.content_encoding or "").lower()
+    if not encoding or encoding == "identity":
+        return data
+    if encoding not in ENCODINGS:
+        raise _unsupported(f"Content-Encoding '{encoding}' is not supported (use gzip)")
+
+    inflater = zlib.decompressobj(ENCODINGS[encoding])
+    try:
+        body = inflater.decompress(data, MAX_BODY_BYTES + 1)
+    except zlib.error:
+        raise _invalid(f"body is not valid {encoding} data") from None
+    if len(body) > MAX_BODY_BYTES:
+        raise SchemaError([(None, f"decompressed body is larger than {MAX_BODY_BYTES // (1024 * 1024)} MB")],
+                          status=413)
+    if not inflater.eof:
+        raise _invalid(f"body is truncated {encoding} data")
+    return body
+
+
+def _scalars(request, metadata=None):
+    """organizationId, industry, ... from Arrow metadata, then the query string."""
+    data = {}
+    for key, value in (metadata or {}).items():
+        key = key.decode() if isinstance(key, bytes) else key
+        if key in SCALAR_FIELDS:
+            data[key] = value.decode() if isinstance(value, bytes) else value
+    for key in SCALAR_FIELDS:
+        if key in request.args:
+            data[key] = request.args[key]
+    return data
+
+
+def decode_arrow(data, request, columns, target, file_format=False):
+    if not module_available("pyarrow"):
+        raise _unsupported("Arrow bodies need the pyarrow package on the server")
+    try:
+        if file_format:
+            table = pa.ipc.open_file(pa.BufferReader(data)).read_all()
+        else:
+            table = pa.ipc.open_stream(pa.py_buffer(data)).read_all()
+    except (pa.ArrowInvalid, OSError) as e:
+        raise _invalid(f"body is not a valid Arrow IPC {'file' if file_format else 'stream'}: {e}") from None
+
+    series = {}
+    for name in columns:
+        if name not in table.column_names:
+            continue
+        try:
+            column = table.column(name).cast(pa.float64()).fill_null(0.0)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            raise _invalid(f"Arrow column '{name}' must be numeric") from None
+        series[name] = column.to_numpy()
+    body = _scalars(request, table.schema.metadata)
+    body[target] = series
+    return body
+
+
+def _frombuffer(value):
+    """bin of little-endian float64 values -> float64 array (no copy)."""
+    if len(value) % 8:
+        raise _invalid("binary series must be little-endian float64 (a multiple of 8 bytes)")
+    return np.frombuffer(value, dtype="<f8")
+
+
+def decode_msgpack(data, request):
+    if not module_available("msgpack"):
+        raise _unsupported("MessagePack bodies need the msgpack package on the server")
+    try:
+        body = msgpack.unpackb(data, raw=False)
+    except (ValueError, TypeError) as e:  # msgpack's decode errors are ValueErrors
+        raise _invalid(f"body is not valid MessagePack: {e or type(e).__name__}") from None
+    if not isinstance(body, dict):
+        raise _invalid("request body must be a MessagePack map")
+
+    for value in body.values():
+        if isinstance(value, dict):
+            for name, series in value.items():
+                if isinstance(series, (bytes, bytearray)):
+                    value[name] = _frombuffer(series)
+    for key, value in _scalars(request).items():
+        body.setdefault(key, value)
+    return body
+
+
+def read_body(request, columns=(), target="historical_data"):
+    """
+    Decode a request body by its Content-Type.
+
+    Args:
+        request: The Flask request
+        columns: Series names an Arrow table may carry
+        target (str): Field the Arrow columns are stored under
+
+    Returns:
+        dict: Body in the JSON shape (series possibly NumPy arrays),
+            or None for an empty body
+
+    Raises:
+        SchemaError: 415 for an unsupported type/encoding, 400 for a
+            body that does not decode
+    """
+    mimetype = request.mimetype
+    data = raw_body(request)
+    if not data:
+        return None
+
+    if mimetype in JSON_TYPES or mimetype.endswith("+json"):
+        try:
+            return current_app.json.loads(data)
+        except ValueError as e:
+            raise _invalid(f"body is not valid JSON: {e}") from None
+    if mimetype in ARROW_STREAM_TYPES:
+        return decode_arrow(data, request, columns, target)
+    if mimetype in ARROW_FILE_TYPES:
+        return decode_arrow(data, request, columns, target, file_format=True)
+    if mimetype in MSGPACK_TYPES:
+        return decode_msgpack(data, request)
+
+    accepted = JSON_TYPES + ARROW_STREAM_TYPES + ARROW_FILE_TYPES + MSGPACK_TYPES
+    raise _unsupported(f"Unsupported Content-Type '{mimetype or 'none'}' (use one of {', '.join(accepted)})")
@@ -0,0 +1,236 @@
+"""
+============================================================
+CARBONMETER - EMISSION FACTOR REGISTRY
+============================================================
+
+PURPOSE:
+    Single source of emission factors for every calculator and
+    service under ml/ (individual calculator, industry calculator,
+    organization API, synthetic data generator).
+
+    Factors live in emission_factors.csv, one row per
+    (version, region, year, activity). A version is an immutable
+    snapshot: new values are published as a new version, never by
+    editing an old one, so pinning a version makes historical
+    recomputation reproducible.
+
+STRUCTURE:
+    The CSV is loaded once per process into a dense float array per
+    (version, region) of shape (years x activities). Years are
+    forward-filled, so asking for 2026 returns the latest factor
+    published for any year <= 2026. Single lookups are two dict hits
+    plus an array index; column lookups are one get_indexer call and
+    one fancy-index.
+
+USAGE:
+    from emission_factors import pinned
+
+    factors = pinned("2024.1")
+    grid_ef = factors.factor("electricity")
+    efs = factors.lookup(df["activity"])          # np.ndarray
+============================================================
+"""
+
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+FACTORS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "emission_factors.csv")
+DEFAULT_REGION = "IN"
+
+REQUIRED_COLUMNS = ["version", "region", "year", "activity", "factor"]
+
+
+def _version_key(version):
+    """Sort key so "2025.10" orders after "2025.9"."""
+    return tuple(int(p) if p.isdigit() else p for p in str(version).split("."))
+
+
+class FactorTable:
+    """
+    Array-backed emission factor lookup indexed by
+    (version, region, year, activity).
+    """
+
+    def __init__(self, records):
+        """
+        Build the lookup arrays.
+
+        Args:
+            records (pd.DataFrame): Rows with REQUIRED_COLUMNS
+        """
+        missing = [c for c in REQUIRED_COLUMNS if c not in records.columns]
+        if missing:
+            raise ValueError(f"Missing factor columns: {missing}")
+
+        records = records.copy()
+        records["version"] = records["version"].astype(str)
+        records["region"] = records["region"].astype(str)
+        records["activity"] = records["activity"].astype(str)
+        records["year"] = records["year"].astype(np.int64)
+        records["factor"] = records["factor"].astype(np.float64)
+
+        duplicated = records.duplicated(["version", "region", "year", "activity"])
+        if duplicated.any():
+            dupes = records.loc[duplicated, ["version", "region", "year", "activity"]]
+            raise ValueError(f"Duplicate factor rows:\n{dupes.to_string(index=False)}")
+
+        self.records = records
+        self.versions = sorted(records["version"].unique(), key=_version_key)
+        self.latest_version = self.versions[-1]
+        self.activities = pd.Index(sorted(records["activity"].unique()))
+
+        self.units = (
+            records.drop_duplicates("activity", keep="last")
+            .set_index("activity")["unit"].to_dict()
+            if "unit" in records.columns else {}
+        )
+
+        # (version, region) -> (years array, years x activities matrix)
+        self._tables = {}
+        for (version, region), group in records.groupby(["version", "region"]):
+            years = np.sort(group["year"].unique())
+            matrix = np.full((len(years), len(self.activities)), np.nan)
+            matrix[
+                np.searchsorted(years, group["year"].to_numpy()),
+                self.activities.get_indexer(group["activity"])
+            ] = group["factor"].to_numpy()
+            # As-of semantics: carry each factor forward to later years
+            matrix = pd.DataFrame(matrix).ffill().to_numpy()
+            self._tables[(version, region)] = (years, matrix)
+
+    def _row(self, version, region, year):
+        version = self.latest_version if version is None else str(version)
+        try:
+            years, matrix = self._tables[(version, region)]
+        except KeyError:
+            raise KeyError(
+                f"No emission factors for version={version!r}, region={region!r}"
+            ) from None
+
+        if year is None:
+            return matrix[-1]
+
+        idx = np.searchsorted(years, int(year), side="right") - 1
+        if idx < 0:
+            raise KeyError(
+                f"No emission factors for {region} before {years[0]} "
+                f"in version {version}"
+            )
+        return matrix[idx]
+
+    def lookup(self, activities, region=DEFAULT_REGION, year=None,
+               version=None, default=None):
+        """
+        Vectorized factor lookup for a whole column of activities.
+
+        Args:
+            activities: Sequence / Series / array of activity names
+            region (str): Region code
+            year (int): Reporting year (None = latest available)
+            version (str): Factor version (None = latest)
+            default (float): Value for unknown activities; when None,
+                unknown activities raise KeyError
+
+        Returns:
+            np.ndarray: float64 factors aligned with activities
+        """
+        row = self._row(version, region, year)
+        codes = self.activities.get_indexer(pd.Index(activities, dtype=object))
+
+        values = np.where(codes >= 0, row[np.maximum(codes, 0)], np.nan)
+        unknown = np.isnan(values)
+        if unknown.any():
+            if default is None:
+                names = sorted(set(np.asarray(activities, dtype=object)[unknown]))
+                raise KeyError(f"Unknown emission factor activities: {names}")
+            values[unknown] = default
+
+        return values
+
+    def factor(self, activity, region=DEFAULT_REGION, year=None, version=None):
+        """Single factor lookup (kg CO2e per unit)."""
+        row = self._row(version, region, year)
+        code = self.activities.get_loc(activity) if activity in self.activities else -1
+        if code < 0 or np.isnan(row[code]):
+            raise KeyError(f"Unknown emission factor activity: {activity!r}")
+        return float(row[code])
+
+    def as_dict(self, region=DEFAULT_REGION, year=None, version=None):
+        """All factors defined for a version/region/year as a plain dict."""
+        row = self._row(version, region, year)
+        return {
+            activity: float(value)
+            for activity, value in zip(self.activities, row)
+            if not np.isnan(value)
+        }
+
+    def changed_activities(self, old_version, new_version,
+                           region=DEFAULT_REGION, year=None):
+        """
+        Activities whose factor differs between two versions.
+
+        Returns:
+            list: Activity names (added, removed or changed)
+        """
+        old = self._row(old_version, region, year)
+        new = self._row(new_version, region, year)
+        changed = ~((old == new) | (np.isnan(old) & np.isnan(new)))
+        return list(self.activities[changed])
+
+    def pin(self, version=None, region=DEFAULT_REGION, year=None):
+        """Return a view bound to one version/region/year."""
+        return PinnedFactors(self, version or self.latest_version, region, year)
+
+
+class PinnedFactors:
+    """FactorTable view with version, region and year fixed."""
+
+    def __init__(self, table, version, region, year):
+        if version not in table.versions:
+            raise KeyError(f"Unknown emission factor version: {version!r}")
+        self.table = table
+        self.version = version
+        self.region = region
+        self.year = year
+
+    def factor(self, activity):
+        return self.table.factor(activity, self.region, self.year, self.version)
+
+    def lookup(self, activities, default=None):
+        return self.table.lookup(
+            activities, self.region, self.year, self.version, default
+        )
+
+    def as_dict(self):
+        return self.table.as_dict(self.region, self.year, self.version)
+
+    def __repr__(self):
+        return (f"PinnedFactors(version={self.version!r}, region={self.region!r}, "
+                f"year={self.year!r})")
+
+
+@lru_cache(maxsize=None)
+def load_factors(path=FACTORS_CSV):
+    """
+    Load the factor registry (cached: parsed once per process).
+
+    Args:
+        path (str): Factor CSV path
+
+    Returns:
+        FactorTable: Shared lookup table
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Emission factor table not found: {path}")
+    # Versions are labels ("2025.10" != "2025.1"): never parse as numbers
+    return FactorTable(pd.read_csv(
+        path, dtype={"version": str, "region": str, "activity": str}
+    ))
+
+
+def pinned(version=None, region=DEFAULT_REGION, year=None):
+    """Shortcut for load_factors().pin(...)."""
+    return load_factors().pin(version, region, year)
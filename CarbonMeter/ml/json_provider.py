@@ -0,0 +1,88 @@
+"""
+============================================================
+CARBONMETER - FAST JSON FOR THE FLASK ML SERVICES
+============================================================
+
+PURPOSE:
+    Flask parses request bodies and serializes jsonify() responses
+    with the standard json module. For the array-heavy bodies of the
+    prediction and chart endpoints (hundreds of daily values) that is
+    a visible share of the request.
+
+    install_json_provider(app) swaps in orjson when it is installed:
+        - request.json / request.get_json() decode with orjson.loads
+        - jsonify() encodes straight to bytes with orjson.dumps
+          (NumPy arrays and scalars included, keys sorted as before)
+        - anything orjson cannot encode (dates, Decimal, ints beyond
+          64 bits...) falls back to Flask's own encoder, so responses
+          do not change
+
+    Without orjson (or with JSON_PROVIDER=stdlib) Flask's default
+    provider is kept.
+
+USAGE:
+    from json_provider import install_json_provider
+    install_json_provider(app)     # right after app = Flask(__name__)
+============================================================
+"""
+
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: Flask's stdlib provider is used instead
+    orjson = None
+
+JSON_PROVIDER_ENV = "JSON_PROVIDER"
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with the stdlib as fallback."""
+
+    def _options(self, indent=False):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _encode(self, obj, indent=False):
+        return orjson.dumps(obj, default=self.default, option=self._options(indent))
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:  # indent, separators...: only the stdlib knows them
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._encode(obj).decode()
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        try:
+            data = self._encode(obj, indent)
+        except TypeError:
+            return super().response(obj)
+        return self._app.response_class(data, mimetype=self.mimetype)
+
+
+def install_json_provider(app):
+    """
+    Use orjson for the app's JSON when it is available.
+
+    Returns:
+        str: 'orjson' or 'stdlib'
+    """
+    if orjson is None or os.environ.get(JSON_PROVIDER_ENV, "").lower() == "stdlib":
+        return "stdlib"
+    app.json = OrjsonProvider(app)
+    return "orjson"
@@ -1,140 +1,59 @@
 # ============================================================
-# CarbonMeter – Interactive Rule-Based Industry Carbon Calculator
+# CarbonMeter – Rule-Based Industry Carbon Calculator
 # Manufacturing Industry | Monthly CO₂e Accounting
+#
+# Interactive (single industry / month, prompts per machine):
+#   python actual_cal.py
+#
+# Batch (many industries, months and machines from metered data):
+#   python actual_cal.py --machines machines.csv --process process.csv
+#
+#   machines.csv : industry, month, machine, electricity_kwh,
+#                  diesel_liter, gas_m3, coal_kg
+#   process.csv  : industry, month, cement_ton, steel_ton, plastic_kg
 # ============================================================
 
-import csv
+import argparse
 import os
+import time
 from datetime import datetime
 
-# ============================================================
-# 1. EMISSION FACTORS (India / IPCC-based)
-# ============================================================
-EF = {
-    "electricity": 0.82,   # kg CO2 / kWh
-    "diesel": 2.31,        # kg CO2 / liter
-    "gas": 1.90,           # kg CO2 / m3
-    "coal": 2.42,          # kg CO2 / kg
-    "cement": 900,         # kg CO2 / ton
-    "steel": 1800,         # kg CO2 / ton
-    "plastic": 2.5         # kg CO2 / kg
-}
+import numpy as np
+import pandas as pd
 
-CSV_FILE = "industry_monthly_carbon_log.csv"
+import ml_root  # noqa: F401  (shared modules in CarbonMeter/ml)
+
+from emission_factors import pinned
 
 # ============================================================
-# 2. BASIC INDUSTRY DETAILS
+# 1. EMISSION FACTORS (India / IPCC-based)
 # ============================================================
-print("\n🏭 INDUSTRY CARBON EMISSION CALCULATOR (MONTHLY)\n")
+# Pinned so values in industry_monthly_carbon_log.csv stay reproducible
+FACTOR_VERSION = "2024.1"
+FACTORS = pinned(FACTOR_VERSION)
 
-industry = input("Enter Industry Name: ")
-month = input("Enter Reporting Month (YYYY-MM): ")
-date_logged = datetime.now().strftime("%Y-%m-%d")
+# EF key -> registry activity
+EF_ACTIVITIES = {
+    "electricity": "electricity",   # kg CO2 / kWh
+    "diesel": "diesel",             # kg CO2 / liter
+    "gas": "natural_gas",           # kg CO2 / m3
+    "coal": "coal",                 # kg CO2 / kg
+    "cement": "cement",             # kg CO2 / ton
+    "steel": "steel",               # kg CO2 / ton
+    "plastic": "plastic"            # kg CO2 / kg
+}
 
-# ============================================================
-# 3. MACHINE-WISE INPUT
-# ============================================================
-machines = []
-num_machines = int(input("\nEnter number of machines: "))
-
-for i in range(num_machines):
-    print(f"\n--- Machine {i+1} ---")
-    machine = input("Machine Name: ")
-
-    electricity = float(input("Electricity used (kWh/month): "))
-    diesel = float(input("Diesel used (liters/month): "))
-    gas = float(input("Natural Gas used (m3/month): "))
-    coal = float(input("Coal used (kg/month): "))
-
-    machines.append({
-        "machine": machine,
-        "electricity_kwh": electricity,
-        "diesel_liter": diesel,
-        "gas_m3": gas,
-        "coal_kg": coal
-    })
 
-# ============================================================
-# 4. PROCESS / MATERIAL INPUT
-# ============================================================
-print("\n--- Process / Material Usage (Monthly) ---")
-cement_ton = float(input("Cement used (tons): "))
-steel_ton = float(input("Steel used (tons): "))
-plastic_kg = float(input("Plastic used (kg): "))
+def emission_factors(factors=FACTORS):
+    """EF dict for a pinned factor version."""
+    return {key: factors.factor(activity) for key, activity in EF_ACTIVITIES.items()}
 
-# ============================================================
-# 5. CALCULATE EMISSIONS
-# ============================================================
-rows = []
-total_machine_co2 = 0.0
-
-for m in machines:
-    co2 = (
-        m["electricity_kwh"] * EF["electricity"]
-        + m["diesel_liter"] * EF["diesel"]
-        + m["gas_m3"] * EF["gas"]
-        + m["coal_kg"] * EF["coal"]
-    )
-    total_machine_co2 += co2
 
-    rows.append({
-        "industry": industry,
-        "month": month,
-        "machine": m["machine"],
-        "electricity_kwh": m["electricity_kwh"],
-        "diesel_liter": m["diesel_liter"],
-        "gas_m3": m["gas_m3"],
-        "coal_kg": m["coal_kg"],
-        "co2_kg": round(co2, 2),
-        "type": "machine",
-        "estimated": 0,
-        "date_logged": date_logged
-    })
-
-# Process emissions
-process_co2 = (
-    cement_ton * EF["cement"]
-    + steel_ton * EF["steel"]
-    + plastic_kg * EF["plastic"]
-)
-
-rows.append({
-    "industry": industry,
-    "month": month,
-    "machine": "PROCESS_EMISSIONS",
-    "electricity_kwh": "",
-    "diesel_liter": "",
-    "gas_m3": "",
-    "coal_kg": "",
-    "co2_kg": round(process_co2, 2),
-    "type": "process",
-    "estimated": 0,
-    "date_logged": date_logged
-})
-
-# Total emissions
-total_co2 = total_machine_co2 + process_co2
-
-rows.append({
-    "industry": industry,
-    "month": month,
-    "machine": "TOTAL_MONTHLY_CO2",
-    "electricity_kwh": "",
-    "diesel_liter": "",
-    "gas_m3": "",
-    "coal_kg": "",
-    "co2_kg": round(total_co2, 2),
-    "type": "total",
-    "estimated": 0,
-    "date_logged": date_logged
-})
+EF = emission_factors()
 
-# ============================================================
-# 6. WRITE / APPEND TO CSV
-# ============================================================
-file_exists = os.path.isfile(CSV_FILE)
+CSV_FILE = "industry_monthly_carbon_log.csv"
 
-headers = [
+HEADERS = [
     "industry",
     "month",
     "machine",
@@ -145,32 +64,297 @@ headers = [
     "co2_kg",
     "type",
     "estimated",
-    "date_logged"
+    "date_logged",
+    # Raw process materials + factor version, so rows can be re-derived
+    # when factors change (see ml/recompute_emissions.py)
+    "cement_ton",
+    "steel_ton",
+    "plastic_kg",
+    "factor_version"
 ]
 
-with open(CSV_FILE, mode="a", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=headers)
+# Input column -> EF key (order defines the factor vectors below)
+MACHINE_INPUTS = {
+    "electricity_kwh": "electricity",
+    "diesel_liter": "diesel",
+    "gas_m3": "gas",
+    "coal_kg": "coal"
+}
+
+PROCESS_INPUTS = {
+    "cement_ton": "cement",
+    "steel_ton": "steel",
+    "plastic_kg": "plastic"
+}
 
-    if not file_exists:
-        writer.writeheader()
+GROUP_KEYS = ["industry", "month"]
+TYPE_ORDER = {"machine": 0, "process": 1, "total": 2}
 
-    for row in rows:
-        writer.writerow(row)
 
 # ============================================================
-# 7. SUMMARY OUTPUT
+# 2. BATCH CALCULATION ENGINE
 # ============================================================
-print("\n📊 MONTHLY CARBON EMISSION SUMMARY")
-print("=================================")
+def _quantities(df, columns):
+    """Numeric input matrix (rows x columns), missing values as 0."""
+    return (
+        df.reindex(columns=list(columns))
+        .apply(pd.to_numeric, errors="coerce")
+        .fillna(0.0)
+        .to_numpy(dtype=np.float64)
+    )
+
+
+def calculate_monthly_rows(machines_df, process_df=None, date_logged=None,
+                           factors=None):
+    """
+    Compute machine, process and total CO₂ rows for every
+    (industry, month) group in one set of array operations.
+
+    Args:
+        machines_df (pd.DataFrame): One row per machine and month with
+            industry, month, machine and the MACHINE_INPUTS columns
+        process_df (pd.DataFrame): Optional process materials per
+            industry and month (PROCESS_INPUTS columns); repeated
+            groups are summed
+        date_logged (str): Logging date (default: today)
+        factors (PinnedFactors): Factor version to apply
+            (default: the calculator's pinned FACTOR_VERSION)
+
+    Returns:
+        pd.DataFrame: Rows in HEADERS order, grouped by industry/month
+            as machines..., PROCESS_EMISSIONS, TOTAL_MONTHLY_CO2
+    """
+    if date_logged is None:
+        date_logged = datetime.now().strftime("%Y-%m-%d")
+
+    factors = FACTORS if factors is None else factors
+    ef = emission_factors(factors)
+
+    missing = [c for c in GROUP_KEYS + ["machine"] if c not in machines_df.columns]
+    if missing:
+        raise ValueError(f"Missing required machine columns: {missing}")
+
+    machines = machines_df.reset_index(drop=True)
+    machines[GROUP_KEYS] = machines[GROUP_KEYS].astype(str)
+
+    # Machine emissions: (n_machines x 4) @ (4,)
+    machine_qty = _quantities(machines, MACHINE_INPUTS)
+    machine_ef = np.array([ef[k] for k in MACHINE_INPUTS.values()])
+    machine_co2 = machine_qty @ machine_ef
+
+    machine_rows = machines[GROUP_KEYS + ["machine"]].copy()
+    for i, col in enumerate(MACHINE_INPUTS):
+        machine_rows[col] = machine_qty[:, i]
+    machine_rows["co2_kg"] = np.round(machine_co2, 2)
+    machine_rows["type"] = "machine"
+    machine_rows["_co2"] = machine_co2
+
+    # Process emissions per group
+    process_columns = list(PROCESS_INPUTS) + ["_co2"]
+    if process_df is not None and len(process_df):
+        process = process_df.copy()
+        process[GROUP_KEYS] = process[GROUP_KEYS].astype(str)
+        process_qty = _quantities(process, PROCESS_INPUTS)
+        process_ef = np.array([ef[k] for k in PROCESS_INPUTS.values()])
+        for i, col in enumerate(PROCESS_INPUTS):
+            process[col] = process_qty[:, i]
+        process["_co2"] = process_qty @ process_ef
+        process_sums = process.groupby(GROUP_KEYS, sort=False)[process_columns].sum()
+    else:
+        process_sums = pd.DataFrame(
+            columns=process_columns, dtype=np.float64,
+            index=pd.MultiIndex.from_arrays([[], []], names=GROUP_KEYS)
+        )
+    process_co2 = process_sums["_co2"]
+
+    # Every group seen in either table, in first-seen order
+    machine_co2_by_group = machine_rows.groupby(GROUP_KEYS, sort=False)["_co2"].sum()
+    groups = machine_co2_by_group.index.append(process_co2.index).unique()
+
+    process_sums = process_sums.reindex(groups, fill_value=0.0)
+    process_co2 = process_sums["_co2"]
+    total_co2 = machine_co2_by_group.reindex(groups, fill_value=0.0) + process_co2
+
+    summary_rows = []
+    for machine, kind, values in (
+        ("PROCESS_EMISSIONS", "process", process_co2),
+        ("TOTAL_MONTHLY_CO2", "total", total_co2)
+    ):
+        frame = groups.to_frame(index=False)
+        frame["machine"] = machine
+        for col in MACHINE_INPUTS:
+            frame[col] = ""
+        frame["co2_kg"] = np.round(values.to_numpy(), 2)
+        frame["type"] = kind
+        if kind == "process":
+            for col in PROCESS_INPUTS:
+                frame[col] = process_sums[col].to_numpy()
+        summary_rows.append(frame)
+
+    rows = pd.concat([machine_rows.drop(columns="_co2")] + summary_rows,
+                     ignore_index=True)
+
+    # Order: group (first seen) -> machine / process / total -> input order
+    group_rank = pd.Series(np.arange(len(groups)), index=groups)
+    rows["_group"] = group_rank.reindex(
+        pd.MultiIndex.from_frame(rows[GROUP_KEYS])
+    ).to_numpy()
+    rows["_type"] = rows["type"].map(TYPE_ORDER)
+    rows = rows.sort_values(["_group", "_type"], kind="stable")
+
+    rows["estimated"] = 0
+    rows["date_logged"] = date_logged
+    rows["factor_version"] = factors.version
+
+    return rows[HEADERS].reset_index(drop=True)
+
+
+def append_monthly_log(rows, csv_file=CSV_FILE):
+    """
+    Append computed rows to the monthly log in a single write.
+
+    Args:
+        rows (pd.DataFrame): Output of calculate_monthly_rows()
+        csv_file (str): Log path (header written on first use)
+
+    Returns:
+        int: Number of rows written
+    """
+    file_exists = os.path.isfile(csv_file)
+
+    if file_exists:
+        with open(csv_file, "r", newline="") as f:
+            existing_header = f.readline().strip().split(",")
+        if existing_header != HEADERS:
+            # Upgrade logs written before the raw-material columns existed
+            existing = pd.read_csv(csv_file, dtype=str, keep_default_na=False)
+            existing.reindex(columns=HEADERS, fill_value="").to_csv(
+                csv_file, index=False
+            )
+
+    rows.to_csv(
+        csv_file,
+        mode="a",
+        header=not file_exists,
+        index=False,
+        columns=HEADERS
+    )
+    return len(rows)
+
+
+# ============================================================
+# 3. INTERACTIVE INPUT
+# ============================================================
+def collect_interactive_inputs():
+    """Prompt for one industry/month and return (machines, process)."""
+    print("\n🏭 INDUSTRY CARBON EMISSION CALCULATOR (MONTHLY)\n")
+
+    industry = input("Enter Industry Name: ")
+    month = input("Enter Reporting Month (YYYY-MM): ")
+
+    machines = []
+    num_machines = int(input("\nEnter number of machines: "))
+
+    for i in range(num_machines):
+        print(f"\n--- Machine {i+1} ---")
+        machine = input("Machine Name: ")
+
+        electricity = float(input("Electricity used (kWh/month): "))
+        diesel = float(input("Diesel used (liters/month): "))
+        gas = float(input("Natural Gas used (m3/month): "))
+        coal = float(input("Coal used (kg/month): "))
+
+        machines.append({
+            "industry": industry,
+            "month": month,
+            "machine": machine,
+            "electricity_kwh": electricity,
+            "diesel_liter": diesel,
+            "gas_m3": gas,
+            "coal_kg": coal
+        })
+
+    print("\n--- Process / Material Usage (Monthly) ---")
+    cement_ton = float(input("Cement used (tons): "))
+    steel_ton = float(input("Steel used (tons): "))
+    plastic_kg = float(input("Plastic used (kg): "))
+
+    machines_df = pd.DataFrame(
+        machines, columns=GROUP_KEYS + ["machine"] + list(MACHINE_INPUTS)
+    )
+    process_df = pd.DataFrame([{
+        "industry": industry,
+        "month": month,
+        "cement_ton": cement_ton,
+        "steel_ton": steel_ton,
+        "plastic_kg": plastic_kg
+    }])
+
+    return machines_df, process_df
+
+
+def print_summary(rows, csv_file):
+    """Print the per-group summary for computed rows."""
+    print("\n📊 MONTHLY CARBON EMISSION SUMMARY")
+    print("=================================")
+
+    grouped = rows.groupby(GROUP_KEYS, sort=False)
+
+    for (industry, month), group in grouped:
+        if grouped.ngroups > 1:
+            print(f"\n🏭 {industry} | {month}")
+
+        for r in group[group["type"] == "machine"].itertuples():
+            print(f"{r.machine}: {r.co2_kg} kg CO₂")
+
+        process_co2 = group.loc[group["type"] == "process", "co2_kg"].iloc[0]
+        total_co2 = group.loc[group["type"] == "total", "co2_kg"].iloc[0]
+
+        print(f"\nProcess Emissions: {process_co2:.2f} kg CO₂")
+        print("---------------------------------")
+        print(f"TOTAL MONTHLY CO₂e: {total_co2:.2f} kg")
+
+    print(f"\n✅ Data saved to {csv_file}")
+    print("ℹ estimated = 0 → calculated (rule-based)")
+    print("ℹ estimated = 1 → predicted (ML, future)")
+
+
+# ============================================================
+# 4. MAIN
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(
+        description="Industry monthly carbon calculator (interactive or batch)"
+    )
+    parser.add_argument("--machines", default=None,
+                        help="CSV of machine-level monthly readings (batch mode)")
+    parser.add_argument("--process", default=None,
+                        help="CSV of process materials per industry/month")
+    parser.add_argument("--output", default=CSV_FILE,
+                        help=f"Monthly log to append to (default: {CSV_FILE})")
+    args = parser.parse_args()
+
+    if args.machines is None:
+        machines_df, process_df = collect_interactive_inputs()
+    else:
+        machines_df = pd.read_csv(args.machines)
+        process_df = pd.read_csv(args.process) if args.process else None
+
+    start = time.perf_counter()
+    rows = calculate_monthly_rows(machines_df, process_df)
+    elapsed = time.perf_counter() - start
+
+    append_monthly_log(rows, args.output)
 
-for r in rows:
-    if r["type"] == "machine":
-        print(f"{r['machine']}: {r['co2_kg']} kg CO₂")
+    if args.machines is None:
+        print_summary(rows, args.output)
+    else:
+        groups = rows[GROUP_KEYS].drop_duplicates().shape[0]
+        print(f"\n✅ {len(machines_df)} machine readings → {len(rows)} rows "
+              f"across {groups} industry-months")
+        print(f"⚡ Throughput: {len(machines_df) / max(elapsed, 1e-9):,.0f} machines/s")
+        print(f"💾 Data saved to {args.output}")
 
-print(f"\nProcess Emissions: {process_co2:.2f} kg CO₂")
-print("---------------------------------")
-print(f"TOTAL MONTHLY CO₂e: {total_co2:.2f} kg")
 
-print(f"\n✅ Data saved to {CSV_FILE}")
-print("ℹ estimated = 0 → calculated (rule-based)")
-print("ℹ estimated = 1 → predicted (ML, future)")
+if __name__ == "__main__":
+    main()
@@ -6,15 +6,36 @@ This Flask API exposes XGBoost model predictions for organization-level emission
 Runs on http://localhost:8001
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
-import pandas as pd
-import joblib
-import numpy as np
 import os
+import threading
 from datetime import datetime, timedelta
+from functools import lru_cache
+
+from chart_cache import ChartCache, ChartKey, ForecastStore, MIMETYPES, chart_etag, forecast_hash
+
+import ml_root  # noqa: F401  (shared modules in CarbonMeter/ml)
+
+from service_startup import LazyModel, lazy_module, preload_enabled, preload_after_bind
+from service_metrics import ServiceMetrics
+from request_profiler import RequestProfiler
+from tracing import Tracer
+from json_provider import install_json_provider
+from compression import ResponseCompression
+from columnar import read_body
+from admission import AdmissionControl
+from request_schemas import (Schema, Any, FloatArray, FloatArrayMap, Number, Records,
+                             SchemaError, String, StringList)
+
+# pandas/numpy, the factor registry and the model (xgboost/sklearn via
+# unpickling) load on first use: /health and /industries need none of them
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
 
 app = Flask(__name__)
+install_json_provider(app)  # orjson when installed
+ResponseCompression(app)    # gzip for clients that accept it
 # CORS configuration - allow requests from frontend and backend
 allowed_origins = [
     "https://carbonmeter-mathpent.netlify.app",  # Production frontend
@@ -35,82 +56,144 @@ PREDICTIONS_DIR = "predictions"
 PREDICTIONS_CSV = os.path.join(PREDICTIONS_DIR, "industry_target_vs_predicted_with_recommendations.csv")
 SAMPLE_TEMPLATE_PATH = "sample_30day_input_template.csv"
 
-# Global model variable
-model = None
+# Model + supporting data, loaded together by load_model()
 recommendations_df = None
 sample_data = None
+xgboost_model = LazyModel(MODEL_PATH, name="XGBoost model")
+_data_lock = threading.Lock()
+_data_loaded = False
+
+# Request/stage/fallback metrics, served on GET /metrics
+metrics = ServiceMetrics(app, service="organization")
+metrics.track_model("xgboost", xgboost_model)
+
+# Concurrency limit + queue deadline; overflow gets the fallback estimate
+admission = AdmissionControl(app, metrics=metrics)
+
+# Opt-in profiling (REQUEST_PROFILING=1 / PROFILE_SAMPLER_HZ=20)
+RequestProfiler(app, output_dir="profiles")
+
+# X-Request-ID / traceparent propagation; JSON spans with TRACING=1
+tracer = Tracer(app, service="organization", path=os.path.join("traces", "spans.jsonl"))
 
 def load_model():
-    """Load XGBoost model and supporting data"""
-    global model, recommendations_df, sample_data
+    """
+    Load XGBoost model and supporting data.
     
-    try:
-        if os.path.exists(MODEL_PATH):
-            model = joblib.load(MODEL_PATH)
-            print(f"✓ Loaded XGBoost model from {MODEL_PATH}")
-        else:
-            print(f"⚠ Model file not found: {MODEL_PATH}")
-            model = None
-        
-        if os.path.exists(RECOMMENDATIONS_PATH):
-            recommendations_df = pd.read_csv(RECOMMENDATIONS_PATH)
-            print(f"✓ Loaded recommendations from {RECOMMENDATIONS_PATH}")
-        else:
-            print(f"⚠ Recommendations file not found")
-            recommendations_df = None
+    Called by the first prediction (or the background preload), not at
+    import. Returns the model, or None in fallback mode. The model and
+    the CSVs load under one lock, so a request racing the preload waits
+    for both instead of seeing a half-loaded state.
+    """
+    global recommendations_df, sample_data, _data_loaded
+    
+    if _data_loaded:
+        return xgboost_model.model
+    
+    with _data_lock:
+        if _data_loaded:
+            return xgboost_model.model
         
-        if os.path.exists(SAMPLE_TEMPLATE_PATH):
-            sample_data = pd.read_csv(SAMPLE_TEMPLATE_PATH)
-            print(f"✓ Loaded sample data template")
-        else:
-            print(f"⚠ Sample template not found")
-            sample_data = None
+        xgboost_model.get()
+        try:
+            if os.path.exists(RECOMMENDATIONS_PATH):
+                recommendations_df = pd.read_csv(RECOMMENDATIONS_PATH)
+                print(f"✓ Loaded recommendations from {RECOMMENDATIONS_PATH}")
+            else:
+                print(f"⚠ Recommendations file not found")
+                recommendations_df = None
             
-    except Exception as e:
-        print(f"❌ Error loading model: {str(e)}")
-        model = None
-
-# Load on startup
-load_model()
+            if os.path.exists(SAMPLE_TEMPLATE_PATH):
+                sample_data = pd.read_csv(SAMPLE_TEMPLATE_PATH)
+                print(f"✓ Loaded sample data template")
+            else:
+                print(f"⚠ Sample template not found")
+                sample_data = None
+        except Exception as e:
+            print(f"❌ Error loading supporting data: {str(e)}")
+        
+        _data_loaded = True
+    
+    return xgboost_model.model
 
 # Manufacturing industry emission factors (tCO2e per unit)
-INDUSTRY_FACTORS = {
-    "cement": {
-        "electricity_kwh": 0.82 / 1000,  # tCO2e per kWh
-        "diesel_liter": 2.68 / 1000,
-        "natural_gas_m3": 2.0 / 1000,
-        "cement_ton": 0.65,  # Per ton of cement
-        "clinker_ratio": 0.75,
-        "scope1_percentage": 62,
-    },
-    "steel": {
-        "electricity_kwh": 0.82 / 1000,
-        "diesel_liter": 2.68 / 1000,
-        "coal_ton": 2.42,
-        "steel_ton": 1.85,
-        "scope1_percentage": 70,
-    },
-    "power": {
-        "coal_ton": 2.42,
-        "natural_gas_m3": 2.0 / 1000,
-        "electricity_generated_mwh": 0.95,
-        "scope1_percentage": 98,
-    },
-    "chemicals": {
-        "electricity_kwh": 0.82 / 1000,
-        "diesel_liter": 2.68 / 1000,
-        "natural_gas_m3": 2.0 / 1000,
-        "chemical_ton": 1.2,
-        "scope1_percentage": 55,
-    },
-    "manufacturing": {
-        "electricity_kwh": 0.82 / 1000,
-        "diesel_liter": 2.68 / 1000,
-        "natural_gas_m3": 2.0 / 1000,
-        "production_units": 0.05,
-        "scope1_percentage": 45,
+FACTOR_VERSION = "2025.1"
+INDUSTRIES = ["cement", "steel", "power", "chemicals", "manufacturing"]
+FEATURE_COLUMNS = ("electricity_kwh", "diesel_liters", "natural_gas_m3", "production_units")
+
+# Request bodies, compiled once (see request_schemas.py)
+PREDICT_ORG_REQUEST = Schema(
+    "predict_org",
+    organizationId=String(default="unknown", aliases=("organization_id",)),
+    industry=String(default="manufacturing", lower=True, choices=INDUSTRIES, invalid="default"),
+    period=String(),
+    historical_days=Number(default=30, integer=True),
+    # input_features: {electricity_kwh: [..], ...}  or
+    # historical_data: [{electricity_kwh: x, ...}, ...] / {electricity_kwh: [..], ...}
+    input_features=FloatArrayMap(),
+    historical_data=Records(FEATURE_COLUMNS),
+)
+SAVE_CSV_REQUEST = Schema(
+    "save_csv",
+    organization_id=String(default="unknown"),
+    industry=String(default="Manufacturing"),
+    period=String(default="next_30_days"),
+    predicted_emission=Number(default=0),
+    confidence=Number(default=0.70),
+    breakdown=Any(default={}),
+    recommendations=StringList(),
+)
+
+
+@lru_cache(maxsize=None)
+def industry_factors():
+    """Factors per industry, built from the registry on first use."""
+    from emission_factors import pinned
+    
+    factors = pinned(FACTOR_VERSION)
+    
+    def _tonnes(activity):
+        """Registry factor (kg CO2e per unit) as tCO2e per unit."""
+        return factors.factor(activity) / 1000
+    
+    return {
+        "cement": {
+            "electricity_kwh": _tonnes("electricity"),  # tCO2e per kWh
+            "diesel_liter": _tonnes("diesel"),
+            "natural_gas_m3": _tonnes("natural_gas"),
+            "cement_ton": _tonnes("cement_production"),  # Per ton of cement
+            "clinker_ratio": 0.75,
+            "scope1_percentage": 62,
+        },
+        "steel": {
+            "electricity_kwh": _tonnes("electricity"),
+            "diesel_liter": _tonnes("diesel"),
+            "coal_ton": factors.factor("coal"),  # kg/kg == t/t
+            "steel_ton": _tonnes("steel_production"),
+            "scope1_percentage": 70,
+        },
+        "power": {
+            "coal_ton": factors.factor("coal"),
+            "natural_gas_m3": _tonnes("natural_gas"),
+            "electricity_generated_mwh": _tonnes("power_generation"),
+            "scope1_percentage": 98,
+        },
+        "chemicals": {
+            "electricity_kwh": _tonnes("electricity"),
+            "diesel_liter": _tonnes("diesel"),
+            "natural_gas_m3": _tonnes("natural_gas"),
+            "chemical_ton": _tonnes("chemical_production"),
+            "scope1_percentage": 55,
+        },
+        "manufacturing": {
+            "electricity_kwh": _tonnes("electricity"),
+            "diesel_liter": _tonnes("diesel"),
+            "natural_gas_m3": _tonnes("natural_gas"),
+            "production_units": _tonnes("production_unit"),
+            "scope1_percentage": 45,
+        }
     }
-}
+
 
 def get_industry_recommendations(industry, predicted_emission):
     """Get industry-specific recommendations"""
@@ -168,13 +251,16 @@ def health_check():
     """Health check endpoint"""
     return jsonify({
         "status": "healthy",
-        "model_loaded": model is not None,
+        "model_loaded": xgboost_model.loaded,
+        "model": xgboost_model.status(),
         "service": "Organization ML Prediction API",
         "port": 8001,
-        "focus": "Manufacturing Industries"
+        "focus": "Manufacturing Industries",
+        "chart_cache": chart_cache.stats()
     })
 
 @app.route('/predict/org', methods=['POST'])
+@admission.guard()
 def predict_organization():
     """
     Main prediction endpoint for organization emissions
@@ -191,83 +277,79 @@ def predict_organization():
             "production_units": [array of 30 values]
         }
     }
+    (schema: PREDICT_ORG_REQUEST; an invalid body gets a 400)
+
+    historical_data may also be sent column-wise, as JSON, Arrow IPC
+    or MessagePack (by Content-Type, see columnar.py).
     """
     try:
-        data = request.json
+        with tracer.span("parse"):
+            try:
+                data = read_body(request, columns=FEATURE_COLUMNS)
+            except SchemaError as e:
+                return e.response()
         
         if not data:
             return jsonify({"error": "Missing request body"}), 400
         
-        organization_id = data.get("organizationId") or data.get("organization_id") or "unknown"
-        industry = (data.get("industry") or "manufacturing").lower()
-
-        # Support period-based requests from backend
-        period = data.get("period")
-        historical_days = data.get("historical_days", 30)
-        if period and isinstance(period, str) and "next_" in period and "_days" in period:
+        with tracer.span("validate"):
             try:
-                historical_days = int(period.replace("next_", "").replace("_days", ""))
-            except Exception:
-                historical_days = historical_days or 30
-
-        # Support two input formats:
-        # 1) input_features: { electricity_kwh: [..], diesel_liters: [..], ... }
-        # 2) historical_data: [{ electricity_kwh: x, diesel_liters: y, ... }, ...]
-        input_features = data.get("input_features") or {}
-        historical_data = data.get("historical_data") or []
-
-        if historical_data and isinstance(historical_data, list):
-            def pull_series(key):
-                return [float(item.get(key, 0) or 0) for item in historical_data]
-
-            input_features = {
-                "electricity_kwh": pull_series("electricity_kwh"),
-                "diesel_liters": pull_series("diesel_liters"),
-                "natural_gas_m3": pull_series("natural_gas_m3"),
-                "production_units": pull_series("production_units"),
-            }
-        
-        # Validate industry
-        if industry not in INDUSTRY_FACTORS:
-            industry = "manufacturing"
-        
-        # Check if we have input features
-        has_real_data = False
-        for key, values in input_features.items():
-            if values and len(values) > 0:
-                has_real_data = True
-                break
+                fields = PREDICT_ORG_REQUEST.validate(data)
+            except SchemaError as e:
+                return e.response()
+
+            organization_id = fields["organizationId"]
+            industry = fields["industry"]
+
+            # Support period-based requests from backend
+            period = fields["period"]
+            historical_days = fields["historical_days"]
+            if period and "next_" in period and "_days" in period:
+                try:
+                    historical_days = int(period.replace("next_", "").replace("_days", ""))
+                except Exception:
+                    historical_days = historical_days or 30
+
+            # Series arrive as float64 arrays, from either input format
+            input_features = fields["historical_data"] or fields["input_features"]
+
+            # Check if we have input features
+            has_real_data = any(len(values) > 0 for values in input_features.values())
         
         predicted_emission = 0
         confidence = 0.70
         is_fallback = False
         
-        if model and has_real_data:
+        # The model path is skipped when admission control degrades the request
+        model = load_model() if has_real_data and not admission.degraded else None
+        if model is not None:
             # Use ML model for prediction
             try:
-                # Aggregate features
-                features = {}
-                for key, values in input_features.items():
-                    if values and len(values) > 0:
-                        features[f"{key}_avg"] = np.mean(values)
-                        features[f"{key}_total"] = np.sum(values)
-                        features[f"{key}_trend"] = values[-1] - values[0] if len(values) > 1 else 0
-                    else:
-                        features[f"{key}_avg"] = 0
-                        features[f"{key}_total"] = 0
-                        features[f"{key}_trend"] = 0
-                
-                # Create feature dataframe (model expects specific columns)
-                feature_df = pd.DataFrame([{
-                    'electricity_kwh': features.get('electricity_kwh_avg', 0),
-                    'diesel_liter': features.get('diesel_liters_avg', 0),
-                    'natural_gas_m3': features.get('natural_gas_m3_avg', 0),
-                    'cement_ton': features.get('production_units_total', 0),
-                    'production_units': features.get('production_units_avg', 0)
-                }])
+                with tracer.span("feature_build"), metrics.time("feature_build"):
+                    # Aggregate features
+                    features = {}
+                    for key, values in input_features.items():
+                        if len(values) > 0:
+                            features[f"{key}_avg"] = np.mean(values)
+                            features[f"{key}_total"] = np.sum(values)
+                            features[f"{key}_trend"] = values[-1] - values[0] if len(values) > 1 else 0
+                        else:
+                            features[f"{key}_avg"] = 0
+                            features[f"{key}_total"] = 0
+                            features[f"{key}_trend"] = 0
+                    
+                    # Create feature dataframe (model expects specific columns)
+                    feature_df = pd.DataFrame([{
+                        'electricity_kwh': features.get('electricity_kwh_avg', 0),
+                        'diesel_liter': features.get('diesel_liters_avg', 0),
+                        'natural_gas_m3': features.get('natural_gas_m3_avg', 0),
+                        'cement_ton': features.get('production_units_total', 0),
+                        'production_units': features.get('production_units_avg', 0)
+                    }])
                 
                 # Make prediction
-                prediction = model.predict(feature_df)[0]
+                with tracer.span("predict", source="model"), metrics.time("model_predict"):
+                    prediction = model.predict(feature_df)[0]
                 predicted_emission = float(prediction) * historical_days / 30  # Scale to period
                 confidence = 0.87
                 
@@ -275,98 +357,121 @@ def predict_organization():
                 
             except Exception as ml_error:
                 print(f"⚠ ML prediction failed: {str(ml_error)}, using fallback")
+                metrics.exception(ml_error)
+                metrics.fallback("prediction_error")
                 predicted_emission = calculate_fallback_emission(input_features, industry, historical_days)
                 confidence = 0.65
                 is_fallback = True
         else:
-            # Use fallback calculation
-            if has_real_data:
-                predicted_emission = calculate_fallback_emission(input_features, industry, historical_days)
-            else:
-                # Use sample data as demo
-                predicted_emission = get_sample_emission(industry, historical_days)
+            with tracer.span("predict", source="fallback"):
+                # Use fallback calculation
+                if has_real_data:
+                    predicted_emission = calculate_fallback_emission(input_features, industry, historical_days)
+                else:
+                    # Use sample data as demo
+                    predicted_emission = get_sample_emission(industry, historical_days)
             
             confidence = 0.60
             is_fallback = True
+            if admission.degraded:
+                metrics.fallback("overloaded")
+            else:
+                metrics.fallback("model_not_loaded" if has_real_data else "no_input_data")
             print(f"⚠ Using fallback prediction for {organization_id}")
         
-        # Get recommendations
-        recommendations = get_industry_recommendations(industry, predicted_emission)
+        with tracer.span("recommendation"):
+            # Get recommendations
+            recommendations = get_industry_recommendations(industry, predicted_emission)
         
-        # Calculate industry insights
-        industry_factors = INDUSTRY_FACTORS[industry]
-        scope1_percentage = industry_factors.get('scope1_percentage', 50)
+            # Calculate industry insights
+            scope1_percentage = industry_factors()[industry].get('scope1_percentage', 50)
         
-        response = {
-            "success": True,
-            "predicted_emission": round(predicted_emission, 2),
-            "predicted_emissions": round(predicted_emission, 2),
-            "period": f"next_{historical_days}_days",
-            "confidence": confidence,
-            "industry": industry.capitalize(),
-            "recommendations": recommendations,
-            "is_fallback": is_fallback,
-            "breakdown": {
-                "scope1_percentage": scope1_percentage,
-                "scope2_percentage": 100 - scope1_percentage,
-                "scope1_emission": round(predicted_emission * scope1_percentage / 100, 2),
-                "scope2_emission": round(predicted_emission * (100 - scope1_percentage) / 100, 2)
-            },
-            "industry_insights": get_industry_insights(industry, predicted_emission),
-            "timestamp": datetime.now().isoformat()
-        }
-
-        # Append prediction to CSVs for tracking (both root and predictions folder)
-        try:
-            if not os.path.exists(PREDICTIONS_DIR):
-                os.makedirs(PREDICTIONS_DIR, exist_ok=True)
-
-            def safe_avg(values):
-                return float(np.mean(values)) if values else 0.0
-
-            row = {
-                "electricity_kwh": safe_avg(input_features.get("electricity_kwh", [])),
-                "diesel_liter": safe_avg(input_features.get("diesel_liters", [])),
-                "natural_gas_m3": safe_avg(input_features.get("natural_gas_m3", [])),
-                "cement_ton": 0,
-                "steel_ton": 0,
-                "plastic_kg": 0,
-                "production_units": safe_avg(input_features.get("production_units", [])),
-                "operating_hours": 16,
-                "capacity_utilization": 78,
-                "energy_intensity": 3.3,
-                "fuel_intensity": 50.0,
-                "material_intensity": 0.0045,
-                "load_efficiency": 285.0,
-                "day_ahead": 1,
-                "predicted_co2_kg": round(predicted_emission * 1000, 2),
-                "target_co2_kg": round(predicted_emission * 1000 * 0.98, 2),
-                "gap_kg": round(predicted_emission * 1000 * 0.02, 2),
-                "status": "ABOVE TARGET" if predicted_emission > 0 else "ON TARGET",
-                "recommendations": " | ".join(recommendations)
+            response = {
+                "success": True,
+                "predicted_emission": round(predicted_emission, 2),
+                "predicted_emissions": round(predicted_emission, 2),
+                "period": f"next_{historical_days}_days",
+                "confidence": confidence,
+                "industry": industry.capitalize(),
+                "recommendations": recommendations,
+                "is_fallback": is_fallback,
+                "overloaded": admission.degraded,
+                "breakdown": {
+                    "scope1_percentage": scope1_percentage,
+                    "scope2_percentage": 100 - scope1_percentage,
+                    "scope1_emission": round(predicted_emission * scope1_percentage / 100, 2),
+                    "scope2_emission": round(predicted_emission * (100 - scope1_percentage) / 100, 2)
+                },
+                "industry_insights": get_industry_insights(industry, predicted_emission),
+                "timestamp": datetime.now().isoformat()
             }
 
-            df_row = pd.DataFrame([row])
+        # Degraded (shed) requests skip the CSV appends and cube record:
+        # that I/O is most of the request time
+        if not admission.degraded:
+            with tracer.span("persist"):
+                # Append prediction to CSVs for tracking (both root and predictions folder)
+                try:
+                    if not os.path.exists(PREDICTIONS_DIR):
+                        os.makedirs(PREDICTIONS_DIR, exist_ok=True)
 
-            # Append to root recommendations CSV
-            if os.path.exists(RECOMMENDATIONS_PATH):
-                df_row.to_csv(RECOMMENDATIONS_PATH, mode="a", header=False, index=False)
-            else:
-                df_row.to_csv(RECOMMENDATIONS_PATH, mode="w", header=True, index=False)
+                    def safe_avg(values):
+                        return float(values.mean()) if values is not None and len(values) else 0.0
 
-            # Append to predictions CSV
-            if os.path.exists(PREDICTIONS_CSV):
-                df_row.to_csv(PREDICTIONS_CSV, mode="a", header=False, index=False)
-            else:
-                df_row.to_csv(PREDICTIONS_CSV, mode="w", header=True, index=False)
+                    row = {
+                        "electricity_kwh": safe_avg(input_features.get("electricity_kwh")),
+                        "diesel_liter": safe_avg(input_features.get("diesel_liters")),
+                        "natural_gas_m3": safe_avg(input_features.get("natural_gas_m3")),
+                        "cement_ton": 0,
+                        "steel_ton": 0,
+                        "plastic_kg": 0,
+                        "production_units": safe_avg(input_features.get("production_units")),
+                        "operating_hours": 16,
+                        "capacity_utilization": 78,
+                        "energy_intensity": 3.3,
+                        "fuel_intensity": 50.0,
+                        "material_intensity": 0.0045,
+                        "load_efficiency": 285.0,
+                        "day_ahead": 1,
+                        "predicted_co2_kg": round(predicted_emission * 1000, 2),
+                        "target_co2_kg": round(predicted_emission * 1000 * 0.98, 2),
+                        "gap_kg": round(predicted_emission * 1000 * 0.02, 2),
+                        "status": "ABOVE TARGET" if predicted_emission > 0 else "ON TARGET",
+                        "recommendations": " | ".join(recommendations)
+                    }
+
+                    df_row = pd.DataFrame([row])
+
+                    with metrics.time("csv_append"):
+                        # Append to root recommendations CSV
+                        if os.path.exists(RECOMMENDATIONS_PATH):
+                            df_row.to_csv(RECOMMENDATIONS_PATH, mode="a", header=False, index=False)
+                        else:
+                            df_row.to_csv(RECOMMENDATIONS_PATH, mode="w", header=True, index=False)
 
-        except Exception as csv_error:
-            print(f"⚠ Failed to append prediction to CSV: {csv_error}")
+                        # Append to predictions CSV
+                        if os.path.exists(PREDICTIONS_CSV):
+                            df_row.to_csv(PREDICTIONS_CSV, mode="a", header=False, index=False)
+                        else:
+                            df_row.to_csv(PREDICTIONS_CSV, mode="w", header=True, index=False)
+
+                    # One value per request: the period total, under its horizon
+                    # (buffered in process, saved every few seconds and at exit)
+                    from summary_cube import record_forecast
+                    with metrics.time("summary_cube"):
+                        record_forecast(df_row, organization_id, horizon=historical_days, flush=False)
+
+                except Exception as csv_error:
+                    print(f"⚠ Failed to append prediction to CSV: {csv_error}")
+                    metrics.exception(csv_error)
         
-        return jsonify(response), 200
+        with tracer.span("serialize"):
+            body = jsonify(response)
+        return body, 200
         
     except Exception as e:
         print(f"❌ Prediction error: {str(e)}")
+        metrics.exception(e)
         return jsonify({
             "error": "Prediction failed",
             "message": str(e),
@@ -376,13 +481,13 @@ def predict_organization():
 def calculate_fallback_emission(input_features, industry, days):
     """Calculate emission using emission factors"""
     total_emission = 0
-    factors = INDUSTRY_FACTORS[industry]
+    factors = industry_factors()[industry]
     
     for key, values in input_features.items():
-        if not values or len(values) == 0:
+        if len(values) == 0:
             continue
         
-        total_value = sum(values)
+        total_value = float(np.sum(values))
         factor_key = key
         
         if factor_key in factors:
@@ -449,25 +554,227 @@ def get_industry_insights(industry, predicted_emission):
 def get_industries():
     """Return supported industries"""
     return jsonify({
-        "industries": list(INDUSTRY_FACTORS.keys()),
+        "industries": list(INDUSTRIES),
         "focus": "Manufacturing sectors with high emissions",
         "default": "manufacturing"
     })
 
+# Rendered chart cache (/chart/<chart_type>)
+CHART_TYPES = {
+    "comparison": (1400, 600),   # default width, height in pixels
+    "dashboard": (1400, 1000),
+}
+MAX_CHART_PIXELS = 4000
+MAX_CHART_DPI = 300
+chart_cache = ChartCache(
+    max_entries=int(os.environ.get("CHART_CACHE_ENTRIES", 256)),
+    max_bytes=int(os.environ.get("CHART_CACHE_MB", 64)) * 1024 * 1024
+)
+forecast_store = ForecastStore()
+CHART_REQUEST = Schema(
+    "chart",
+    organizationId=String(default="unknown", aliases=("organization_id",)),
+    historical_co2=FloatArray(required=True),
+    historical_dates=StringList(default=None),
+    predicted_co2=FloatArray(required=True),
+)
+# matplotlib style contexts touch global rcParams: one render at a time
+_render_lock = threading.Lock()
+
+
+def _chart_options(args, chart_type):
+    """Parse width/height/dpi/format from a request's args or JSON."""
+    default_width, default_height = CHART_TYPES[chart_type]
+    width = int(args.get("width", default_width))
+    height = int(args.get("height", default_height))
+    dpi = int(args.get("dpi", 100))
+    fmt = str(args.get("format", "png")).lower()
+
+    if not (100 <= width <= MAX_CHART_PIXELS and 100 <= height <= MAX_CHART_PIXELS):
+        raise ValueError(f"width/height must be between 100 and {MAX_CHART_PIXELS} pixels")
+    if not 50 <= dpi <= MAX_CHART_DPI:
+        raise ValueError(f"dpi must be between 50 and {MAX_CHART_DPI}")
+    if fmt not in MIMETYPES:
+        raise ValueError(f"format must be one of {sorted(MIMETYPES)}")
+    return width, height, dpi, fmt
+
+
+def _forecast_frames(forecast):
+    """Build the DataFrames EmissionVisualizer expects from a forecast dict."""
+    historical_df = pd.DataFrame({"co2_emission": forecast["historical_co2"]})
+    if forecast.get("historical_dates"):
+        historical_df["date"] = forecast["historical_dates"]
+    predicted_df = pd.DataFrame({"predicted_co2_kg": forecast["predicted_co2"]})
+    return historical_df, predicted_df
+
+
+def _requested_forecast():
+    """
+    Forecast referenced by a chart request.
+
+    POST bodies carry the series (registered in forecast_store);
+    GET requests name a previously posted one by org + hash.
+
+    Returns:
+        tuple: (organization_id, digest, forecast or None, options)
+    """
+    if request.method != 'POST':
+        organization_id = request.args.get("organizationId", "unknown")
+        digest = request.args.get("forecast", "")
+        return organization_id, digest, None, request.args
+
+    data = request.get_json(silent=True) or {}
+    forecast = CHART_REQUEST.validate(data)
+    organization_id = forecast.pop("organizationId")
+    if (forecast["historical_dates"]
+            and len(forecast["historical_dates"]) != len(forecast["historical_co2"])):
+        raise ValueError("historical_dates must match historical_co2 length")
+
+    digest = forecast_hash(forecast["historical_co2"], forecast["predicted_co2"],
+                           forecast["historical_dates"])
+    forecast_store.put(organization_id, digest, forecast)
+    return organization_id, digest, forecast, data
+
+
+def _chart_response(entry, cache_status):
+    response = Response(entry.data, mimetype=entry.mimetype)
+    response.set_etag(entry.etag)
+    response.headers["Cache-Control"] = "private, max-age=3600"
+    response.headers["X-Chart-Cache"] = cache_status
+    return response
+
+
+@app.route('/chart/<chart_type>', methods=['GET', 'POST'])
+def render_chart(chart_type):
+    """
+    Render plot_comparison / plot_statistical_summary for one forecast.
+
+    POST JSON:
+    {
+        "organizationId": "string",
+        "historical_co2": [array of historical daily CO2 (kg)],
+        "historical_dates": [optional array of dates],
+        "predicted_co2": [array of predicted daily CO2 (kg)],
+        "width": 1400, "height": 600, "dpi": 100, "format": "png"
+    }
+
+    GET /chart/<chart_type>?organizationId=..&forecast=<hash>&width=..
+        re-serves a forecast previously posted (hash from X-Forecast-Hash).
+
+    Responses carry an ETag; a matching If-None-Match returns 304
+    without rendering. Charts are cached by
+    (org, forecast hash, chart type, width, height, dpi, format).
+    """
+    if chart_type not in CHART_TYPES:
+        return jsonify({
+            "error": f"Unknown chart type '{chart_type}'",
+            "chart_types": list(CHART_TYPES)
+        }), 404
+
+    try:
+        organization_id, digest, forecast, options = _requested_forecast()
+        width, height, dpi, fmt = _chart_options(options, chart_type)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": "Invalid chart request", "message": str(e)}), 400
+
+    key = ChartKey(organization_id, digest, chart_type, width, height, dpi, fmt)
+
+    # Conditional request: answer before rendering or even reading the cache
+    etag = chart_etag(key)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers["X-Chart-Cache"] = "NOT_MODIFIED"
+        return response
+
+    entry = chart_cache.get(key)
+    if entry is not None:
+        response = _chart_response(entry, "HIT")
+    else:
+        if forecast is None:
+            forecast = forecast_store.get(organization_id, digest)
+            if forecast is None:
+                return jsonify({
+                    "error": "Unknown forecast",
+                    "message": "POST the forecast series to /chart/<chart_type> first"
+                }), 404
+
+        try:
+            from visualize_predictions import EmissionVisualizer
+
+            historical_df, predicted_df = _forecast_frames(forecast)
+            visualizer = EmissionVisualizer(headless=True, dpi=dpi, fmt=fmt, verbose=False)
+            with _render_lock, metrics.time("chart_render"):
+                data = visualizer.render_bytes(
+                    chart_type, historical_df, predicted_df,
+                    figsize=(width / dpi, height / dpi)
+                )
+        except Exception as e:
+            print(f"❌ Chart render error: {str(e)}")
+            metrics.exception(e)
+            return jsonify({"error": "Chart rendering failed", "message": str(e)}), 500
+
+        entry = chart_cache.put(key, data, fmt)
+        response = _chart_response(entry, "MISS")
+
+    response.headers["X-Forecast-Hash"] = digest
+    return response
+
+@app.route('/chart-data', methods=['GET', 'POST'])
+def chart_data():
+    """
+    Chart-ready series for one forecast, downsampled to a point budget.
+
+    Same forecast body / query as /chart/<chart_type>, plus:
+        "points": 100         (points per series, max 2000)
+        "method": "lttb"      (or "minmax")
+
+    Returns historical, predicted and cumulative series ({x, y}) and
+    the dashboard's summary statistics.
+    """
+    from chart_series import prepare_chart_data
+
+    try:
+        organization_id, digest, forecast, options = _requested_forecast()
+        if forecast is None:
+            forecast = forecast_store.get(organization_id, digest)
+            if forecast is None:
+                return jsonify({
+                    "error": "Unknown forecast",
+                    "message": "POST the forecast series to /chart-data first"
+                }), 404
+
+        payload = prepare_chart_data(
+            forecast["historical_co2"],
+            forecast["predicted_co2"],
+            dates=forecast.get("historical_dates"),
+            points=int(options.get("points", 100)),
+            method=str(options.get("method", "lttb")).lower()
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": "Invalid chart data request", "message": str(e)}), 400
+
+    payload["organizationId"] = organization_id
+    payload["forecast"] = digest
+    return jsonify(payload)
+
 @app.route('/save-csv', methods=['POST'])
 def save_to_csv():
     """Save prediction to CSV file"""
     try:
-        data = request.get_json()
+        try:
+            fields = SAVE_CSV_REQUEST.validate(request.get_json())
+        except SchemaError as e:
+            return e.response()
         
         # Extract data
-        organization_id = data.get('organization_id', 'unknown')
-        industry = data.get('industry', 'Manufacturing')
-        period = data.get('period', 'next_30_days')
-        predicted_emission = data.get('predicted_emission', 0)
-        confidence = data.get('confidence', 0.70)
-        breakdown = data.get('breakdown', {})
-        recommendations = data.get('recommendations', [])
+        organization_id = fields['organization_id']
+        industry = fields['industry']
+        period = fields['period']
+        predicted_emission = fields['predicted_emission']
+        confidence = fields['confidence']
+        breakdown = fields['breakdown']
+        recommendations = fields['recommendations']
         
         # Parse period to get days
         period_days = 30
@@ -514,15 +821,17 @@ def save_to_csv():
         
         for csv_file in csv_files:
             try:
-                if os.path.exists(csv_file):
-                    # Append to existing CSV
-                    new_row_df.to_csv(csv_file, mode='a', header=False, index=False)
-                else:
-                    # Create new CSV with header
-                    new_row_df.to_csv(csv_file, mode='w', header=True, index=False)
+                with metrics.time("csv_append"):
+                    if os.path.exists(csv_file):
+                        # Append to existing CSV
+                        new_row_df.to_csv(csv_file, mode='a', header=False, index=False)
+                    else:
+                        # Create new CSV with header
+                        new_row_df.to_csv(csv_file, mode='w', header=True, index=False)
                 print(f"✓ Saved prediction to {csv_file}")
             except Exception as file_error:
                 print(f"⚠ Error saving to {csv_file}: {str(file_error)}")
+                metrics.exception(file_error)
         
         return jsonify({
             "success": True,
@@ -532,6 +841,7 @@ def save_to_csv():
         
     except Exception as e:
         print(f"❌ Error in save_to_csv: {str(e)}")
+        metrics.exception(e)
         import traceback
         traceback.print_exc()
         return jsonify({
@@ -545,7 +855,12 @@ if __name__ == '__main__':
     print("="*60)
     print(f"📍 Running on: http://localhost:8001")
     print(f"🎯 Focus: Manufacturing Industries")
-    print(f"🤖 Model Status: {'✓ Loaded' if model else '⚠ Fallback Mode'}")
+    print(f"📈 Metrics: http://localhost:8001/metrics")
+    print(f"🤖 Model: {'found' if xgboost_model.available else '⚠ not found (fallback mode)'}, "
+          f"{'preloading in background' if preload_enabled() else 'loaded on first prediction'}")
     print("="*60 + "\n")
     
-    app.run(host='0.0.0.0', port=8001, debug=True)
+    debug = os.environ.get("FLASK_DEBUG", "1") == "1"
+    if preload_enabled():
+        preload_after_bind(8001, [load_model, industry_factors], debug=debug)
+    app.run(host='0.0.0.0', port=8001, debug=debug)
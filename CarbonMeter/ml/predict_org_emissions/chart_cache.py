@@ -0,0 +1,161 @@
+"""
+============================================================
+INDUSTRY CARBON EMISSION - RENDERED CHART CACHE
+============================================================
+
+PURPOSE:
+    In-memory LRU cache of rendered chart images for the org API
+    (/chart/<chart_type>). Repeat dashboard views for the same
+    forecast are served from memory, or answered with 304 Not
+    Modified without touching matplotlib at all.
+
+CACHE KEY:
+    (organization, forecast hash, chart type, width, height, dpi, format)
+
+    The forecast hash covers the exact series that were plotted, so
+    a new forecast for the same organization never hits a stale image.
+    The ETag is derived from the key (plus RENDER_VERSION), which lets
+    the API answer If-None-Match before rendering.
+
+LIMITS:
+    Entries are evicted least-recently-used first once either
+    max_entries or max_bytes is exceeded.
+============================================================
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+
+# Bump when chart styling changes so clients drop cached images
+RENDER_VERSION = "1"
+
+MIMETYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "webp": "image/webp",
+}
+
+ChartKey = namedtuple(
+    "ChartKey", ["organization", "forecast", "chart", "width", "height", "dpi", "fmt"]
+)
+CachedChart = namedtuple("CachedChart", ["data", "mimetype", "etag"])
+
+
+def forecast_hash(historical, predicted, dates=None):
+    """
+    Content hash of a forecast's plotted series.
+
+    Args:
+        historical: Historical CO2 values
+        predicted: Predicted CO2 values
+        dates: Optional historical dates (labels on the x-axis)
+
+    Returns:
+        str: 16-character hex digest
+    """
+    import numpy as np  # deferred: keeps the API's startup free of numpy
+
+    digest = hashlib.sha256()
+    for values in (historical, predicted):
+        array = np.ascontiguousarray(values, dtype=np.float64)
+        digest.update(len(array).to_bytes(8, "little"))
+        digest.update(array.tobytes())
+    if dates is not None:
+        digest.update("\x1f".join(map(str, dates)).encode())
+    return digest.hexdigest()[:16]
+
+
+def chart_etag(key):
+    """Strong ETag for a cache key (stable across processes)."""
+    raw = "|".join(map(str, key)) + "|" + RENDER_VERSION
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class ChartCache:
+    """Thread-safe LRU cache of rendered chart bytes."""
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the CachedChart for key (marking it recently used) or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, data, fmt):
+        """Store rendered bytes and evict old entries beyond the limits."""
+        entry = CachedChart(data, MIMETYPES[fmt], chart_etag(key))
+        if len(data) > self.max_bytes:
+            return entry  # never cacheable; still returned to the caller
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.data)
+
+            self._entries[key] = entry
+            self._bytes += len(data)
+
+            while (len(self._entries) > self.max_entries
+                   or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.data)
+                self.evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class ForecastStore:
+    """
+    Bounded LRU of recently charted forecasts, keyed by
+    (organization, forecast hash), so GET requests can re-render an
+    evicted chart without the client re-posting the series.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, organization, digest, forecast):
+        with self._lock:
+            self._entries[(organization, digest)] = forecast
+            self._entries.move_to_end((organization, digest))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, organization, digest):
+        with self._lock:
+            forecast = self._entries.get((organization, digest))
+            if forecast is not None:
+                self._entries.move_to_end((organization, digest))
+            return forecast
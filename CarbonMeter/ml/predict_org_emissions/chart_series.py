@@ -0,0 +1,209 @@
+"""
+============================================================
+INDUSTRY CARBON EMISSION - CHART SERIES PREPARATION
+============================================================
+
+PURPOSE:
+    Turn historical + predicted daily CO₂ series of any length into
+    small, chart-ready payloads for the frontend (/chart-data):
+    - Historical and predicted series downsampled to a point budget
+    - Cumulative trajectories (predicted continues from historical)
+    - Summary statistics matching plot_statistical_summary()
+
+DOWNSAMPLING:
+    lttb    Largest-Triangle-Three-Buckets: keeps the points that
+            preserve the visual shape (peaks, dips, trend changes)
+    minmax  Per-bucket min and max: guarantees every extreme is kept
+
+    Series shorter than the budget are returned unchanged, and the
+    first and last points are always kept.
+
+USAGE:
+    from chart_series import prepare_chart_data
+    payload = prepare_chart_data(hist_co2, pred_co2, points=200)
+============================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+METHODS = ("lttb", "minmax")
+DEFAULT_POINTS = 100
+MAX_POINTS = 2000
+
+
+# ============================================================
+# DOWNSAMPLING
+# ============================================================
+def lttb_indices(y, threshold):
+    """
+    Largest-Triangle-Three-Buckets point selection.
+
+    Args:
+        y (np.ndarray): Values, evenly spaced on x
+        threshold (int): Number of points to keep (>= 3)
+
+    Returns:
+        np.ndarray: Sorted indices of the selected points
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=np.float64)
+    # Bucket edges for the n - 2 interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        # Average of the next bucket (last bucket: the final point)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Triangle area for every candidate in this bucket at once
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax_indices(y, threshold):
+    """
+    Keep the minimum and maximum of each bucket (threshold // 2 buckets).
+
+    A budget under 4 points has no room for a min/max pair besides
+    the endpoints, so it is met with LTTB instead.
+
+    Returns:
+        np.ndarray: Sorted indices of the selected points
+    """
+    n = len(y)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 4:
+        return lttb_indices(y, threshold)
+
+    buckets = (threshold - 2) // 2
+    size = int(np.ceil((n - 2) / buckets))
+    interior = np.full(buckets * size, np.nan)
+    interior[:n - 2] = y[1:n - 1]
+    grid = interior.reshape(buckets, size)
+
+    valid = ~np.isnan(grid).all(axis=1)
+    offsets = np.arange(buckets)[valid] * size + 1
+    lows = offsets + np.nanargmin(grid[valid], axis=1)
+    highs = offsets + np.nanargmax(grid[valid], axis=1)
+
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def downsample(y, points, method="lttb"):
+    """Indices of the points to keep for a series (see METHODS)."""
+    y = np.asarray(y, dtype=np.float64)
+    if method == "minmax":
+        return minmax_indices(y, points)
+    if method == "lttb":
+        return lttb_indices(y, points)
+    raise ValueError(f"Unknown downsampling method '{method}'. Use one of {METHODS}")
+
+
+# ============================================================
+# STATISTICS
+# ============================================================
+def series_stats(values):
+    """Statistics shown in the analysis dashboard's table."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return None
+    return {
+        "count": int(len(values)),
+        "mean": round(float(values.mean()), 2),
+        "median": round(float(np.median(values)), 2),
+        "std": round(float(values.std()), 2),
+        "min": round(float(values.min()), 2),
+        "max": round(float(values.max()), 2),
+        "total": round(float(values.sum()), 2),
+    }
+
+
+def _change_pct(old, new):
+    return round((new - old) / old * 100, 1) if old else None
+
+
+# ============================================================
+# PAYLOAD
+# ============================================================
+def _series(x, y, idx):
+    return {"x": x[idx].tolist(), "y": np.round(y[idx], 2).tolist()}
+
+
+def prepare_chart_data(historical, predicted, dates=None,
+                       points=DEFAULT_POINTS, method="lttb"):
+    """
+    Build the downsampled chart payload for one forecast.
+
+    Args:
+        historical: Historical daily CO₂ (kg)
+        predicted: Predicted daily CO₂ (kg)
+        dates: Optional historical dates. x is always the day number
+            (1..N, as in plot_statistical_summary()); with dates the
+            payload adds start_date so day x is start_date + (x - 1).
+        points (int): Point budget per series
+        method (str): 'lttb' or 'minmax'
+
+    Returns:
+        dict: historical, predicted, cumulative, stats (and start_date)
+    """
+    hist = np.asarray(historical, dtype=np.float64)
+    pred = np.asarray(predicted, dtype=np.float64)
+    points = int(min(max(points, 3), MAX_POINTS))
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}'. Use one of {METHODS}")
+
+    # Day numbers keep the payload small; dates are one start_date
+    hist_x = np.arange(1, len(hist) + 1)
+    pred_x = np.arange(len(hist) + 1, len(hist) + len(pred) + 1)
+
+    cum_hist = np.cumsum(hist)
+    cum_pred = np.cumsum(pred) + (cum_hist[-1] if len(cum_hist) else 0.0)
+
+    hist_stats = series_stats(hist)
+    pred_stats = series_stats(pred)
+    change = None
+    if hist_stats and pred_stats:
+        change = {
+            key: _change_pct(hist_stats[key], pred_stats[key])
+            for key in ("mean", "median", "total")
+        }
+
+    payload = {
+        "method": method,
+        "points": points,
+        "source_points": {"historical": int(len(hist)), "predicted": int(len(pred))},
+        "historical": _series(hist_x, hist, downsample(hist, points, method)),
+        "predicted": _series(pred_x, pred, downsample(pred, points, method)),
+        "cumulative": {
+            "historical": _series(hist_x, cum_hist, downsample(cum_hist, points, method)),
+            "predicted": _series(pred_x, cum_pred, downsample(cum_pred, points, method)),
+        },
+        "stats": {
+            "historical": hist_stats,
+            "predicted": pred_stats,
+            "change_pct": change,
+        },
+    }
+
+    if dates is not None and len(dates):
+        first = pd.to_datetime(pd.Series(dates[:1]), format="mixed").iloc[0]
+        payload["start_date"] = first.strftime("%Y-%m-%d")
+
+    return payload
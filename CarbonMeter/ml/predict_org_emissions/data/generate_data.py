@@ -1,78 +1,316 @@
+"""
+Synthetic industry emission dataset generator.
+
+Draws whole columns at once with a seeded numpy Generator and
+streams the rows to CSV or Parquet in fixed-size chunks, so memory
+stays constant whatever --rows is.
+
+Chunk k is generated from SeedSequence([seed, k]) alone: the same
+seed always gives the same file, whether chunks are generated in one
+process or in parallel (--workers).
+
+Usage:
+    python generate_data.py                                   # industry_emission_10k.csv
+    python generate_data.py --rows 10000000 --workers 4 --format parquet \\
+        --output industry_emission_10m.parquet
+    python generate_data.py --rows 1000000 --plants 50 --industries cement,steel,power
+    python generate_data.py --distributions my_ranges.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
+
+import ml_root  # shared modules in CarbonMeter/ml
+
+# industry_profiles lives in predict_org_emissions
+ORG_ROOT = os.path.join(ml_root.ML_ROOT, "predict_org_emissions")
+if ORG_ROOT not in sys.path:
+    sys.path.insert(0, ORG_ROOT)
+
+from emission_factors import pinned
+from industry_profiles import COLUMN_BOUNDS, industry_scale
 
 # -----------------------
 # Emission Factors
 # -----------------------
-ELECTRICITY_EF = 0.82
-DIESEL_EF = 2.31
-NATURAL_GAS_EF = 1.90
-CEMENT_EF = 900
-STEEL_EF = 1800
-PLASTIC_EF = 2.5
-
-np.random.seed(42)
-
-rows = 10000
-start_date = datetime(2024, 1, 1)
-
-data = []
-
-for i in range(rows):
-    date = start_date + timedelta(days=i)
-
-    electricity = np.random.randint(8000, 20000)
-    diesel = np.random.randint(50, 300)
-    gas = np.random.randint(200, 800)
-
-    cement = np.random.uniform(5, 20)
-    steel = np.random.uniform(3, 15)
-    plastic = np.random.uniform(100, 600)
-
-    production = np.random.randint(2000, 6000)
-    hours = np.random.randint(8, 24)
-    capacity = np.random.uniform(40, 100)
-
-    co2 = (
-        electricity * ELECTRICITY_EF +
-        diesel * DIESEL_EF +
-        gas * NATURAL_GAS_EF +
-        cement * CEMENT_EF +
-        steel * STEEL_EF +
-        plastic * PLASTIC_EF
+# Same version the industry model was trained on
+FACTORS = pinned("2024.1")
+
+ELECTRICITY_EF = FACTORS.factor("electricity")
+DIESEL_EF = FACTORS.factor("diesel")
+NATURAL_GAS_EF = FACTORS.factor("natural_gas")
+CEMENT_EF = FACTORS.factor("cement")
+STEEL_EF = FACTORS.factor("steel")
+PLASTIC_EF = FACTORS.factor("plastic")
+
+# -----------------------
+# Column distributions (one plant of the reference industry)
+# -----------------------
+# column: (kind, low, high, decimals)
+#   int      integers in [low, high)
+#   uniform  floats in [low, high), rounded to `decimals`
+DISTRIBUTIONS = {
+    "electricity_kwh": ("int", 8000, 20000, 0),
+    "diesel_liter": ("int", 50, 300, 0),
+    "natural_gas_m3": ("int", 200, 800, 0),
+    "cement_ton": ("uniform", 5, 20, 2),
+    "steel_ton": ("uniform", 3, 15, 2),
+    "plastic_kg": ("uniform", 100, 600, 2),
+    "production_units": ("int", 2000, 6000, 0),
+    "operating_hours": ("int", 8, 24, 0),
+    "capacity_utilization": ("uniform", 40, 100, 1),
+}
+
+EMISSION_FACTORS = {
+    "electricity_kwh": ELECTRICITY_EF,
+    "diesel_liter": DIESEL_EF,
+    "natural_gas_m3": NATURAL_GAS_EF,
+    "cement_ton": CEMENT_EF,
+    "steel_ton": STEEL_EF,
+    "plastic_kg": PLASTIC_EF,
+}
+
+FORMATS = ("csv", "parquet")
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_ROWS = 250_000
+START_DATE = datetime(2024, 1, 1)
+
+
+class DatasetSpec:
+    """What to generate: sizes, seed, plants/industries and distributions."""
+
+    def __init__(self, rows=10000, chunk_rows=DEFAULT_CHUNK_ROWS, seed=DEFAULT_SEED,
+                 plants=1, industries=("manufacturing",), distributions=None,
+                 start_date=START_DATE):
+        """
+        Args:
+            rows (int): Total rows
+            chunk_rows (int): Rows per generated/written chunk
+            seed (int): Base seed (chunk k uses SeedSequence([seed, k]))
+            plants (int): Plants; row r belongs to plant r % plants and
+                day r // plants, so each plant gets a daily series
+            industries (list): Industries assigned to plants round-robin
+            distributions (dict): Overrides of DISTRIBUTIONS entries
+            start_date (datetime): Date of day 0
+        """
+        if rows < 1 or chunk_rows < 1 or plants < 1:
+            raise ValueError("rows, chunk_rows and plants must be >= 1")
+        self.rows = int(rows)
+        self.chunk_rows = int(chunk_rows)
+        self.seed = int(seed)
+        self.plants = int(plants)
+        self.industries = list(industries)
+        self.distributions = {**DISTRIBUTIONS, **(distributions or {})}
+        self.start_date = start_date
+
+        for col, entry in self.distributions.items():
+            if len(entry) != 4 or entry[0] not in ("int", "uniform"):
+                raise ValueError(f"Distribution for '{col}' must be "
+                                 f"(\"int\"|\"uniform\", low, high, decimals), got {entry!r}")
+
+        # Per-plant range multipliers, (plants x columns) per column;
+        # columns without an industry profile are not scaled
+        plant_industries = [self.industries[p % len(self.industries)] for p in range(self.plants)]
+        scales = [industry_scale(industry) for industry in plant_industries]
+        self.plant_industries = np.array(plant_industries)
+        self.plant_scale = {
+            col: np.array([scale.get(col, 1.0) for scale in scales]) for col in self.distributions
+        }
+
+    @property
+    def chunks(self):
+        return (self.rows + self.chunk_rows - 1) // self.chunk_rows
+
+    @property
+    def multi_plant(self):
+        return self.plants > 1 or self.industries != ["manufacturing"]
+
+
+def generate_chunk(spec, chunk_index):
+    """
+    Generate one chunk as a DataFrame (depends only on spec + chunk_index).
+
+    Args:
+        spec (DatasetSpec): Dataset description
+        chunk_index (int): Chunk number (0-based)
+
+    Returns:
+        pd.DataFrame: Rows [chunk_index * chunk_rows, ...) of the dataset
+    """
+    first = chunk_index * spec.chunk_rows
+    n = min(spec.chunk_rows, spec.rows - first)
+    rng = np.random.default_rng(np.random.SeedSequence([spec.seed, chunk_index]))
+
+    row = np.arange(first, first + n, dtype=np.int64)
+    plant = row % spec.plants
+    day = row // spec.plants
+
+    start = np.datetime64(spec.start_date.strftime("%Y-%m-%d"), "D")
+    out = {"date": np.datetime_as_string(start + day, unit="D")}
+    if spec.multi_plant:
+        out["plant_id"] = plant
+        out["industry"] = spec.plant_industries[plant]
+
+    co2 = np.zeros(n)
+    for col, (kind, low, high, decimals) in spec.distributions.items():
+        scale = spec.plant_scale[col][plant]
+        if kind == "int":
+            values = np.floor(rng.integers(low, high, size=n) * scale).astype(np.int64)
+        elif kind == "uniform":
+            values = rng.uniform(low, high, size=n) * scale
+        else:
+            raise ValueError(f"Unknown distribution kind '{kind}' for {col}")
+
+        if col in COLUMN_BOUNDS:
+            values = np.clip(values, *COLUMN_BOUNDS[col])
+        if col in EMISSION_FACTORS:
+            co2 += values * EMISSION_FACTORS[col]
+        out[col] = np.round(values, decimals) if kind == "uniform" else values
+
+    out["co2_emission"] = np.round(co2, 2)
+    return pd.DataFrame(out)
+
+
+def _chunk_job(args):
+    """
+    Generate one chunk, ready to write.
+
+    CSV chunks are formatted here (formatting costs more than drawing
+    the numbers), so with --workers the main process only writes bytes.
+    """
+    spec, chunk_index, fmt = args
+    chunk = generate_chunk(spec, chunk_index)
+    if fmt == "csv":
+        return len(chunk), chunk.to_csv(index=False, header=chunk_index == 0).encode()
+    return len(chunk), chunk
+
+
+def iter_chunks(spec, fmt="csv", workers=1):
+    """
+    Yield (rows, payload) per chunk, in order.
+
+    With workers > 1 chunks are generated in a process pool, with at
+    most 2 x workers chunks in flight so memory stays bounded.
+    """
+    if workers <= 1:
+        for k in range(spec.chunks):
+            yield _chunk_job((spec, k, fmt))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = []
+        next_chunk = 0
+        while next_chunk < spec.chunks or in_flight:
+            while next_chunk < spec.chunks and len(in_flight) < 2 * workers:
+                in_flight.append(pool.submit(_chunk_job, (spec, next_chunk, fmt)))
+                next_chunk += 1
+            yield in_flight.pop(0).result()
+
+
+def write_dataset(spec, output_path, fmt="csv", workers=1, verbose=True):
+    """
+    Stream the dataset to CSV or Parquet.
+
+    Args:
+        spec (DatasetSpec): Dataset description
+        output_path (str): Output file
+        fmt (str): 'csv' or 'parquet' (needs pyarrow)
+        workers (int): Generator processes
+        verbose (bool): Print progress per chunk
+
+    Returns:
+        dict: rows, chunks, seconds, rows_per_second
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of {FORMATS}")
+
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from None
+
+    start = time.perf_counter()
+    written = 0
+    writer = None
+    csv_file = open(output_path, "wb") if fmt == "csv" else None
+    try:
+        for k, (rows, payload) in enumerate(iter_chunks(spec, fmt, workers)):
+            if fmt == "csv":
+                csv_file.write(payload)
+            else:
+                table = pa.Table.from_pandas(payload, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+
+            written += rows
+            if verbose and spec.chunks > 1:
+                print(f"   chunk {k + 1}/{spec.chunks}: {written:,} rows")
+    finally:
+        if csv_file is not None:
+            csv_file.close()
+        if writer is not None:
+            writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": written,
+        "chunks": spec.chunks,
+        "seconds": elapsed,
+        "rows_per_second": written / max(elapsed, 1e-9),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic industry emission dataset")
+    parser.add_argument("--rows", type=int, default=10000, help="Total rows (default: 10000)")
+    parser.add_argument("--output", default=None,
+                        help="Output file (default: industry_emission_10k.csv)")
+    parser.add_argument("--format", choices=FORMATS, default=None,
+                        help="csv or parquet (default: from --output extension)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                        help=f"Rows per chunk (default: {DEFAULT_CHUNK_ROWS:,})")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Base seed (default: 42)")
+    parser.add_argument("--workers", type=int, default=1, help="Generator processes (default: 1)")
+    parser.add_argument("--plants", type=int, default=1, help="Number of plants (default: 1)")
+    parser.add_argument("--industries", default="manufacturing",
+                        help="Comma-separated industries, assigned to plants round-robin")
+    parser.add_argument("--distributions", default=None,
+                        help='JSON file overriding ranges, e.g. {"diesel_liter": ["int", 100, 500, 0]}')
+    args = parser.parse_args()
+
+    output_path = args.output or "industry_emission_10k.csv"
+    fmt = args.format or ("parquet" if output_path.endswith(".parquet") else "csv")
+
+    distributions = None
+    if args.distributions:
+        with open(args.distributions, "r") as f:
+            distributions = {col: tuple(spec) for col, spec in json.load(f).items()}
+
+    spec = DatasetSpec(
+        rows=args.rows,
+        chunk_rows=args.chunk_rows,
+        seed=args.seed,
+        plants=args.plants,
+        industries=[i.strip() for i in args.industries.split(",") if i.strip()],
+        distributions=distributions,
     )
+    result = write_dataset(spec, output_path, fmt=fmt, workers=args.workers)
+
+    print(f"✅ {result['rows']:,}-row industry dataset generated successfully")
+    print(f"   {output_path} ({fmt}, {result['chunks']} chunk(s), "
+          f"{result['seconds']:.2f}s, {result['rows_per_second']:,.0f} rows/s)")
+
 
-    data.append([
-        date.strftime("%Y-%m-%d"),
-        electricity,
-        diesel,
-        gas,
-        round(cement, 2),
-        round(steel, 2),
-        round(plastic, 2),
-        production,
-        hours,
-        round(capacity, 1),
-        round(co2, 2)
-    ])
-
-columns = [
-    "date",
-    "electricity_kwh",
-    "diesel_liter",
-    "natural_gas_m3",
-    "cement_ton",
-    "steel_ton",
-    "plastic_kg",
-    "production_units",
-    "operating_hours",
-    "capacity_utilization",
-    "co2_emission"
-]
-
-df = pd.DataFrame(data, columns=columns)
-
-df.to_csv("industry_emission_10k.csv", index=False)
-
-print("✅ 10,000-row industry dataset generated successfully")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+============================================================
+INDUSTRY CARBON EMISSION - FORECAST RESULT CACHE
+============================================================
+
+PURPOSE:
+    Content-addressed cache of recursive forecasts, so rerunning
+    predict_future_emissions.py with the same 30-day input and
+    parameters returns the stored forecast instead of recomputing.
+
+CACHE KEY:
+    sha256(input window, window end date, growth rate, model checksum,
+           ALGORITHM_VERSION)
+
+    The end date is part of the key because every forecast row
+    carries the window's date: the same values logged over a later
+    window must not be served last run's dates.
+
+    The horizon is deliberately NOT part of the key: day N of the
+    forecast only depends on the input window, growth rate and model,
+    so a 30-day request is served as the first 30 rows of a cached
+    180-day forecast. Each key stores its longest forecast so far.
+
+STORAGE:
+    predictions/forecast_cache/<key>.csv
+
+USAGE:
+    cache = ForecastCache()
+    key = cache.key(historical_df, growth_rate, model_version)
+    forecast = cache.get(key, horizon)        # None on miss
+    cache.put(key, forecast)
+============================================================
+"""
+
+import hashlib
+import os
+
+import pandas as pd
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "predictions", "forecast_cache")
+
+# Bump when predict_next_days() changes how forecasts are produced
+ALGORITHM_VERSION = "1"
+
+# Columns that determine a forecast (same as validate_input_data)
+INPUT_COLUMNS = [
+    'electricity_kwh',
+    'diesel_liter',
+    'natural_gas_m3',
+    'cement_ton',
+    'steel_ton',
+    'plastic_kg',
+    'production_units',
+    'operating_hours',
+    'capacity_utilization'
+]
+
+
+def window_hash(historical_df, columns=INPUT_COLUMNS):
+    """Stable hash of the input window's feature values."""
+    window = historical_df[columns].astype("float64").reset_index(drop=True)
+    hashed = pd.util.hash_pandas_object(window, index=False).to_numpy()
+    digest = hashlib.sha256(",".join(columns).encode())
+    digest.update(hashed.tobytes())
+    return digest.hexdigest()
+
+
+def window_end(historical_df):
+    """Last date of the input window ('' when it has no date column)."""
+    if "date" not in historical_df.columns or historical_df.empty:
+        return ""
+    end = pd.to_datetime(historical_df["date"].iloc[-1], format="mixed", errors="coerce")
+    return "" if pd.isna(end) else end.strftime("%Y-%m-%d")
+
+
+class ForecastCache:
+    """On-disk forecast cache keyed by input window and parameters."""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, historical_df, growth_rate, model_version):
+        """
+        Cache key for a forecast request (horizon excluded, see module notes).
+
+        Args:
+            historical_df (pd.DataFrame): Input window (values and end date)
+            growth_rate (float): Weekly growth rate
+            model_version (str): Model checksum
+
+        Returns:
+            str: 24-character hex key
+        """
+        parts = [
+            window_hash(historical_df),
+            window_end(historical_df),
+            repr(float(growth_rate)),
+            str(model_version),
+            ALGORITHM_VERSION,
+        ]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()[:24]
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.csv")
+
+    def cached_horizon(self, key):
+        """Longest horizon stored for key (0 when absent)."""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return 0
+        with open(path, "rb") as f:
+            return max(sum(1 for _ in f) - 1, 0)
+
+    def get(self, key, horizon):
+        """
+        Forecast of `horizon` days for key, or None on a miss.
+
+        A longer cached forecast is served by its first `horizon` rows.
+        """
+        if self.cached_horizon(key) < horizon:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        # round_trip: served values must match a fresh computation bit-for-bit
+        return pd.read_csv(self._path(key), nrows=horizon, float_precision="round_trip")
+
+    def put(self, key, forecast_df):
+        """Store a forecast unless a longer one is already cached."""
+        if self.cached_horizon(key) >= len(forecast_df):
+            return False
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._path(key) + ".tmp"
+        forecast_df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, self._path(key))
+        return True
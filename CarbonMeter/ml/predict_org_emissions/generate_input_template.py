@@ -1,85 +1,228 @@
 """
 Generate sample 30-day historical input template for users.
 This script creates a template CSV that users can fill with their own data.
+
+It also generates scenario fixtures: N plants x D days of input windows
+in one vectorized call, centred on each industry's operating profile
+(see industry_profiles.py), plus the matching /predict/org request
+bodies. The benchmark and load-test suites use these.
+
+Usage:
+    python generate_input_template.py
+    python generate_input_template.py --plants 200 --days 30 --scenarios fixtures/
+    python generate_input_template.py --plants 50 --industries cement,steel --seed 7 --scenarios fixtures/
 """
 
-import pandas as pd
+import argparse
+import json
 import os
 from datetime import datetime, timedelta
 
-# Base values (sample operational data)
-base_data = {
-    'electricity_kwh': 15000,
-    'diesel_liter': 200,
-    'natural_gas_m3': 600,
-    'cement_ton': 12.0,
-    'steel_ton': 8.0,
-    'plastic_kg': 350.0,
-    'production_units': 4500,
-    'operating_hours': 16,
-    'capacity_utilization': 78.0
-}
+import numpy as np
+import pandas as pd
 
-# Generate 30 days with slight variations
-records = []
-start_date = datetime.now() - timedelta(days=30)
-
-for day in range(30):
-    record = base_data.copy()
-    current_date = start_date + timedelta(days=day)
-    record['date'] = current_date.strftime('%Y-%m-%d')
-    
-    # Add small random variations (±5%)
-    import random
-    random.seed(day)
-    
-    for key in base_data.keys():
-        if key not in ['operating_hours']:  # Keep operating hours constant
-            variation = random.uniform(-0.05, 0.05)
-            record[key] = round(base_data[key] * (1 + variation), 2)
-    
-    records.append(record)
-
-# Create DataFrame
-df = pd.DataFrame(records)
+from industry_profiles import FEATURE_COLUMNS, INDUSTRY_PROFILES, COLUMN_BOUNDS
 
 # Reorder columns for better readability
-column_order = [
-    'date',
-    'electricity_kwh',
-    'diesel_liter',
-    'natural_gas_m3',
-    'cement_ton',
-    'steel_ton',
-    'plastic_kg',
-    'production_units',
-    'operating_hours',
-    'capacity_utilization'
-]
-
-df = df[column_order]
-
-# Save template
-output_path = os.path.join(os.path.dirname(__file__), 'sample_30day_input_template.csv')
-df.to_csv(output_path, index=False)
-
-print(f"✅ Sample input template created: {output_path}")
-print("\nColumn Descriptions:")
-print("="*70)
-print("date                   : Date in YYYY-MM-DD format (optional)")
-print("electricity_kwh        : Daily electricity consumption in kWh")
-print("diesel_liter          : Daily diesel fuel usage in liters")
-print("natural_gas_m3        : Daily natural gas consumption in cubic meters")
-print("cement_ton            : Daily cement usage in tons")
-print("steel_ton             : Daily steel usage in tons")
-print("plastic_kg            : Daily plastic material usage in kilograms")
-print("production_units      : Number of units produced daily")
-print("operating_hours       : Daily operating hours")
-print("capacity_utilization  : Facility capacity utilization percentage")
-print("="*70)
-print("\n📝 Instructions:")
-print("1. Replace the sample values with your actual 30-day operational data")
-print("2. Ensure all numerical values are accurate")
-print("3. Save the file and use it with predict_future_emissions.py")
-print("\nExample usage:")
-print(f"python predict_future_emissions.py --input {output_path} --days 30")
+column_order = ['date'] + FEATURE_COLUMNS
+
+# Columns held constant within a window (no daily variation)
+CONSTANT_COLUMNS = ['operating_hours']
+
+# /predict/org input_features keys for each window column
+API_FEATURES = {
+    'electricity_kwh': 'electricity_kwh',
+    'diesel_liter': 'diesel_liters',
+    'natural_gas_m3': 'natural_gas_m3',
+    'production_units': 'production_units',
+}
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample_30day_input_template.csv')
+
+
+def build_windows(plants=1, days=30, industries=None, seed=0, variation=0.05, end_date=None):
+    """
+    Input windows for many plants at once.
+
+    Every value is the plant's industry profile times (1 + u), with u
+    drawn uniformly from [-variation, variation] for the whole
+    (plants x days x features) block in one call.
+
+    Args:
+        plants (int): Number of plants
+        days (int): Days per window
+        industries (list): Industries assigned to plants round-robin
+            (default: all of INDUSTRY_PROFILES)
+        seed (int): Seed of the numpy Generator
+        variation (float): Relative daily variation (0.05 = ±5%)
+        end_date (datetime): Day after each window's last row (default: now)
+
+    Returns:
+        pd.DataFrame: plants * days rows: plant_id, industry, date, features
+    """
+    industries = list(industries or INDUSTRY_PROFILES)
+    unknown = [i for i in industries if i not in INDUSTRY_PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown industries {unknown}. Use any of {sorted(INDUSTRY_PROFILES)}")
+
+    plant_industry = np.array(industries)[np.arange(plants) % len(industries)]
+    base = np.array([[INDUSTRY_PROFILES[i][col] for col in FEATURE_COLUMNS] for i in plant_industry],
+                    dtype=np.float64)                                  # plants x features
+
+    rng = np.random.default_rng(seed)
+    noise = rng.uniform(-variation, variation, size=(plants, days, len(FEATURE_COLUMNS)))
+    constant = np.isin(FEATURE_COLUMNS, CONSTANT_COLUMNS)
+    noise[:, :, constant] = 0.0
+    values = np.round(base[:, None, :] * (1 + noise), 2)               # plants x days x features
+
+    for col, (low, high) in COLUMN_BOUNDS.items():
+        j = FEATURE_COLUMNS.index(col)
+        values[:, :, j] = np.clip(values[:, :, j], low, high)
+
+    end_date = end_date or datetime.now()
+    start = np.datetime64((end_date - timedelta(days=days)).strftime('%Y-%m-%d'), 'D')
+    dates = np.datetime_as_string(start + np.arange(days), unit='D')
+
+    windows = pd.DataFrame(values.reshape(plants * days, len(FEATURE_COLUMNS)), columns=FEATURE_COLUMNS)
+    windows[CONSTANT_COLUMNS] = windows[CONSTANT_COLUMNS].astype(np.int64)
+    windows.insert(0, 'date', np.tile(dates, plants))
+    windows.insert(0, 'industry', np.repeat(plant_industry, days))
+    windows.insert(0, 'plant_id', np.repeat(np.arange(plants), days))
+    return windows
+
+
+def build_template(days=30, end_date=None, seed=0):
+    """
+    Build the sample input window (one manufacturing plant).
+
+    Args:
+        days (int): Number of days in the template
+        end_date (datetime): Day after the last row (default: now)
+        seed (int): Seed of the daily variations
+
+    Returns:
+        pd.DataFrame: Template rows in column_order
+    """
+    windows = build_windows(1, days, ['manufacturing'], seed=seed, end_date=end_date)
+    return windows[column_order]
+
+
+def split_windows(windows):
+    """{plant_id: window DataFrame} in predict_future_emissions' input format."""
+    return {
+        int(plant_id): group[column_order].reset_index(drop=True)
+        for plant_id, group in windows.groupby('plant_id', sort=True)
+    }
+
+
+def api_payloads(windows, historical_days=30):
+    """
+    /predict/org request bodies, one per plant.
+
+    Args:
+        windows (pd.DataFrame): Output of build_windows()
+        historical_days (int): Forecast period requested
+
+    Returns:
+        list: JSON-serializable request bodies
+    """
+    plants = windows['plant_id'].nunique()
+    days = len(windows) // plants
+    industries = windows['industry'].to_numpy()[::days]
+    series = {
+        key: windows[col].to_numpy().reshape(plants, days).tolist()
+        for col, key in API_FEATURES.items()
+    }
+    return [
+        {
+            "organizationId": f"plant-{p:05d}",
+            "industry": str(industries[p]),
+            "historical_days": historical_days,
+            "input_features": {key: series[key][p] for key in API_FEATURES.values()},
+        }
+        for p in range(plants)
+    ]
+
+
+def write_scenarios(output_dir, plants, days=30, industries=None, seed=0, variation=0.05):
+    """
+    Write scenario fixtures for the benchmark / load-test suites.
+
+    Files:
+        windows.csv          all plants' input windows (long format)
+        predict_org.jsonl    one /predict/org request body per line
+
+    Returns:
+        dict: Paths written
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    windows = build_windows(plants, days, industries, seed=seed, variation=variation)
+
+    windows_path = os.path.join(output_dir, 'windows.csv')
+    windows.to_csv(windows_path, index=False)
+
+    payloads_path = os.path.join(output_dir, 'predict_org.jsonl')
+    with open(payloads_path, 'w') as f:
+        for body in api_payloads(windows):
+            f.write(json.dumps(body) + '\n')
+
+    return {"windows": windows_path, "payloads": payloads_path}
+
+
+def generate_template(output_path=TEMPLATE_PATH, days=30, end_date=None):
+    """Write the sample template CSV and return its path."""
+    df = build_template(days, end_date)
+    df.to_csv(output_path, index=False)
+    print(f"✅ Sample input template created: {output_path}")
+    return output_path
+
+
+def print_instructions(output_path=TEMPLATE_PATH):
+    print("\nColumn Descriptions:")
+    print("="*70)
+    print("date                   : Date in YYYY-MM-DD format (optional)")
+    print("electricity_kwh        : Daily electricity consumption in kWh")
+    print("diesel_liter          : Daily diesel fuel usage in liters")
+    print("natural_gas_m3        : Daily natural gas consumption in cubic meters")
+    print("cement_ton            : Daily cement usage in tons")
+    print("steel_ton             : Daily steel usage in tons")
+    print("plastic_kg            : Daily plastic material usage in kilograms")
+    print("production_units      : Number of units produced daily")
+    print("operating_hours       : Daily operating hours")
+    print("capacity_utilization  : Facility capacity utilization percentage")
+    print("="*70)
+    print("\n📝 Instructions:")
+    print("1. Replace the sample values with your actual 30-day operational data")
+    print("2. Ensure all numerical values are accurate")
+    print("3. Save the file and use it with predict_future_emissions.py")
+    print("\nExample usage:")
+    print(f"python predict_future_emissions.py --input {output_path} --days 30")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate input templates and scenario fixtures")
+    parser.add_argument('--scenarios', default=None,
+                        help='Write N-plant scenario fixtures to this directory instead of the template')
+    parser.add_argument('--plants', type=int, default=100, help='Plants in the scenario (default: 100)')
+    parser.add_argument('--days', type=int, default=30, help='Days per window (default: 30)')
+    parser.add_argument('--industries', default=None,
+                        help=f"Comma-separated industries (default: {','.join(INDUSTRY_PROFILES)})")
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--variation', type=float, default=0.05,
+                        help='Relative daily variation (default: 0.05 = ±5%%)')
+    args = parser.parse_args()
+
+    if args.scenarios is None:
+        print_instructions(generate_template(days=args.days))
+        return
+
+    industries = [i.strip() for i in args.industries.split(',')] if args.industries else None
+    paths = write_scenarios(args.scenarios, args.plants, args.days, industries,
+                            seed=args.seed, variation=args.variation)
+    print(f"✅ Scenario fixtures: {args.plants} plants x {args.days} days")
+    for kind, path in paths.items():
+        print(f"   {kind:<9}: {path}")
+
+
+if __name__ == "__main__":
+    main()
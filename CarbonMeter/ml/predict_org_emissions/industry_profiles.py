@@ -0,0 +1,84 @@
+"""
+============================================================
+INDUSTRY CARBON EMISSION - PER-INDUSTRY OPERATING PROFILES
+============================================================
+
+PURPOSE:
+    Typical daily operating values of one plant for each industry
+    the organization API supports (cement, steel, power, chemicals,
+    manufacturing), in the model's input columns.
+
+    Used to make synthetic data look like the industry it claims to
+    be: the training data generator scales its distributions by
+    them, and the input template generator centres windows on them.
+
+    "manufacturing" is the reference profile: it equals the original
+    sample template, so scale("manufacturing") is 1.0 everywhere.
+============================================================
+"""
+
+FEATURE_COLUMNS = [
+    'electricity_kwh',
+    'diesel_liter',
+    'natural_gas_m3',
+    'cement_ton',
+    'steel_ton',
+    'plastic_kg',
+    'production_units',
+    'operating_hours',
+    'capacity_utilization'
+]
+
+# Daily values per plant (same order as FEATURE_COLUMNS)
+INDUSTRY_PROFILES = {
+    "cement": {
+        'electricity_kwh': 22000, 'diesel_liter': 260, 'natural_gas_m3': 900,
+        'cement_ton': 45.0, 'steel_ton': 2.0, 'plastic_kg': 120.0,
+        'production_units': 3800, 'operating_hours': 20, 'capacity_utilization': 82.0,
+    },
+    "steel": {
+        'electricity_kwh': 30000, 'diesel_liter': 300, 'natural_gas_m3': 1200,
+        'cement_ton': 3.0, 'steel_ton': 35.0, 'plastic_kg': 150.0,
+        'production_units': 3000, 'operating_hours': 22, 'capacity_utilization': 85.0,
+    },
+    "power": {
+        'electricity_kwh': 8000, 'diesel_liter': 400, 'natural_gas_m3': 5000,
+        'cement_ton': 1.0, 'steel_ton': 1.0, 'plastic_kg': 50.0,
+        'production_units': 6000, 'operating_hours': 24, 'capacity_utilization': 70.0,
+    },
+    "chemicals": {
+        'electricity_kwh': 18000, 'diesel_liter': 220, 'natural_gas_m3': 1500,
+        'cement_ton': 2.0, 'steel_ton': 4.0, 'plastic_kg': 900.0,
+        'production_units': 4000, 'operating_hours': 20, 'capacity_utilization': 75.0,
+    },
+    "manufacturing": {
+        'electricity_kwh': 15000, 'diesel_liter': 200, 'natural_gas_m3': 600,
+        'cement_ton': 12.0, 'steel_ton': 8.0, 'plastic_kg': 350.0,
+        'production_units': 4500, 'operating_hours': 16, 'capacity_utilization': 78.0,
+    },
+}
+
+REFERENCE_INDUSTRY = "manufacturing"
+
+# Physical limits values are clipped to
+COLUMN_BOUNDS = {
+    'operating_hours': (1, 24),
+    'capacity_utilization': (1.0, 100.0),
+}
+
+
+def industry_profile(industry):
+    """Daily profile of an industry (ValueError for unknown ones)."""
+    try:
+        return INDUSTRY_PROFILES[industry.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown industry '{industry}'. Use one of {sorted(INDUSTRY_PROFILES)}"
+        ) from None
+
+
+def industry_scale(industry):
+    """Per-column ratio of an industry's profile to the reference profile."""
+    profile = industry_profile(industry)
+    reference = INDUSTRY_PROFILES[REFERENCE_INDUSTRY]
+    return {col: profile[col] / reference[col] for col in FEATURE_COLUMNS}
@@ -0,0 +1,234 @@
+"""
+============================================================
+INDUSTRY CARBON EMISSION - IN-PROCESS PIPELINE RUNNER
+============================================================
+
+PURPOSE:
+    Run the prediction workflow as a DAG of stages inside one
+    Python process, instead of one subprocess per script:
+    - Libraries, model and data are loaded once and shared
+    - Stages whose dependencies are done run concurrently
+    - Stage outputs are cached: a stage whose inputs did not
+      change since the last run is skipped
+    - Per-stage timings are reported
+
+STAGE CACHE:
+    A stage's fingerprint is a hash of its name, its parameters and
+    the fingerprints of its dependencies' outputs (file checksums for
+    paths, content hashes for DataFrames). When the fingerprint
+    matches the last run and every output file still exists, the
+    stored result is reused. State lives in
+    predictions/pipeline_state.json.
+
+USAGE:
+    pipeline = Pipeline()
+    pipeline.add("load", load_history, cache=False)
+    pipeline.add("forecast", run_forecast, deps=["load"], params={"days": 30})
+    results = pipeline.run(workers=4)
+    pipeline.print_timings()
+============================================================
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import pandas as pd
+
+from prediction_index import file_checksum
+
+STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "predictions", "pipeline_state.json")
+
+# Stage outcomes
+RAN, CACHED, FAILED, SKIPPED = "ran", "cached", "failed", "skipped"
+
+
+def output_fingerprint(value):
+    """Content fingerprint of a stage result."""
+    if isinstance(value, str) and os.path.isfile(value):
+        return file_checksum(value, length=64)
+    if isinstance(value, pd.DataFrame):
+        hashed = pd.util.hash_pandas_object(value, index=False).to_numpy()
+        return hashlib.sha256(hashed.tobytes()).hexdigest()
+    if isinstance(value, (list, tuple)):
+        return hashlib.sha256("|".join(output_fingerprint(v) for v in value).encode()).hexdigest()
+    return hashlib.sha256(repr(value).encode()).hexdigest()
+
+
+def _output_paths(value):
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        return [path for item in value for path in _output_paths(item)]
+    return []
+
+
+class Stage:
+    """One node of the pipeline DAG."""
+
+    def __init__(self, name, func, deps=(), params=None, cache=True,
+                 required=True, description=None):
+        """
+        Args:
+            name (str): Unique stage name
+            func (callable): Called with the dependencies' results, in
+                deps order. Cached stages must return a path or a list
+                of paths (JSON-serializable).
+            deps (list): Names of stages this one needs
+            params (dict): Parameters that change the stage's output
+            cache (bool): Reuse the previous result when unchanged
+            required (bool): Stop scheduling new stages if this one fails
+            description (str): Printed when the stage starts
+        """
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.params = params or {}
+        self.cache = cache
+        self.required = required
+        self.description = description or name
+
+
+class Pipeline:
+    """Dependency-ordered, concurrent, cached stage runner."""
+
+    def __init__(self, state_path=STATE_PATH, use_cache=True):
+        self.stages = {}
+        self.state_path = state_path
+        self.use_cache = use_cache
+        self.results = {}
+        self.report = []
+
+    def add(self, name, func, **kwargs):
+        """Register a stage (see Stage for arguments)."""
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage '{name}'")
+        stage = Stage(name, func, **kwargs)
+        missing = [dep for dep in stage.deps if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stage(s): {missing}")
+        self.stages[name] = stage
+        return stage
+
+    # ======================
+    # Cache state
+    # ======================
+    def _load_state(self):
+        if not self.use_cache or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _fingerprint(self, stage):
+        parts = [stage.name, json.dumps(stage.params, sort_keys=True, default=str)]
+        parts += [output_fingerprint(self.results[dep]) for dep in stage.deps]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def _cached_result(self, stage, state, fingerprint):
+        entry = state.get(stage.name)
+        if not (self.use_cache and stage.cache and entry):
+            return None
+        if entry.get("fingerprint") != fingerprint:
+            return None
+        if not all(os.path.exists(path) for path in _output_paths(entry["result"])):
+            return None
+        return entry["result"]
+
+    # ======================
+    # Execution
+    # ======================
+    def _run_stage(self, stage, state):
+        """Worker: returns (status, result, seconds)."""
+        start = time.perf_counter()
+        fingerprint = self._fingerprint(stage)
+
+        cached = self._cached_result(stage, state, fingerprint)
+        if cached is not None:
+            print(f"⏭️  {stage.description} - unchanged, reusing previous output")
+            return CACHED, cached, time.perf_counter() - start, fingerprint
+
+        print(f"▶️  {stage.description}")
+        result = stage.func(*[self.results[dep] for dep in stage.deps])
+        return RAN, result, time.perf_counter() - start, fingerprint
+
+    def run(self, workers=None):
+        """
+        Run every stage once its dependencies succeeded.
+
+        Args:
+            workers (int): Concurrent stages (default: number of stages)
+
+        Returns:
+            dict: stage name -> result (failed/skipped stages absent)
+        """
+        state = self._load_state()
+        pending = dict(self.stages)
+        running = {}
+        stop = False
+        self.results, self.report = {}, []
+        outcome = {}
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=workers or max(len(self.stages), 1)) as pool:
+            while pending or running:
+                # Dependents of failed/skipped stages can never run
+                for name, stage in list(pending.items()):
+                    if any(outcome.get(dep) in (FAILED, SKIPPED) for dep in stage.deps) or stop:
+                        outcome[name] = SKIPPED
+                        self.report.append({"stage": name, "status": SKIPPED, "seconds": 0.0})
+                        del pending[name]
+
+                for name, stage in list(pending.items()):
+                    if all(outcome.get(dep) in (RAN, CACHED) for dep in stage.deps):
+                        running[pool.submit(self._run_stage, stage, state)] = stage
+                        del pending[name]
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        status, result, seconds, fingerprint = future.result()
+                    except Exception as e:
+                        print(f"❌ {stage.description} - FAILED: {e}")
+                        outcome[stage.name] = FAILED
+                        self.report.append({"stage": stage.name, "status": FAILED,
+                                            "seconds": 0.0, "error": str(e)})
+                        stop = stop or stage.required
+                        continue
+
+                    outcome[stage.name] = status
+                    self.results[stage.name] = result
+                    self.report.append({"stage": stage.name, "status": status, "seconds": seconds})
+                    if stage.cache and status == RAN:
+                        state[stage.name] = {"fingerprint": fingerprint, "result": result}
+                    print(f"✅ {stage.description} - {'CACHED' if status == CACHED else 'COMPLETED'} "
+                          f"({seconds:.2f}s)")
+
+        self.elapsed = time.perf_counter() - started
+        if self.use_cache:
+            self._save_state(state)
+        return self.results
+
+    def print_timings(self):
+        """Per-stage status and wall-clock time of the last run."""
+        print(f"\n{'Stage':<22}{'Status':<10}{'Seconds':>9}")
+        print("-" * 41)
+        for row in self.report:
+            print(f"{row['stage']:<22}{row['status']:<10}{row['seconds']:>9.2f}")
+        print("-" * 41)
+        print(f"{'Total (wall clock)':<32}{self.elapsed:>9.2f}")
@@ -12,7 +12,9 @@ PURPOSE:
 WORKFLOW:
     1. Accept 30 days of historical emission records
     2. Load trained model (industry_xgboost_final.pkl)
-    3. Generate recursive predictions (estimated=1)
+    3. Generate recursive predictions (estimated=1), or reuse a cached
+       forecast for the same input window, growth rate and model
+       (a 30-day request reuses the first 30 days of a 180-day one)
     4. Save predictions to CSV
     5. Generate comparison visualization
     
@@ -30,6 +32,10 @@ import os
 import argparse
 from datetime import datetime, timedelta
 
+from summary_cube import DEFAULT_ORG, record_forecast
+from prediction_index import PredictionIndex, file_checksum
+from forecast_cache import ForecastCache
+
 
 class IndustryEmissionPredictor:
     """
@@ -57,6 +63,8 @@ class IndustryEmissionPredictor:
             )
         
         self.model = joblib.load(model_path)
+        self.model_path = model_path
+        self.model_version = file_checksum(model_path)
         print(f"✅ Model loaded from: {model_path}")
     
     
@@ -209,13 +217,51 @@ class IndustryEmissionPredictor:
         return pd.DataFrame(predictions)
     
     
-    def save_predictions(self, predictions_df, output_path=None):
+    def forecast(self, historical_df, forecast_days=30, growth_rate=0.02, cache=None):
+        """
+        predict_next_days() through the forecast cache.
+        
+        Args:
+            historical_df (pd.DataFrame): Last 30 days of actual data
+            forecast_days (int): Number of days to predict
+            growth_rate (float): Weekly growth rate
+            cache (ForecastCache): Cache to use (None = always compute)
+            
+        Returns:
+            tuple: (predictions_df, cache_key, was_cached)
+        """
+        if cache is None:
+            return self.predict_next_days(historical_df, forecast_days, growth_rate), None, False
+        
+        self.validate_input_data(historical_df)
+        key = cache.key(historical_df, growth_rate, self.model_version)
+        
+        cached = cache.get(key, forecast_days)
+        if cached is not None:
+            print(f"\n⚡ Reusing cached forecast ({forecast_days} of "
+                  f"{cache.cached_horizon(key)} days, key {key[:12]})")
+            return cached, key, True
+        
+        predictions = self.predict_next_days(historical_df, forecast_days, growth_rate)
+        cache.put(key, predictions)
+        return predictions, key, False
+    
+    
+    def save_predictions(self, predictions_df, output_path=None, organization=DEFAULT_ORG,
+                         growth_rate=None, forecast_key=None):
         """
         Save predictions to CSV in industry_model/predictions/.
         
+        Also folds the forecast into the summary cube
+        (predictions/summary_cube.json) and registers the file in the
+        prediction index (predictions/prediction_index.db).
+        
         Args:
             predictions_df (pd.DataFrame): Prediction results
             output_path (str): Optional custom output path
+            organization (str): Organization the forecast belongs to
+            growth_rate (float): Weekly growth rate used for the forecast
+            forecast_key (str): forecast_cache key of the forecast
             
         Returns:
             str: Path where file was saved
@@ -231,6 +277,17 @@ class IndustryEmissionPredictor:
         predictions_df.to_csv(output_path, index=False)
         print(f"\n💾 Predictions saved to: {output_path}")
         
+        record_forecast(predictions_df, organization, source=output_path)
+        
+        with PredictionIndex() as index:
+            index.register(
+                output_path, predictions_df,
+                organization=organization,
+                growth_rate=growth_rate,
+                model_version=self.model_version,
+                forecast_key=forecast_key
+            )
+        
         return output_path
 
 
@@ -291,6 +348,19 @@ def main():
         help='Weekly growth rate (default: 0.02 = 2%%)'
     )
     
+    parser.add_argument(
+        '--org',
+        type=str,
+        default=DEFAULT_ORG,
+        help='Organization id the forecast is recorded under'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always recompute the forecast (skip the forecast cache)'
+    )
+    
     args = parser.parse_args()
     
     print("\n" + "="*60)
@@ -321,15 +391,28 @@ def main():
     # Initialize predictor
     predictor = IndustryEmissionPredictor()
     
-    # Generate predictions
-    predictions = predictor.predict_next_days(
+    # Generate predictions (or reuse an identical cached forecast)
+    predictions, forecast_key, was_cached = predictor.forecast(
         historical_df,
         forecast_days=args.days,
-        growth_rate=args.growth
+        growth_rate=args.growth,
+        cache=None if args.no_cache else ForecastCache()
     )
     
-    # Save results
-    output_path = predictor.save_predictions(predictions)
+    # Identical request already saved: point at that file instead of a new copy
+    existing = None
+    if was_cached:
+        with PredictionIndex() as index:
+            existing = index.find(forecast_key, args.days, organization=args.org)
+    
+    if existing:
+        output_path = existing['path']
+        print(f"\n💾 Identical forecast already saved: {output_path}")
+    else:
+        output_path = predictor.save_predictions(
+            predictions, organization=args.org,
+            growth_rate=args.growth, forecast_key=forecast_key
+        )
     
     print("\n" + "="*60)
     print("✅ PREDICTION COMPLETE")
@@ -0,0 +1,329 @@
+"""
+============================================================
+INDUSTRY CARBON EMISSION - PREDICTION ARTIFACT INDEX
+============================================================
+
+PURPOSE:
+    Manifest of every forecast CSV written to predictions/, kept in
+    an embedded SQLite database (predictions/prediction_index.db).
+
+    Each artifact row records:
+        organization, horizon (days), growth_rate, model_version,
+        created_at, row_count, min/max/total CO₂, path
+
+    "Latest forecast for this org" and date-range queries become
+    indexed lookups instead of os.listdir + filename sorting +
+    opening every CSV.
+
+USAGE:
+    python prediction_index.py                    # List latest per org
+    python prediction_index.py --backfill         # Index existing CSVs
+    python prediction_index.py --org acme --since 2026-01-01
+============================================================
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+PREDICTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "predictions")
+INDEX_PATH = os.path.join(PREDICTIONS_DIR, "prediction_index.db")
+
+DEFAULT_ORG = "default"
+FORECAST_FILE = re.compile(r"^predicted_emissions_(\d+)days_(\d{8}_\d{6})\.csv$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    organization  TEXT    NOT NULL,
+    horizon       INTEGER NOT NULL,
+    growth_rate   REAL,
+    model_version TEXT,
+    created_at    TEXT    NOT NULL,   -- ISO 8601, sorts chronologically
+    row_count     INTEGER NOT NULL,
+    min_co2       REAL,
+    max_co2       REAL,
+    total_co2     REAL,
+    path          TEXT    NOT NULL UNIQUE,
+    forecast_key  TEXT                -- forecast_cache key, NULL if unknown
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_org_created
+    ON predictions (organization, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_predictions_org_horizon_created
+    ON predictions (organization, horizon, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_predictions_created
+    ON predictions (created_at);
+"""
+
+# Columns added after the first release: (name, type)
+MIGRATIONS = [
+    ("forecast_key", "TEXT"),
+]
+
+
+def file_checksum(path, length=12):
+    """Short SHA-256 of a file (used as the model version)."""
+    if not path or not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:length]
+
+
+class PredictionIndex:
+    """
+    SQLite-backed manifest of prediction artifacts.
+
+    Args:
+        path (str): Index database
+        backfill (bool): Index the forecast CSVs already in the
+            database's directory. Default: only when the database is
+            being created (first run after an upgrade), whichever
+            reader or writer opens it first; afterwards every forecast
+            is registered as it is written, so opening never lists
+            predictions/ (use --backfill for files copied in by hand)
+    """
+
+    def __init__(self, path=INDEX_PATH, backfill=None):
+        self.path = path
+        if backfill is None:
+            backfill = not os.path.exists(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        if backfill:
+            self.backfill(os.path.dirname(path) or ".")
+
+    def _migrate(self):
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(predictions)")}
+        with self.conn:
+            for name, sql_type in MIGRATIONS:
+                if name not in columns:
+                    self.conn.execute(f"ALTER TABLE predictions ADD COLUMN {name} {sql_type}")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_predictions_forecast_key "
+                "ON predictions (forecast_key, horizon)"
+            )
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ======================
+    # Writes
+    # ======================
+    def register(self, path, predictions_df, organization=DEFAULT_ORG,
+                 horizon=None, growth_rate=None, model_version=None,
+                 created_at=None, forecast_key=None, value_col="predicted_co2_kg"):
+        """
+        Add (or replace) the index row for one forecast file.
+
+        Args:
+            path (str): CSV path of the forecast
+            predictions_df (pd.DataFrame): The forecast that was written
+            organization (str): Organization id
+            horizon (int): Forecast days (default: row count)
+            growth_rate (float): Weekly growth rate used
+            model_version (str): Model checksum used
+            created_at (datetime): Creation time (default: now)
+            forecast_key (str): forecast_cache key of the forecast
+
+        Returns:
+            int: Row id
+        """
+        values = pd.to_numeric(predictions_df[value_col], errors="coerce")
+        created_at = created_at or datetime.now()
+
+        with self.conn:
+            cursor = self.conn.execute(
+                """
+                INSERT OR REPLACE INTO predictions (
+                    organization, horizon, growth_rate, model_version, created_at,
+                    row_count, min_co2, max_co2, total_co2, path, forecast_key
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    str(organization),
+                    int(horizon if horizon is not None else len(predictions_df)),
+                    growth_rate,
+                    model_version,
+                    pd.Timestamp(created_at).isoformat(timespec="seconds"),
+                    int(len(predictions_df)),
+                    float(values.min()) if len(values) else None,
+                    float(values.max()) if len(values) else None,
+                    float(values.sum()) if len(values) else None,
+                    os.path.abspath(path),
+                    forecast_key,
+                )
+            )
+        return cursor.lastrowid
+
+    def backfill(self, predictions_dir=PREDICTIONS_DIR):
+        """
+        Index forecast CSVs written before the index existed.
+
+        Horizon and creation time come from the filename
+        (predicted_emissions_<days>days_<YYYYmmdd_HHMMSS>.csv).
+
+        Returns:
+            int: Files added
+        """
+        if not os.path.exists(predictions_dir):
+            return 0
+
+        known = {row["path"] for row in self.conn.execute("SELECT path FROM predictions")}
+        added = 0
+        for name in sorted(os.listdir(predictions_dir)):
+            match = FORECAST_FILE.match(name)
+            path = os.path.abspath(os.path.join(predictions_dir, name))
+            if not match or path in known:
+                continue
+            df = pd.read_csv(path, usecols=["predicted_co2_kg"])
+            self.register(
+                path, df, horizon=int(match.group(1)),
+                created_at=datetime.strptime(match.group(2), "%Y%m%d_%H%M%S")
+            )
+            added += 1
+        return added
+
+    def prune_missing(self):
+        """Drop rows whose file no longer exists. Returns rows removed."""
+        missing = [
+            (row["path"],) for row in self.conn.execute("SELECT path FROM predictions")
+            if not os.path.exists(row["path"])
+        ]
+        with self.conn:
+            self.conn.executemany("DELETE FROM predictions WHERE path = ?", missing)
+        return len(missing)
+
+    # ======================
+    # Queries
+    # ======================
+    def latest(self, organization=DEFAULT_ORG, horizon=None):
+        """Most recent forecast for an org (optionally one horizon), or None."""
+        query = "SELECT * FROM predictions WHERE organization = ?"
+        params = [str(organization)]
+        if horizon is not None:
+            query += " AND horizon = ?"
+            params.append(int(horizon))
+        query += " ORDER BY created_at DESC, id DESC LIMIT 1"
+        row = self.conn.execute(query, params).fetchone()
+        return dict(row) if row else None
+
+    def find(self, forecast_key, horizon, organization=None):
+        """Newest existing file holding this exact forecast, or None."""
+        query = "SELECT * FROM predictions WHERE forecast_key = ? AND horizon = ?"
+        params = [forecast_key, int(horizon)]
+        if organization is not None:
+            query += " AND organization = ?"
+            params.append(str(organization))
+        query += " ORDER BY created_at DESC, id DESC"
+        for row in self.conn.execute(query, params):
+            if os.path.exists(row["path"]):
+                return dict(row)
+        return None
+
+    def latest_per_org(self, horizon=None):
+        """Most recent forecast of every organization."""
+        where = "WHERE horizon = ?" if horizon is not None else ""
+        params = [int(horizon)] if horizon is not None else []
+        rows = self.conn.execute(
+            f"""
+            SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY organization ORDER BY created_at DESC, id DESC
+                ) AS rank
+                FROM predictions {where}
+            ) WHERE rank = 1
+            ORDER BY organization
+            """,
+            params
+        ).fetchall()
+        return [{k: row[k] for k in row.keys() if k != "rank"} for row in rows]
+
+    def between(self, start=None, end=None, organization=None, limit=None):
+        """Forecasts created in [start, end), newest first."""
+        clauses, params = [], []
+        if organization is not None:
+            clauses.append("organization = ?")
+            params.append(str(organization))
+        if start is not None:
+            clauses.append("created_at >= ?")
+            params.append(pd.Timestamp(start).isoformat(timespec="seconds"))
+        if end is not None:
+            clauses.append("created_at < ?")
+            params.append(pd.Timestamp(end).isoformat(timespec="seconds"))
+
+        query = "SELECT * FROM predictions"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+
+def open_index(path=INDEX_PATH, backfill=None):
+    """Open the index (see PredictionIndex for when it backfills)."""
+    return PredictionIndex(path, backfill=backfill)
+
+
+def print_artifact(row, prefix="   "):
+    """One-line description of an index row."""
+    growth = f"{row['growth_rate'] * 100:.1f}%/wk" if row["growth_rate"] is not None else "n/a"
+    print(f"{prefix}📄 {os.path.basename(row['path'])}")
+    print(f"{prefix}   {row['organization']} | {row['horizon']} days | growth {growth} | "
+          f"created {row['created_at']}")
+    if row["min_co2"] is not None:
+        print(f"{prefix}   CO2 range: {row['min_co2']:.2f} - {row['max_co2']:.2f} kg | "
+              f"total {row['total_co2'] / 1000:.2f} tons")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prediction artifact index")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Index existing predictions/*.csv files")
+    parser.add_argument("--prune", action="store_true",
+                        help="Remove rows whose file was deleted")
+    parser.add_argument("--org", default=None, help="Only this organization")
+    parser.add_argument("--since", default=None, help="Created on/after (YYYY-MM-DD)")
+    parser.add_argument("--until", default=None, help="Created before (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    with PredictionIndex(backfill=False if args.backfill else None) as index:
+        if args.backfill:
+            print(f"➕ Indexed {index.backfill()} existing forecast file(s)")
+        if args.prune:
+            print(f"🗑️  Removed {index.prune_missing()} missing file(s)")
+
+        if args.org or args.since or args.until:
+            rows = index.between(args.since, args.until, args.org)
+            print(f"\n📁 {len(rows)} forecast(s) found")
+        else:
+            rows = index.latest_per_org()
+            print(f"\n📁 Latest forecast per organization ({index.count()} indexed)")
+
+        for row in rows:
+            print_artifact(row)
+
+
+if __name__ == "__main__":
+    main()
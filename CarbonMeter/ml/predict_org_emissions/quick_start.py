@@ -5,118 +5,182 @@ QUICK START SCRIPT - Industry Emission Prediction Pipeline
 
 This script demonstrates the complete workflow in one execution:
 1. Generate sample input template
-2. Run 30-day predictions
-3. Run 180-day predictions  
+2. Run 180-day predictions
+3. Run 30-day predictions
 4. Generate all visualizations
 
+All steps run in this one process (see pipeline.py): the model and
+data are loaded once, the two forecasts and the two charts run
+concurrently, and steps whose inputs did not change since the last
+run are skipped. Use --force to rerun everything.
+
 Perfect for first-time users and demonstrations.
 ============================================================
 """
 
-import subprocess
-import sys
+import argparse
+import threading
 import os
+from datetime import date
 
-def run_command(description, command):
-    """Execute a command and handle errors."""
-    print("\n" + "="*70)
-    print(f"▶️  {description}")
-    print("="*70)
+import pandas as pd
+
+from prediction_index import open_index, print_artifact, file_checksum
+from pipeline import Pipeline, RAN, CACHED
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "industry_emission_10k.csv")
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "industry_xgboost_final.pkl")
+
+
+class SharedResources:
+    """Model and locks shared by all stages of one run."""
     
-    try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            check=True,
-            capture_output=False,
-            text=True
+    def __init__(self, growth_rate=0.02):
+        self.growth_rate = growth_rate
+        self._predictor = None
+        self._model_lock = threading.Lock()
+        # summary_cube.json is read-modify-write: one save at a time
+        self.save_lock = threading.Lock()
+        # matplotlib style contexts change global rcParams
+        self.render_lock = threading.Lock()
+    
+    @property
+    def predictor(self):
+        """Model is unpickled once, by the first forecast that needs it."""
+        with self._model_lock:
+            if self._predictor is None:
+                from predict_future_emissions import IndustryEmissionPredictor
+                self._predictor = IndustryEmissionPredictor(MODEL_PATH)
+            return self._predictor
+
+
+def build_pipeline(shared, use_cache=True):
+    """Quick start workflow as a stage DAG."""
+    from generate_input_template import generate_template, build_template
+    
+    def load_history():
+        # Same input as predict_future_emissions.py without --input
+        if os.path.exists(DATA_PATH):
+            return pd.read_csv(DATA_PATH).tail(30).reset_index(drop=True)
+        return build_template()
+    
+    def forecast(days):
+        def run(historical_df, *after):
+            # after: earlier forecasts (ordering only, see below)
+            from forecast_cache import ForecastCache
+            from prediction_index import PredictionIndex
+            
+            predictor = shared.predictor
+            predictions, key, was_cached = predictor.forecast(
+                historical_df, days, shared.growth_rate, cache=ForecastCache()
+            )
+            with shared.save_lock:
+                if was_cached:
+                    with PredictionIndex() as index:
+                        existing = index.find(key, days)
+                    if existing:
+                        return existing['path']
+                return predictor.save_predictions(
+                    predictions, growth_rate=shared.growth_rate, forecast_key=key
+                )
+        return run
+    
+    def chart(dashboard):
+        def run(historical_df, predicted_path):
+            from visualize_predictions import EmissionVisualizer
+            
+            predicted_df = pd.read_csv(predicted_path)
+            visualizer = EmissionVisualizer(headless=True)
+            with shared.render_lock:
+                if dashboard:
+                    return visualizer.plot_statistical_summary(historical_df, predicted_df)
+                return visualizer.plot_comparison(historical_df, predicted_df)
+        return run
+    
+    model_version = file_checksum(MODEL_PATH)
+    pipeline = Pipeline(use_cache=use_cache)
+    pipeline.add(
+        "template", generate_template,
+        params={"date": date.today().isoformat()}, required=False,
+        description="Step 1: Generate Sample Input Template"
+    )
+    pipeline.add(
+        "history", load_history, cache=False,
+        description="Load 30-day historical window"
+    )
+    # The 30-day forecast runs after the 180-day one: it is then served
+    # from the cached 180-day forecast instead of racing it
+    for days, label, after in ((180, "Step 2: Run 180-Day Prediction (6 months)", []),
+                               (30, "Step 3: Run 30-Day Prediction", ["forecast_180"])):
+        pipeline.add(
+            f"forecast_{days}", forecast(days), deps=["history"] + after,
+            params={"days": days, "growth": shared.growth_rate, "model": model_version},
+            description=label
         )
-        print(f"✅ {description} - COMPLETED")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ {description} - FAILED")
-        print(f"Error: {e}")
-        return False
+    pipeline.add(
+        "comparison_chart", chart(dashboard=False), deps=["history", "forecast_30"],
+        description="Step 4: Generate Basic Comparison Visualization"
+    )
+    pipeline.add(
+        "dashboard", chart(dashboard=True), deps=["history", "forecast_180"],
+        required=False, description="Step 5: Generate Statistical Dashboard"
+    )
+    return pipeline
+
 
 def main():
     """Execute complete pipeline demonstration."""
+    parser = argparse.ArgumentParser(description="Run the complete prediction pipeline")
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Stages run concurrently (default: all ready stages)')
+    parser.add_argument('--force', action='store_true',
+                        help='Rerun every stage, ignoring cached stage outputs')
+    parser.add_argument('--growth', type=float, default=0.02,
+                        help='Weekly growth rate (default: 0.02 = 2%%)')
+    args = parser.parse_args()
     
     print("\n" + "🚀"*35)
     print("INDUSTRY CARBON EMISSION PREDICTION PIPELINE")
     print("COMPLETE DEMONSTRATION & QUICK START")
-    print("🚀"*35)
+    print("🚀"*35 + "\n")
     
-    # Get Python executable path
-    python_exe = sys.executable
     base_path = os.path.dirname(__file__)
     
-    steps = [
-        {
-            "description": "Step 1: Generate Sample Input Template",
-            "command": f'"{python_exe}" "{os.path.join(base_path, "generate_input_template.py")}"',
-            "required": False
-        },
-        {
-            "description": "Step 2: Run 30-Day Prediction",
-            "command": f'"{python_exe}" "{os.path.join(base_path, "predict_future_emissions.py")}" --days 30',
-            "required": True
-        },
-        {
-            "description": "Step 3: Run 180-Day Prediction (6 months)",
-            "command": f'"{python_exe}" "{os.path.join(base_path, "predict_future_emissions.py")}" --days 180',
-            "required": True
-        },
-        {
-            "description": "Step 4: Generate Basic Comparison Visualization",
-            "command": f'"{python_exe}" "{os.path.join(base_path, "visualize_predictions.py")}"',
-            "required": True
-        },
-        {
-            "description": "Step 5: Generate Statistical Dashboard",
-            "command": f'"{python_exe}" "{os.path.join(base_path, "visualize_predictions.py")}" --dashboard',
-            "required": False
-        }
-    ]
-    
-    # Execute all steps
-    results = []
-    for step in steps:
-        success = run_command(step["description"], step["command"])
-        results.append(success)
-        
-        if not success and step["required"]:
-            print("\n❌ Critical step failed. Stopping pipeline.")
-            break
+    pipeline = build_pipeline(SharedResources(args.growth), use_cache=not args.force)
+    pipeline.run(workers=args.workers)
     
     # Summary
     print("\n" + "="*70)
     print("📊 PIPELINE EXECUTION SUMMARY")
     print("="*70)
     
-    for i, (step, success) in enumerate(zip(steps, results), 1):
-        status = "✅ SUCCESS" if success else "❌ FAILED"
-        print(f"{i}. {step['description']}: {status}")
+    statuses = {row['stage']: row['status'] for row in pipeline.report}
+    for i, stage in enumerate(pipeline.stages.values(), 1):
+        status = statuses.get(stage.name)
+        label = "✅ SUCCESS" if status == RAN else "⏭️  UNCHANGED" if status == CACHED else f"❌ {str(status).upper()}"
+        print(f"{i}. {stage.description}: {label}")
+    
+    pipeline.print_timings()
     
-    total_success = sum(results)
-    total_steps = len(steps)
+    total_success = sum(status in (RAN, CACHED) for status in statuses.values())
+    total_steps = len(pipeline.stages)
     
     print("\n" + "="*70)
     print(f"Completed: {total_success}/{total_steps} steps")
     print("="*70)
     
     # Output locations
-    if sum(results) >= 3:  # At least predictions ran
+    if 'forecast_30' in pipeline.results:  # At least predictions ran
         print("\n📁 OUTPUT FILES:")
         print("-" * 70)
         
-        # List prediction files
-        predictions_dir = os.path.join(base_path, 'predictions')
-        if os.path.exists(predictions_dir):
-            pred_files = [f for f in os.listdir(predictions_dir) 
-                          if f.startswith('predicted_emissions_') and f.endswith('.csv')]
+        # List prediction files (latest 3 from the prediction index)
+        with open_index() as index:
+            latest = index.between(limit=3)
+        if latest:
             print(f"  📁 predictions/")
-            for f in sorted(pred_files, reverse=True)[:3]:  # Show latest 3
-                print(f"    📄 {f}")
+            for row in latest:
+                print_artifact(row, prefix="    ")
         
         # List visualization files
         repr_path = os.path.join(base_path, 'representation')
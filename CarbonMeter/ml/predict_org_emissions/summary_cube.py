@@ -0,0 +1,539 @@
+"""
+============================================================
+INDUSTRY CARBON EMISSION - PREDICTION SUMMARY CUBE
+============================================================
+
+PURPOSE:
+    Maintain prediction statistics incrementally, per
+    (organization, horizon, period), as forecasts are written, so the
+    dashboard and viewers read a stored summary instead of rescanning
+    every prediction CSV.
+
+    Each cell holds mergeable statistics:
+    - count, total, min, max
+    - mean and variance (Welford / Chan parallel update)
+    - a quantile sketch for median and percentiles (relative-error
+      log buckets, DDSketch style: merging two sketches is adding
+      bucket counts, and every quantile is within SKETCH_ACCURACY)
+
+    Cells merge exactly, so "all periods" or "all horizons" summaries
+    are cheap roll-ups of stored cells.
+
+STORAGE:
+    predictions/summary_cube.json (rewritten atomically): the cells,
+    plus the names of the forecast CSVs already summarised, so a
+    backfill only folds in files the cube has not seen (forecasts
+    written before the cube existed)
+
+    record_forecast() folds forecasts into an in-process buffer
+    behind a lock; a flush merges the buffered cells into the stored
+    cube under a file lock (fcntl, where available) and writes it
+    through a per-writer temp file. Scripts flush on every call; the
+    API passes flush=False and the buffer is flushed every
+    SUMMARY_CUBE_FLUSH_SECONDS (default 5) and at exit, so a request
+    never reads or rewrites the whole cube.
+
+USAGE:
+    python summary_cube.py                 # Show stored summaries
+    python summary_cube.py --rebuild       # Fold in unsummarised predictions/*.csv
+============================================================
+"""
+
+import argparse
+import atexit
+import contextlib
+import json
+import math
+import os
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: the in-process lock still serialises saves
+    fcntl = None
+
+PREDICTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "predictions")
+CUBE_PATH = os.path.join(PREDICTIONS_DIR, "summary_cube.json")
+
+DEFAULT_ORG = "default"
+ALL = "*"                    # wildcard for roll-ups
+SKETCH_ACCURACY = 0.01       # relative error of sketch quantiles
+FLUSH_SECONDS_ENV = "SUMMARY_CUBE_FLUSH_SECONDS"
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative accuracy.
+
+    A positive value x lands in bucket ceil(log_gamma(x)); every value
+    in a bucket is within `accuracy` of the bucket's representative.
+    Negative values use a mirrored store, zeros are counted apart.
+    """
+
+    def __init__(self, accuracy=SKETCH_ACCURACY):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = Counter()
+        self.negative = Counter()
+        self.zeros = 0
+
+    @property
+    def count(self):
+        return sum(self.positive.values()) + sum(self.negative.values()) + self.zeros
+
+    def add(self, values):
+        """Add an array of values."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+
+        for store, part in ((self.positive, values[values > 0]),
+                            (self.negative, -values[values < 0])):
+            if len(part):
+                keys, counts = np.unique(
+                    np.ceil(np.log(part) / self._log_gamma).astype(np.int64),
+                    return_counts=True
+                )
+                store.update(dict(zip(keys.tolist(), counts.tolist())))
+        self.zeros += int((values == 0).sum())
+
+    def merge(self, other):
+        if other.accuracy != self.accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zeros += other.zeros
+        return self
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1), None when empty."""
+        total = self.count
+        if total == 0:
+            return None
+
+        rank = q * (total - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):    # most negative first
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def to_dict(self):
+        return {
+            "accuracy": self.accuracy,
+            "positive": {str(k): v for k, v in self.positive.items()},
+            "negative": {str(k): v for k, v in self.negative.items()},
+            "zeros": self.zeros,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data.get("accuracy", SKETCH_ACCURACY))
+        sketch.positive = Counter({int(k): v for k, v in data.get("positive", {}).items()})
+        sketch.negative = Counter({int(k): v for k, v in data.get("negative", {}).items()})
+        sketch.zeros = data.get("zeros", 0)
+        return sketch
+
+
+class RunningStats:
+    """Mergeable count / mean / variance / min / max / total + sketch."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.total = 0.0
+        self.sketch = QuantileSketch()
+
+    def add(self, values):
+        """Add an array of values (one batch update, not per value)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        batch.total = float(values.sum())
+        batch.sketch.add(values)
+        return self.merge(batch)
+
+    def merge(self, other):
+        """Chan et al. parallel combination of two summaries."""
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.total += other.total
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def std(self):
+        """Population standard deviation (same as np.std)."""
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+    def quantile(self, q):
+        """Sketch quantile, clamped to the exact min/max."""
+        value = self.sketch.quantile(q)
+        return None if value is None else min(max(value, self.min), self.max)
+
+    def as_dict(self):
+        """Summary as shown in the dashboard's statistics table."""
+        if self.count == 0:
+            return None
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 2),
+            "median": round(self.quantile(0.5), 2),
+            "p10": round(self.quantile(0.1), 2),
+            "p90": round(self.quantile(0.9), 2),
+            "std": round(self.std, 2),
+            "min": round(self.min, 2),
+            "max": round(self.max, 2),
+            "total": round(self.total, 2),
+        }
+
+    def to_dict(self):
+        return {
+            "count": self.count, "mean": self.mean, "m2": self.m2,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "total": self.total, "sketch": self.sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data["count"]
+        stats.mean = data["mean"]
+        stats.m2 = data["m2"]
+        stats.min = data["min"] if data["min"] is not None else math.inf
+        stats.max = data["max"] if data["max"] is not None else -math.inf
+        stats.total = data["total"]
+        stats.sketch = QuantileSketch.from_dict(data["sketch"])
+        return stats
+
+
+def forecast_periods(predictions_df, created_at=None):
+    """
+    Month (YYYY-MM) each predicted day falls in.
+
+    Uses date + day_ahead when the forecast carries its base date,
+    otherwise the month the forecast was created.
+    """
+    if "date" in predictions_df.columns and "day_ahead" in predictions_df.columns:
+        base = pd.to_datetime(predictions_df["date"], format="mixed", errors="coerce")
+        days = pd.to_timedelta(pd.to_numeric(predictions_df["day_ahead"], errors="coerce"), unit="D")
+        periods = (base + days).dt.strftime("%Y-%m")
+        if periods.notna().all():
+            return periods.to_numpy()
+
+    created_at = pd.Timestamp(created_at) if created_at is not None else pd.Timestamp.now()
+    return np.full(len(predictions_df), created_at.strftime("%Y-%m"), dtype=object)
+
+
+class SummaryCube:
+    """RunningStats per (organization, horizon, period)."""
+
+    def __init__(self, path=CUBE_PATH):
+        self.path = path
+        self.cells = {}
+        self.sources = set()   # forecast CSV names already summarised
+
+    def record(self, organization, horizon, values, periods):
+        """
+        Fold one forecast's predicted values into its cells.
+
+        Args:
+            organization (str): Organization id
+            horizon (int): Forecast length in days
+            values: Predicted CO₂ per day
+            periods: Period label per day (see forecast_periods)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        periods = np.asarray(periods, dtype=object)
+        for period in pd.unique(periods):
+            key = (str(organization), int(horizon), str(period))
+            cell = self.cells.setdefault(key, RunningStats())
+            cell.add(values[periods == period])
+
+    def record_predictions(self, predictions_df, organization=DEFAULT_ORG,
+                           horizon=None, created_at=None,
+                           value_col="predicted_co2_kg", source=None):
+        """
+        Record a predictions DataFrame as written by save_predictions().
+
+        Args:
+            source (str): CSV file the forecast was saved to, if any
+        """
+        horizon = len(predictions_df) if horizon is None else horizon
+        self.record(
+            organization, horizon,
+            pd.to_numeric(predictions_df[value_col], errors="coerce").to_numpy(),
+            forecast_periods(predictions_df, created_at)
+        )
+        if source:
+            self.sources.add(os.path.basename(source))
+
+    def merge(self, other):
+        """
+        Fold another cube's cells into this one.
+
+        A cube made only of forecast files this one has already
+        summarised (a writer racing a backfill) is skipped.
+        """
+        if other.sources and other.sources <= self.sources:
+            return self
+        for key, cell in other.cells.items():
+            self.cells.setdefault(key, RunningStats()).merge(cell)
+        self.sources |= other.sources
+        return self
+
+    def _matching(self, organization=ALL, horizon=ALL, period=ALL):
+        for (org, hz, per), cell in self.cells.items():
+            if ((organization == ALL or org == str(organization))
+                    and (horizon == ALL or hz == int(horizon))
+                    and (period == ALL or per == str(period))):
+                yield (org, hz, per), cell
+
+    def summary(self, organization=ALL, horizon=ALL, period=ALL):
+        """Merged RunningStats over the matching cells (ALL = any)."""
+        merged = RunningStats()
+        for _, cell in self._matching(organization, horizon, period):
+            merged.merge(cell)
+        return merged
+
+    def cumulative(self, organization=ALL, horizon=ALL):
+        """Cumulative total per period, in period order."""
+        totals = {}
+        for (_, _, period), cell in self._matching(organization, horizon):
+            totals[period] = totals.get(period, 0.0) + cell.total
+        running = np.cumsum([totals[p] for p in sorted(totals)])
+        return list(zip(sorted(totals), np.round(running, 2).tolist()))
+
+    def groups(self):
+        """Distinct (organization, horizon) pairs."""
+        return sorted({(org, hz) for (org, hz, _), _ in self._matching()})
+
+    def save(self, path=None):
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # One temp file per writer: concurrent saves never share it
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "sources": sorted(self.sources),
+                "cells": [
+                    {"organization": org, "horizon": hz, "period": per, **cell.to_dict()}
+                    for (org, hz, per), cell in self.cells.items()
+                ],
+            }, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=CUBE_PATH):
+        cube = cls(path)
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if isinstance(data, list):   # first format: cells only
+                data = {"cells": data}
+            cube.sources = set(data.get("sources", ()))
+            cube.cells = {
+                (cell["organization"], cell["horizon"], cell["period"]):
+                    RunningStats.from_dict(cell)
+                for cell in data["cells"]
+            }
+        return cube
+
+
+_save_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _locked(path):
+    """Exclusive access to the stored cube (threads and processes)."""
+    with _save_lock:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+
+class CubeWriter:
+    """
+    In-process buffer of recorded forecasts for one cube file.
+
+    Recording only touches the buffer; flush() merges it into the
+    stored cube (load + merge + save under the file lock), so
+    concurrent writers in any number of threads or workers add up
+    instead of overwriting each other.
+    """
+
+    def __init__(self, path=CUBE_PATH, interval=None):
+        self.path = path
+        self.interval = float(os.environ.get(FLUSH_SECONDS_ENV, 5) if interval is None else interval)
+        self._lock = threading.Lock()
+        self._pending = SummaryCube(path)
+        self._timer = None
+        atexit.register(self.flush)
+
+    def record(self, predictions_df, organization=DEFAULT_ORG, horizon=None,
+               created_at=None, value_col="predicted_co2_kg", flush=True, source=None):
+        with self._lock:
+            self._pending.record_predictions(predictions_df, organization, horizon,
+                                             created_at, value_col, source)
+            if not flush and self._timer is None:
+                self._timer = threading.Timer(self.interval, self._flush_in_background)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush:
+            self.flush()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"⚠ Failed to save summary cube: {e}")
+
+    def flush(self):
+        """
+        Merge the buffered cells into the stored cube.
+
+        Returns:
+            int: Cells flushed
+        """
+        with self._lock:
+            pending, self._pending = self._pending, SummaryCube(self.path)
+            self._timer = None
+        if not pending.cells:
+            return 0
+        try:
+            with _locked(self.path):
+                cube = SummaryCube.load(self.path).merge(pending)
+                cube.save()
+        except Exception:
+            with self._lock:  # keep the records for the next flush
+                self._pending = pending.merge(self._pending)
+            raise
+        return len(pending.cells)
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def cube_writer(path=CUBE_PATH):
+    """The process's CubeWriter for a cube file."""
+    path = os.path.abspath(path)
+    with _writers_lock:
+        if path not in _writers:
+            _writers[path] = CubeWriter(path)
+        return _writers[path]
+
+
+def record_forecast(predictions_df, organization=DEFAULT_ORG, horizon=None,
+                    created_at=None, path=CUBE_PATH, value_col="predicted_co2_kg",
+                    flush=True, source=None):
+    """
+    Record one forecast in the cube.
+
+    Args:
+        flush (bool): Save now (scripts); False leaves it to the
+            periodic / at-exit flush (request handlers)
+        source (str): CSV the forecast was saved to, so rebuild()
+            does not count it a second time
+    """
+    cube_writer(path).record(predictions_df, organization, horizon, created_at,
+                             value_col, flush=flush, source=source)
+
+
+def rebuild(predictions_dir=PREDICTIONS_DIR, path=CUBE_PATH):
+    """
+    Fold every predicted_emissions_*.csv the cube has not summarised
+    yet into the stored cube.
+
+    Merges into what is stored (cells recorded by the API have no CSV
+    and are kept), so it is cheap to call whenever files may have been
+    written before the cube existed: only a directory listing when
+    nothing is new.
+
+    Returns:
+        SummaryCube: The stored cube, backfilled
+    """
+    with _locked(path):
+        cube = SummaryCube.load(path)
+        names = sorted(os.listdir(predictions_dir)) if os.path.isdir(predictions_dir) else []
+        added = 0
+        for name in names:
+            if (not (name.startswith("predicted_emissions_") and name.endswith(".csv"))
+                    or name in cube.sources):
+                continue
+            file_path = os.path.join(predictions_dir, name)
+            cube.record_predictions(
+                pd.read_csv(file_path),
+                created_at=pd.Timestamp(os.path.getmtime(file_path), unit="s"),
+                source=name
+            )
+            added += 1
+        if added:
+            cube.save()
+    return cube
+
+
+def print_summaries(cube):
+    """Print one line per (organization, horizon) roll-up."""
+    groups = cube.groups()
+    if not groups:
+        print("⚠️ Summary cube is empty. Run predict_future_emissions.py first")
+        return
+
+    for org, horizon in groups:
+        stats = cube.summary(org, horizon).as_dict()
+        print(f"\n🏭 {org} - {horizon}-day forecasts")
+        print(f"   - Days summarised: {stats['count']:,}")
+        print(f"   - Mean / median: {stats['mean']:.2f} / {stats['median']:.2f} kg")
+        print(f"   - CO2 range: {stats['min']:.2f} - {stats['max']:.2f} kg")
+        print(f"   - Total: {stats['total'] / 1000:.2f} tons")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prediction summary cube")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Fold in predictions/*.csv not summarised yet")
+    args = parser.parse_args()
+
+    cube = rebuild() if args.rebuild else SummaryCube.load()
+    print_summaries(cube)
+
+
+if __name__ == "__main__":
+    main()
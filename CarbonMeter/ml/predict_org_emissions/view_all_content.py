@@ -19,6 +19,9 @@ import os
 import glob
 from datetime import datetime
 
+from summary_cube import print_summaries, rebuild as rebuild_cube
+from prediction_index import open_index, print_artifact
+
 def print_header(title):
     """Print formatted section header"""
     print("\n" + "="*70)
@@ -38,19 +41,24 @@ def view_predictions():
     
     print(f"\n📁 Total prediction files: {len(csv_files)}")
     
-    for i, file in enumerate(csv_files[:3], 1):  # Show latest 3
-        print(f"\n{i}. {file}")
-        file_path = os.path.join(predictions_dir, file)
-        df = pd.read_csv(file_path)
-        
-        print(f"   - Rows: {len(df)}")
-        print(f"   - Forecast days: {len(df)}")
-        print(f"   - Estimated flag: {df['estimated'].unique()}")
-        print(f"   - CO2 range: {df['predicted_co2_kg'].min():.2f} - {df['predicted_co2_kg'].max():.2f} kg")
+    # Statistics come from the summary cube, not from rescanning every CSV;
+    # only files it has not summarised yet (older than the cube) are read
+    cube = rebuild_cube()
+    print_summaries(cube)
+    
+    with open_index() as index:
+        latest = index.latest_per_org()
+    
+    if latest:
+        print(f"\n🕒 Latest forecast per organization:")
+        for row in latest:
+            print_artifact(row)
         
-        if i == 1:  # Show sample of latest file
-            print(f"\n   📋 Sample data (first 5 rows):")
-            print(df[['day_ahead', 'predicted_co2_kg', 'estimated']].head(5).to_string(index=False))
+        newest = max(latest, key=lambda row: row['created_at'])
+        if os.path.exists(newest['path']):  # Show sample of latest file
+            df = pd.read_csv(newest['path'], nrows=5)
+            print(f"\n📋 Sample data from {os.path.basename(newest['path'])} (first 5 rows):")
+            print(df[['day_ahead', 'predicted_co2_kg', 'estimated']].to_string(index=False))
 
 def view_visualizations():
     """Display visualization files"""
@@ -18,18 +18,36 @@ FEATURES:
     
 USAGE:
     python visualize_predictions.py --historical data.csv --predicted predictions.csv
+    python visualize_predictions.py --headless --format svg --dpi 150
+    python visualize_predictions.py --batch --workers 4 --format webp
+
+HEADLESS MODE:
+    headless=True renders with the Agg canvas on object-oriented
+    Figures: no pyplot state, no plt.show(), figures are released as
+    soon as they are saved. Safe for servers, cron jobs and process
+    pools (see render_batch).
     
 ============================================================
 """
 
 import pandas as pd
-import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+import matplotlib.style as mplstyle
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import os
+import io
+import time
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from prediction_index import open_index
 from datetime import datetime, timedelta
 import numpy as np
 
+STYLE = 'seaborn-v0_8-darkgrid'
+FORMATS = ('png', 'svg', 'webp')
+
 
 class EmissionVisualizer:
     """
@@ -37,12 +55,16 @@ class EmissionVisualizer:
     Designed for judge-ready, industry-focused presentations.
     """
     
-    def __init__(self, output_dir=None):
+    def __init__(self, output_dir=None, headless=False, dpi=300, fmt='png', verbose=True):
         """
         Initialize visualizer with output directory.
         
         Args:
             output_dir (str): Directory to save graphs
+            headless (bool): Render with Agg only (no pyplot, no plt.show)
+            dpi (int): Resolution of saved figures
+            fmt (str): Output format: png, svg or webp
+            verbose (bool): Print progress lines
         """
         if output_dir is None:
             output_dir = os.path.join(
@@ -50,12 +72,89 @@ class EmissionVisualizer:
                 "representation"
             )
         
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format '{fmt}'. Use one of {FORMATS}")
+        
         self.output_dir = output_dir
+        self.headless = headless
+        self.dpi = dpi
+        self.fmt = fmt
+        self.verbose = verbose
         os.makedirs(self.output_dir, exist_ok=True)
         
-        # Set professional style
-        plt.style.use('seaborn-v0_8-darkgrid')
+    
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+    
+    
+    def _new_figure(self, figsize, nrows=1, ncols=1):
+        """
+        Create a figure and its axes.
+        
+        Headless figures are plain Figure objects on an Agg canvas, so
+        they never enter pyplot's global figure registry.
+        """
+        if self.headless:
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+            axes = fig.subplots(nrows, ncols)
+        else:
+            import matplotlib.pyplot as plt
+            fig, axes = plt.subplots(nrows, ncols, figsize=figsize)
+        return fig, axes
+    
+    
+    def _finish(self, fig, target, message=None):
+        """
+        Save a figure to a path or file object, then release it.
+        
+        Args:
+            fig (Figure): Figure to save
+            target (str or file-like): Output path or buffer
+            message (str): Printed once the figure is saved
+        """
+        fig.tight_layout()
+        fig.savefig(target, dpi=self.dpi, format=self.fmt, bbox_inches='tight')
+        if message:
+            self._log(message)
         
+        if self.headless:
+            fig.clear()
+        else:
+            import matplotlib.pyplot as plt
+            plt.show()
+            plt.close(fig)
+    
+    
+    def _output_path(self, filename, prefix):
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{prefix}_{timestamp}.{self.fmt}"
+        return os.path.join(self.output_dir, filename)
+    
+    
+    def render_bytes(self, chart, historical_df, predicted_df, **kwargs):
+        """
+        Render a chart in memory instead of to the representation folder.
+        
+        Args:
+            chart (str): 'comparison' or 'dashboard'
+            historical_df (pd.DataFrame): Historical data
+            predicted_df (pd.DataFrame): Predicted data
+            
+        Returns:
+            bytes: Encoded image in self.fmt
+        """
+        buffer = io.BytesIO()
+        if chart == 'comparison':
+            self.plot_comparison(historical_df, predicted_df, output=buffer, **kwargs)
+        elif chart == 'dashboard':
+            self.plot_statistical_summary(historical_df, predicted_df, output=buffer, **kwargs)
+        else:
+            raise ValueError(f"Unknown chart type '{chart}'")
+        return buffer.getvalue()
+    
     
     def prepare_timeline(self, historical_df, predicted_df):
         """
@@ -95,7 +194,9 @@ class EmissionVisualizer:
         historical_df, 
         predicted_df, 
         title="Historical vs Predicted Industrial Carbon Emissions",
-        filename=None
+        filename=None,
+        output=None,
+        figsize=(14, 6)
     ):
         """
         Generate main comparison visualization.
@@ -105,11 +206,13 @@ class EmissionVisualizer:
             predicted_df (pd.DataFrame): Predicted data (estimated=1)
             title (str): Graph title
             filename (str): Output filename
+            output (file-like): Write here instead of output_dir
+            figsize (tuple): Figure size in inches
             
         Returns:
-            str: Path to saved figure
+            str: Path to saved figure (None when output is given)
         """
-        print("\n📊 Generating comparison visualization...")
+        self._log("\n📊 Generating comparison visualization...")
         
         # Prepare timeline
         hist_dates, pred_dates = self.prepare_timeline(historical_df, predicted_df)
@@ -124,8 +227,24 @@ class EmissionVisualizer:
         
         pred_emissions = predicted_df['predicted_co2_kg'].values
         
-        # Create figure
-        fig, ax = plt.subplots(figsize=(14, 6))
+        with mplstyle.context(STYLE):
+            fig, ax = self._new_figure(figsize)
+            self._draw_comparison(ax, hist_dates, hist_emissions,
+                                  pred_dates, pred_emissions, title)
+            
+            if output is not None:
+                self._finish(fig, output)
+                return None
+            
+            output_path = self._output_path(filename, "historical_vs_predicted")
+            self._finish(fig, output_path, f"✅ Graph saved to: {output_path}")
+        
+        return output_path
+    
+    
+    def _draw_comparison(self, ax, hist_dates, hist_emissions,
+                         pred_dates, pred_emissions, title):
+        """Draw the historical vs predicted chart onto ax."""
         
         # Plot historical (solid line - blue)
         ax.plot(
@@ -197,29 +316,18 @@ class EmissionVisualizer:
         # Format x-axis if using dates
         if not isinstance(hist_dates, list):
             ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-            plt.xticks(rotation=45, ha='right')
-        
-        plt.tight_layout()
-        
-        # Save figure
-        if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"historical_vs_predicted_{timestamp}.png"
-        
-        output_path = os.path.join(self.output_dir, filename)
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        print(f"✅ Graph saved to: {output_path}")
-        
-        plt.show()
-        
-        return output_path
+            for label in ax.get_xticklabels():
+                label.set_rotation(45)
+                label.set_horizontalalignment('right')
     
     
     def plot_statistical_summary(
         self,
         historical_df,
         predicted_df,
-        filename=None
+        filename=None,
+        output=None,
+        figsize=(14, 10)
     ):
         """
         Generate statistical comparison dashboard.
@@ -228,18 +336,13 @@ class EmissionVisualizer:
             historical_df (pd.DataFrame): Historical data
             predicted_df (pd.DataFrame): Predicted data
             filename (str): Output filename
+            output (file-like): Write here instead of output_dir
+            figsize (tuple): Figure size in inches
             
         Returns:
-            str: Path to saved figure
+            str: Path to saved figure (None when output is given)
         """
-        print("\n📈 Generating statistical summary...")
-        
-        fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-        fig.suptitle(
-            'Industrial Carbon Emission Analysis Dashboard',
-            fontsize=16,
-            fontweight='bold'
-        )
+        self._log("\n📈 Generating statistical summary...")
         
         # Extract values
         if 'co2_emission' in historical_df.columns:
@@ -249,6 +352,28 @@ class EmissionVisualizer:
         
         pred_emissions = predicted_df['predicted_co2_kg'].values
         
+        with mplstyle.context(STYLE):
+            fig, axes = self._new_figure(figsize, 2, 2)
+            self._draw_dashboard(fig, axes, hist_emissions, pred_emissions)
+            
+            if output is not None:
+                self._finish(fig, output)
+                return None
+            
+            output_path = self._output_path(filename, "emission_analysis_dashboard")
+            self._finish(fig, output_path, f"✅ Dashboard saved to: {output_path}")
+        
+        return output_path
+    
+    
+    def _draw_dashboard(self, fig, axes, hist_emissions, pred_emissions):
+        """Draw the 2x2 statistical dashboard onto fig/axes."""
+        fig.suptitle(
+            'Industrial Carbon Emission Analysis Dashboard',
+            fontsize=16,
+            fontweight='bold'
+        )
+        
         # 1. Emission Trend Comparison
         ax1 = axes[0, 0]
         days_hist = np.arange(1, len(hist_emissions) + 1)
@@ -320,21 +445,6 @@ class EmissionVisualizer:
         ax4.set_title('Cumulative Emission Trajectory')
         ax4.legend()
         ax4.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        
-        # Save
-        if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"emission_analysis_dashboard_{timestamp}.png"
-        
-        output_path = os.path.join(self.output_dir, filename)
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        print(f"✅ Dashboard saved to: {output_path}")
-        
-        plt.show()
-        
-        return output_path
 
 
 def load_data(historical_path, predicted_path):
@@ -363,6 +473,72 @@ def load_data(historical_path, predicted_path):
     return historical_df, predicted_df
 
 
+def _render_job(job):
+    """Process-pool worker: render one organization's charts headlessly."""
+    name, historical_df, predicted_df, output_dir, dpi, fmt, dashboard = job
+    visualizer = EmissionVisualizer(
+        output_dir, headless=True, dpi=dpi, fmt=fmt, verbose=False
+    )
+    
+    paths = [visualizer.plot_comparison(
+        historical_df, predicted_df,
+        filename=f"{name}_historical_vs_predicted.{fmt}"
+    )]
+    if dashboard:
+        paths.append(visualizer.plot_statistical_summary(
+            historical_df, predicted_df,
+            filename=f"{name}_emission_analysis_dashboard.{fmt}"
+        ))
+    return paths
+
+
+def render_batch(jobs, output_dir=None, workers=None, dpi=150, fmt='png', dashboard=False):
+    """
+    Render charts for many organizations in a process pool.
+    
+    Each worker process has its own matplotlib state and renders
+    headlessly, so there is no shared pyplot figure registry.
+    
+    Args:
+        jobs (list): (name, historical_df, predicted_df) tuples
+        output_dir (str): Directory to save graphs (default: representation/)
+        workers (int): Worker processes (default: CPU count, 1 = in-process)
+        dpi (int): Resolution of saved figures
+        fmt (str): png, svg or webp
+        dashboard (bool): Also render the statistical dashboard
+        
+    Returns:
+        dict: paths, figures, seconds, figures_per_second
+    """
+    if output_dir is None:
+        output_dir = os.path.join(os.path.dirname(__file__), "representation")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of {FORMATS}")
+    os.makedirs(output_dir, exist_ok=True)
+    
+    tasks = [
+        (name, historical_df, predicted_df, output_dir, dpi, fmt, dashboard)
+        for name, historical_df, predicted_df in jobs
+    ]
+    workers = workers or os.cpu_count() or 1
+    
+    start = time.perf_counter()
+    if workers == 1 or len(tasks) <= 1:
+        results = [_render_job(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_render_job, tasks))
+    elapsed = time.perf_counter() - start
+    
+    paths = [path for result in results for path in result]
+    return {
+        "paths": paths,
+        "figures": len(paths),
+        "seconds": elapsed,
+        "figures_per_second": len(paths) / max(elapsed, 1e-9)
+    }
+
+
 def main():
     """
     Main execution with CLI support.
@@ -391,6 +567,39 @@ def main():
         help='Generate detailed statistical dashboard'
     )
     
+    parser.add_argument(
+        '--headless',
+        action='store_true',
+        help='Render without opening windows (Agg, no plt.show)'
+    )
+    
+    parser.add_argument(
+        '--dpi',
+        type=int,
+        default=300,
+        help='Resolution of saved figures (default: 300)'
+    )
+    
+    parser.add_argument(
+        '--format',
+        choices=FORMATS,
+        default='png',
+        help='Output format (default: png)'
+    )
+    
+    parser.add_argument(
+        '--batch',
+        action='store_true',
+        help='Render every indexed forecast in a process pool'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Worker processes for --batch (default: CPU count)'
+    )
+    
     args = parser.parse_args()
     
     print("\n" + "="*60)
@@ -398,25 +607,16 @@ def main():
     print("="*60)
     
     # Auto-detect latest prediction file if not specified
-    if args.predicted is None:
-        predictions_dir = os.path.join(os.path.dirname(__file__), "predictions")
-        if os.path.exists(predictions_dir):
-            pred_files = [
-                f for f in os.listdir(predictions_dir)
-                if f.startswith('predicted_emissions_') and f.endswith('.csv')
-            ]
-            
-            if pred_files:
-                pred_files.sort(reverse=True)  # Get latest
-                args.predicted = os.path.join(predictions_dir, pred_files[0])
-                print(f"📁 Auto-detected prediction file: {pred_files[0]}")
-            else:
-                raise FileNotFoundError(
-                    "No prediction file found. Please run predict_future_emissions.py first."
-                )
+    if args.predicted is None and not args.batch:
+        with open_index() as index:
+            latest = index.between(limit=1)
+        
+        if latest:
+            args.predicted = latest[0]['path']
+            print(f"📁 Auto-detected prediction file: {os.path.basename(args.predicted)}")
         else:
             raise FileNotFoundError(
-                "Predictions folder not found. Please run predict_future_emissions.py first."
+                "No prediction file found. Please run predict_future_emissions.py first."
             )
     
     # Auto-detect historical data if not specified
@@ -436,11 +636,40 @@ def main():
     else:
         historical_df = pd.read_csv(args.historical)
     
+    if args.batch:
+        with open_index() as index:
+            pred_files = [row['path'] for row in index.between() if os.path.exists(row['path'])]
+        if not pred_files:
+            raise FileNotFoundError(
+                "No prediction files found. Please run predict_future_emissions.py first."
+            )
+        
+        jobs = [
+            (os.path.splitext(os.path.basename(f))[0], historical_df, pd.read_csv(f))
+            for f in pred_files
+        ]
+        result = render_batch(
+            jobs, workers=args.workers, dpi=args.dpi,
+            fmt=args.format, dashboard=args.dashboard
+        )
+        
+        print("\n" + "="*60)
+        print("✅ BATCH VISUALIZATION COMPLETE")
+        print("="*60)
+        print(f"Forecasts rendered : {len(jobs)}")
+        print(f"Figures            : {result['figures']}")
+        print(f"Elapsed            : {result['seconds']:.2f}s")
+        print(f"Throughput         : {result['figures_per_second']:.1f} figures/s")
+        print("\nGraphs saved to: industry_model/representation/")
+        return
+    
     # Load predicted data
     predicted_df = pd.read_csv(args.predicted)
     
     # Initialize visualizer
-    visualizer = EmissionVisualizer()
+    visualizer = EmissionVisualizer(
+        headless=args.headless, dpi=args.dpi, fmt=args.format
+    )
     
     # Generate main comparison graph
     comparison_path = visualizer.plot_comparison(historical_df, predicted_df)
@@ -0,0 +1,170 @@
+"""
+============================================================
+CARBONMETER - SERVICE STARTUP PROFILE
+============================================================
+
+PURPOSE:
+    Measure what a cold start of each ML service costs:
+    - Import time of api.py (python -X importtime), split by the
+      heavy packages it pulls in
+    - Time from interpreter start to the first /health and
+      /industries responses, and which heavy packages were loaded
+      by then
+    - Time of the first prediction (which loads them)
+
+    Every measurement runs in a fresh interpreter, in the service's
+    own directory, exactly like `python api.py` would.
+
+USAGE:
+    cp -r CarbonMeter/ml /tmp/ml && python profile_startup.py --root /tmp/ml
+    python profile_startup.py --root /tmp/ml --runs 5 --json
+
+    The first-prediction probe really calls /predict/*, which appends
+    to the services' CSV logs: point --root at a scratch copy of ml/.
+
+    Results from this machine are kept in STARTUP_PROFILE.md.
+============================================================
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ML_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+HEAVY_PACKAGES = ["numpy", "pandas", "joblib", "sklearn", "xgboost", "matplotlib", "scipy"]
+
+SERVICES = {
+    "individual": {
+        "dir": "Carbon_meter",
+        "light": ["/health"],
+        "predict": ("/predict/missing-day", {"emission_history": [3.1, 3.4, 2.9, 3.8, 4.0, 3.6, 3.2]}),
+    },
+    "organization": {
+        "dir": "predict_org_emissions",
+        "light": ["/health", "/industries"],
+        "predict": ("/predict/org", {
+            "organizationId": "profile",
+            "industry": "cement",
+            "input_features": {"electricity_kwh": [15000.0] * 30, "production_units": [4500.0] * 30},
+        }),
+    },
+}
+
+# Runs inside the service directory in a fresh interpreter
+PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+import api
+imported = time.perf_counter()
+client = api.app.test_client()
+for path in {light!r}:
+    client.get(path)
+light = time.perf_counter()
+heavy_after_light = [p for p in {heavy!r} if p in sys.modules]
+path, body = {predict!r}
+client.post(path, json=body)
+predicted = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - start,
+    "first_light_s": light - start,
+    "first_predict_s": predicted - light,
+    "heavy_after_light": heavy_after_light,
+    "heavy_after_predict": [p for p in {heavy!r} if p in sys.modules],
+}}))
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+
+def _run(code, cwd, extra_args=()):
+    env = dict(os.environ, PRELOAD_MODELS="0", PYTHONDONTWRITEBYTECODE="1")
+    return subprocess.run(
+        [sys.executable, *extra_args, "-c", code],
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=300
+    )
+
+
+def import_breakdown(service_dir):
+    """
+    Cumulative import time (ms) of api.py and of each heavy package.
+
+    Returns:
+        dict: {"api": ms, "<package>": ms, ...}
+    """
+    result = _run("import api", service_dir, ["-X", "importtime"])
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative_us, name = int(match.group(2)), match.group(4)
+        top = name.split(".")[0]
+        if name == "api" or (name == top and top in HEAVY_PACKAGES):
+            # A package is reported once, where it was first imported
+            times.setdefault(name, cumulative_us / 1000)
+    return times
+
+
+def probe(service_dir, service):
+    code = PROBE.format(light=service["light"], heavy=HEAVY_PACKAGES, predict=service["predict"])
+    result = _run(code, service_dir)
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(f"Probe failed in {service_dir}:\n{result.stderr[-2000:]}")
+
+
+def profile(root=ML_ROOT, runs=3):
+    """Median timings per service over `runs` fresh interpreters."""
+    report = {}
+    for name, service in SERVICES.items():
+        service_dir = os.path.join(root, service["dir"])
+        samples = [probe(service_dir, service) for _ in range(runs)]
+        report[name] = {
+            "import_ms": import_breakdown(service_dir),
+            "import_s": statistics.median(s["import_s"] for s in samples),
+            "first_light_s": statistics.median(s["first_light_s"] for s in samples),
+            "first_predict_s": statistics.median(s["first_predict_s"] for s in samples),
+            "heavy_after_light": samples[-1]["heavy_after_light"],
+            "heavy_after_predict": samples[-1]["heavy_after_predict"],
+        }
+    return report
+
+
+def print_report(report):
+    for name, row in report.items():
+        service = SERVICES[name]
+        print(f"\n🔎 {name} service ({service['dir']}/api.py)")
+        print(f"   import api.py              : {row['import_s'] * 1000:8.0f} ms")
+        print(f"   start -> first response    : {row['first_light_s'] * 1000:8.0f} ms"
+              f"  ({' + '.join(service['light'])})")
+        print(f"   first prediction           : {row['first_predict_s'] * 1000:8.0f} ms")
+        print(f"   loaded by light endpoints  : {', '.join(row['heavy_after_light']) or 'none'}")
+        print(f"   loaded after a prediction  : {', '.join(row['heavy_after_predict']) or 'none'}")
+        heavy = {k: v for k, v in row["import_ms"].items() if k != "api"}
+        if heavy:
+            print("   imported by api.py itself  : " +
+                  ", ".join(f"{k} {v:.0f} ms" for k, v in sorted(heavy.items(), key=lambda kv: -kv[1])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start profile of the ML services")
+    parser.add_argument("--root", default=ML_ROOT, help="ml/ directory to profile")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per service")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON")
+    args = parser.parse_args()
+
+    report = profile(args.root, args.runs)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
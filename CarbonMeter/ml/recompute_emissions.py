@@ -0,0 +1,355 @@
+"""
+============================================================
+CARBONMETER - RECOMPUTE STORED EMISSIONS AFTER A FACTOR CHANGE
+============================================================
+
+PURPOSE:
+    CO₂ values in carbonmeter_daily_log.csv and
+    industry_monthly_carbon_log.csv are calculated with a pinned
+    emission factor version (see emission_factors.py). When a new
+    version is published, this job re-derives the stored rows from
+    their raw activity quantities instead of re-entering data.
+
+WORKFLOW:
+    1. Diff the row's factor version against the target version
+    2. Select only rows that use a changed factor
+       (e.g. only rows with electricity when the grid factor moves)
+    3. Recalculate those rows with the batch calculators
+    4. Stream the logs in chunks, rewriting each file atomically
+    5. Report rows scanned / recomputed and rows per second
+
+USAGE:
+    python recompute_emissions.py --to-version 2025.1
+    python recompute_emissions.py --to-version 2025.1 --target industry
+    python recompute_emissions.py --to-version 2025.1 --chunksize 500000
+
+NOTES:
+    - Rows logged before raw quantities were stored have no
+      factor_version; they are treated as LEGACY_FACTOR_VERSION.
+    - Daily rows without a matching raw-input row (e.g. ML-estimated
+      days) and legacy industry process rows without materials are
+      left untouched and reported as skipped.
+============================================================
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ML_ROOT = os.path.dirname(os.path.abspath(__file__))
+for _path in (
+    os.path.join(ML_ROOT, "Carbon_meter", "calculation_emission"),
+    os.path.join(ML_ROOT, "predict_org_emissions"),
+):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from emission_factors import load_factors
+from batch_calculator import calculate_daily_batch, factor_usage
+from sector_shares import SHARES_FILE, record_days
+from carbonmeter_individual import CSV_FILE as DAILY_LOG, INPUTS_FILE, LOG_HEADER
+import actual_cal
+
+LEGACY_FACTOR_VERSION = "2024.1"
+INDUSTRY_LOG = os.path.join(ML_ROOT, "predict_org_emissions", actual_cal.CSV_FILE)
+
+
+class RecomputeStats:
+    """Counters reported at the end of a recompute run."""
+
+    def __init__(self, name):
+        self.name = name
+        self.scanned = 0
+        self.recomputed = 0
+        self.skipped = 0
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+
+    def stop(self):
+        self.elapsed = time.perf_counter() - self.start
+        return self
+
+    @property
+    def rows_per_second(self):
+        return self.scanned / max(self.elapsed, 1e-9)
+
+    def report(self):
+        print(f"\n📊 {self.name}")
+        print(f"   Rows scanned    : {self.scanned:,}")
+        print(f"   Rows recomputed : {self.recomputed:,}")
+        print(f"   Rows skipped    : {self.skipped:,}")
+        print(f"   Elapsed         : {self.elapsed:.2f}s")
+        print(f"   Throughput      : {self.rows_per_second:,.0f} rows/s")
+
+
+def _row_versions(df):
+    """factor_version column with legacy rows filled in."""
+    if "factor_version" not in df.columns:
+        return pd.Series(LEGACY_FACTOR_VERSION, index=df.index)
+    return df["factor_version"].replace("", LEGACY_FACTOR_VERSION)
+
+
+def _stream_rewrite(path, chunksize, transform):
+    """
+    Rewrite a CSV chunk by chunk through transform(chunk) -> chunk,
+    replacing the file atomically at the end.
+    """
+    tmp_path = path + ".tmp"
+    header = True
+    try:
+        for chunk in pd.read_csv(path, dtype=str, keep_default_na=False,
+                                 chunksize=chunksize):
+            out = transform(chunk)
+            out.to_csv(tmp_path, mode="w" if header else "a",
+                       header=header, index=False)
+            header = False
+        if header:  # empty file: nothing to rewrite
+            return
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# ============================================================
+# DAILY (INDIVIDUAL) LOG
+# ============================================================
+def recompute_daily_log(to_version, log_file=DAILY_LOG, inputs_file=INPUTS_FILE,
+                        chunksize=100_000):
+    """
+    Re-derive daily log rows affected by a factor version change.
+
+    Args:
+        to_version (str): Target factor version
+        log_file (str): carbonmeter_daily_log.csv path
+        inputs_file (str): carbonmeter_daily_inputs.csv path
+        chunksize (int): Rows per streamed chunk
+
+    Returns:
+        RecomputeStats: Run statistics
+    """
+    table = load_factors()
+    target = table.pin(to_version)
+    stats = RecomputeStats("Daily log")
+
+    if not os.path.exists(inputs_file):
+        print(f"⚠ No raw inputs found at {inputs_file} - nothing to recompute")
+        return stats.stop()
+
+    updates = []
+
+    def recompute_inputs(chunk):
+        stats.scanned += len(chunk)
+        versions = _row_versions(chunk)
+
+        for version in versions[versions != to_version].unique():
+            in_version = (versions == version).to_numpy()
+            changed = table.changed_activities(version, to_version)
+            affected = in_version & factor_usage(chunk, changed)
+
+            if affected.any():
+                updates.append(
+                    calculate_daily_batch(chunk[affected], factors=target)
+                )
+                stats.recomputed += int(affected.sum())
+
+            # Rows not using a changed factor are already valid
+            chunk.loc[in_version, "factor_version"] = to_version
+
+        return chunk
+
+    _stream_rewrite(inputs_file, chunksize, recompute_inputs)
+
+    if updates and os.path.exists(log_file):
+        new_rows = (
+            pd.concat(updates, ignore_index=True)
+            .drop_duplicates("date", keep="last")
+            .astype(str)
+            .set_index("date")
+        )
+        value_cols = LOG_HEADER[1:]
+        applied = 0
+
+        def apply_updates(chunk):
+            nonlocal applied
+            # Only calculated rows; ML-estimated rows have no raw inputs
+            mask = (chunk["estimated"] != "1") & chunk["date"].isin(new_rows.index)
+            chunk.loc[mask, value_cols] = (
+                new_rows.loc[chunk.loc[mask, "date"], value_cols].to_numpy()
+            )
+            applied += int(mask.sum())
+            return chunk
+
+        _stream_rewrite(log_file, chunksize, apply_updates)
+        stats.skipped = stats.recomputed - applied
+
+        # Keep the rolling sector shares in line with the new values
+        if os.path.exists(SHARES_FILE):
+            record_days(new_rows.reset_index())
+
+    return stats.stop()
+
+
+# ============================================================
+# INDUSTRY MONTHLY LOG
+# ============================================================
+def _recompute_industry_block(block, table, to_version, stats):
+    """
+    Recompute complete (industry, month) groups.
+
+    block holds whole groups: machine rows, PROCESS_EMISSIONS and
+    TOTAL_MONTHLY_CO2, as written by actual_cal.append_monthly_log().
+    """
+    block = block.reindex(columns=actual_cal.HEADERS, fill_value="")
+    stats.scanned += len(block)
+
+    target_ef = actual_cal.emission_factors(table.pin(to_version))
+    versions = _row_versions(block)
+    kind = block["type"]
+    co2 = pd.to_numeric(block["co2_kg"], errors="coerce").fillna(0.0).to_numpy(copy=True)
+    recomputed = np.zeros(len(block), dtype=bool)
+    skipped = np.zeros(len(block), dtype=bool)
+
+    for version in versions[versions != to_version].unique():
+        in_version = (versions == version).to_numpy()
+        changed = set(table.changed_activities(version, to_version))
+        changed_keys = [k for k, a in actual_cal.EF_ACTIVITIES.items() if a in changed]
+
+        for inputs, row_type in (
+            (actual_cal.MACHINE_INPUTS, "machine"),
+            (actual_cal.PROCESS_INPUTS, "process")
+        ):
+            rows = in_version & (kind == row_type).to_numpy()
+            if not rows.any():
+                continue
+
+            qty = actual_cal._quantities(block.loc[rows], inputs)
+            uses_changed = np.zeros(rows.sum(), dtype=bool)
+            for i, key in enumerate(inputs.values()):
+                if key in changed_keys:
+                    uses_changed |= qty[:, i] != 0
+
+            idx = np.flatnonzero(rows)
+            if row_type == "process" and set(changed_keys) & set(inputs.values()):
+                # Legacy process rows carry no materials: cannot re-derive
+                no_raw = (block.loc[rows, list(inputs)] == "").all(axis=1).to_numpy()
+                skipped[idx[no_raw]] = True
+
+            ef = np.array([target_ef[k] for k in inputs.values()])
+            co2[idx[uses_changed]] = qty[uses_changed] @ ef
+            recomputed[idx[uses_changed]] = True
+
+    # Totals of groups that had any recomputed row
+    is_total = (kind == "total").to_numpy()
+    group = np.concatenate([[0], np.cumsum(is_total)[:-1]])
+    touched = np.bincount(group, weights=recomputed, minlength=group.max() + 1) > 0
+    parts = np.where(is_total, 0.0, co2)
+    sums = np.bincount(group, weights=parts, minlength=group.max() + 1)
+    totals = is_total & touched[group]
+    co2[totals] = sums[group[totals]]
+
+    updated = recomputed | totals
+    block.loc[updated, "co2_kg"] = np.round(co2[updated], 2).astype(str)
+    current = ~skipped & (versions != to_version).to_numpy()
+    block.loc[current, "factor_version"] = to_version
+
+    stats.recomputed += int(recomputed.sum())
+    stats.skipped += int(skipped.sum())
+    return block
+
+
+def recompute_industry_log(to_version, log_file=INDUSTRY_LOG, chunksize=100_000):
+    """
+    Re-derive industry monthly log rows affected by a factor change.
+
+    Args:
+        to_version (str): Target factor version
+        log_file (str): industry_monthly_carbon_log.csv path
+        chunksize (int): Rows per streamed chunk
+
+    Returns:
+        RecomputeStats: Run statistics
+    """
+    table = load_factors()
+    table.pin(to_version)  # validate early
+    stats = RecomputeStats("Industry monthly log")
+
+    if not os.path.exists(log_file):
+        print(f"⚠ No industry log found at {log_file} - nothing to recompute")
+        return stats.stop()
+
+    tmp_path = log_file + ".tmp"
+    pending = None
+    header = True
+
+    def write(frame):
+        nonlocal header
+        frame.to_csv(tmp_path, mode="w" if header else "a",
+                     header=header, index=False, columns=actual_cal.HEADERS)
+        header = False
+
+    try:
+        for chunk in pd.read_csv(log_file, dtype=str, keep_default_na=False,
+                                 chunksize=chunksize):
+            if pending is not None:
+                chunk = pd.concat([pending, chunk], ignore_index=True)
+
+            # Carry incomplete trailing groups into the next chunk
+            totals = np.flatnonzero((chunk["type"] == "total").to_numpy())
+            if len(totals) == 0:
+                pending = chunk
+                continue
+            cut = totals[-1] + 1
+            pending = chunk.iloc[cut:]
+            write(_recompute_industry_block(chunk.iloc[:cut].copy(),
+                                            table, to_version, stats))
+
+        if pending is not None and len(pending):
+            stats.scanned += len(pending)
+            write(pending.reindex(columns=actual_cal.HEADERS, fill_value=""))
+
+        if not header:
+            os.replace(tmp_path, log_file)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return stats.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recompute stored CO2 values for a new emission factor version"
+    )
+    parser.add_argument("--to-version", required=True,
+                        help="Target factor version (see emission_factors.csv)")
+    parser.add_argument("--target", choices=["daily", "industry", "all"],
+                        default="all", help="Which log to recompute")
+    parser.add_argument("--daily-log", default=DAILY_LOG)
+    parser.add_argument("--daily-inputs", default=INPUTS_FILE)
+    parser.add_argument("--industry-log", default=INDUSTRY_LOG)
+    parser.add_argument("--chunksize", type=int, default=100_000,
+                        help="Rows per streamed chunk")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 60)
+    print(f"RECOMPUTING EMISSIONS WITH FACTOR VERSION {args.to_version}")
+    print("=" * 60)
+
+    if args.target in ("daily", "all"):
+        recompute_daily_log(args.to_version, args.daily_log,
+                            args.daily_inputs, args.chunksize).report()
+
+    if args.target in ("industry", "all"):
+        recompute_industry_log(args.to_version, args.industry_log,
+                               args.chunksize).report()
+
+    print("\n✅ Recompute complete")
+
+
+if __name__ == "__main__":
+    main()
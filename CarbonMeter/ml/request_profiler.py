@@ -0,0 +1,338 @@
+"""
+============================================================
+CARBONMETER - OPT-IN REQUEST PROFILER
+============================================================
+
+PURPOSE:
+    Find out where one slow request spent its time (DataFrame
+    construction, model.predict, np.mean over lists, CSV appends...)
+    without a debugger on the production box.
+
+    Per request (REQUEST_PROFILING=1):
+        X-Profile: cprofile   or  ?profile=cprofile   deterministic
+        X-Profile: sample     or  ?profile=sample     statistical
+                                                      (stack samples)
+        X-Profile-Output: return  or  ?profile_output=return
+            replaces the response body with the profile (pstats text
+            or collapsed stacks); the handler's own status goes to
+            the X-Profiled-Status header
+        default output: store in <output_dir>/ and name the file in
+            the X-Profile-File response header
+
+        At most PROFILE_PER_MINUTE (default 6) profiled requests per
+        minute, and one cProfile at a time; others get an
+        X-Profile-Skipped header and run normally.
+
+    Background sampler (PROFILE_SAMPLER_HZ=20):
+        A daemon thread samples the stacks of threads that are
+        handling a request, PROFILE_SAMPLER_HZ times a second, and
+        rewrites <output_dir>/stacks.folded every 30 s. The file is in
+        the collapsed-stack format read by flamegraph.pl and
+        speedscope:
+            frame;frame;frame <count>
+
+    With both switches off (the default) no hook is registered, so
+    requests pay nothing.
+
+USAGE:
+    from request_profiler import RequestProfiler
+    RequestProfiler(app, output_dir="profiles")
+
+    REQUEST_PROFILING=1 python api.py
+    curl -H "X-Profile: cprofile" -H "X-Profile-Output: return" ...
+    python -m pstats profiles/<file>.prof
+    flamegraph.pl profiles/stacks.folded > flame.svg
+============================================================
+"""
+
+import atexit
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+from flask import Response, g, request
+
+PROFILING_ENV = "REQUEST_PROFILING"
+SAMPLER_ENV = "PROFILE_SAMPLER_HZ"
+PER_MINUTE_ENV = "PROFILE_PER_MINUTE"
+
+MODES = ("cprofile", "sample")
+REQUEST_SAMPLE_INTERVAL = 0.001    # seconds between samples of one profiled request
+FLUSH_SECONDS = 30
+MAX_STACKS = 20000                 # distinct stacks kept by the background sampler
+PSTATS_LINES = 60
+BODY_HEADERS = {"content-type", "content-length", "content-encoding"}   # not copied onto a returned profile
+
+
+def _env_flag(name):
+    return os.environ.get(name, "0").lower() in ("1", "true", "yes")
+
+
+def frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame):
+    """Root-first 'a;b;c' stack of a frame (collapsed-stack format)."""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def write_folded(counts, path):
+    """Write {stack: count} as collapsed stacks (atomically)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        for stack, count in sorted(counts.items()):
+            f.write(f"{stack} {count}\n")
+    os.replace(tmp, path)
+
+
+class StackSampler:
+    """Samples the stacks of selected threads at a fixed interval."""
+
+    def __init__(self, interval, targets, max_stacks=MAX_STACKS):
+        """
+        Args:
+            interval (float): Seconds between samples
+            targets (callable): Returns the thread idents to sample
+            max_stacks (int): New stacks beyond this many are counted
+                under '<other>' (bounds memory)
+        """
+        self.interval = interval
+        self.targets = targets
+        self.max_stacks = max_stacks
+        self.counts = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample_once(self):
+        frames = sys._current_frames()
+        with self._lock:
+            for ident in self.targets():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = collapse(frame)
+                if stack not in self.counts and len(self.counts) >= self.max_stacks:
+                    stack = "<other>"
+                self.counts[stack] += 1
+                self.samples += 1
+
+    def snapshot(self):
+        with self._lock:
+            return Counter(self.counts)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample_once()
+
+    def start(self, name="stack-sampler"):
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        return self.snapshot()
+
+
+class RequestProfiler:
+    """Per-request cProfile / sampling and a background hot-stack sampler."""
+
+    def __init__(self, app=None, output_dir="profiles", enabled=None, sampler_hz=None,
+                 per_minute=None, flush_seconds=FLUSH_SECONDS):
+        """
+        Args:
+            app (Flask): App to instrument (or call init_app later)
+            output_dir (str): Where stored profiles and stacks.folded go
+            enabled (bool): Honour X-Profile (default: $REQUEST_PROFILING)
+            sampler_hz (float): Background sampling rate, 0 = off
+                (default: $PROFILE_SAMPLER_HZ)
+            per_minute (int): Profiled requests allowed per minute
+                (default: $PROFILE_PER_MINUTE or 6)
+            flush_seconds (float): How often stacks.folded is rewritten
+        """
+        self.output_dir = output_dir
+        self.enabled = _env_flag(PROFILING_ENV) if enabled is None else enabled
+        self.sampler_hz = float(os.environ.get(SAMPLER_ENV, 0) if sampler_hz is None else sampler_hz)
+        self.per_minute = int(os.environ.get(PER_MINUTE_ENV, 6) if per_minute is None else per_minute)
+        self.flush_seconds = flush_seconds
+
+        self._recent = deque()
+        self._rate_lock = threading.Lock()
+        self._cprofile_lock = threading.Lock()   # one cProfile per process at a time
+        self._active = set()                     # threads currently handling a request
+        self._sampler = None
+        self._sampler_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+        if app is not None:
+            self.init_app(app)
+
+    @property
+    def sampling(self):
+        return self.sampler_hz > 0
+
+    def init_app(self, app):
+        if not (self.enabled or self.sampling):
+            return
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+
+    # ------------------------------------------------------------
+    # Background sampler
+    # ------------------------------------------------------------
+    def _ensure_sampler(self):
+        # Started by the first request, so only the serving process
+        # (not the debug reloader's parent) runs it
+        if self._sampler is None:
+            with self._sampler_lock:
+                if self._sampler is None:
+                    os.makedirs(self.output_dir, exist_ok=True)
+                    self._sampler = StackSampler(
+                        1.0 / self.sampler_hz, lambda: tuple(self._active)
+                    ).start(name="request-stack-sampler")
+                    atexit.register(self.flush)
+
+    def flush(self):
+        """Rewrite stacks.folded with everything sampled so far."""
+        if self._sampler is None:
+            return None
+        self._last_flush = time.monotonic()
+        path = os.path.join(self.output_dir, "stacks.folded")
+        write_folded(self._sampler.snapshot(), path)
+        return path
+
+    # ------------------------------------------------------------
+    # Per-request profiling
+    # ------------------------------------------------------------
+    @staticmethod
+    def _requested():
+        mode = (request.headers.get("X-Profile") or request.args.get("profile") or "").lower()
+        if not mode:
+            return None, None
+        if mode in ("1", "true", "yes"):
+            mode = "cprofile"
+        output = (request.headers.get("X-Profile-Output")
+                  or request.args.get("profile_output") or "store").lower()
+        return mode, output
+
+    def _allow(self):
+        now = time.monotonic()
+        with self._rate_lock:
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if len(self._recent) >= self.per_minute:
+                return False
+            self._recent.append(now)
+            return True
+
+    def _before(self):
+        if self.sampling:
+            self._ensure_sampler()
+            self._active.add(threading.get_ident())
+
+        if not self.enabled:
+            return
+        mode, output = self._requested()
+        if mode is None:
+            return
+        if mode not in MODES:
+            g._profile_skipped = f"unknown mode '{mode}' (use {', '.join(MODES)})"
+            return
+        if not self._allow():
+            g._profile_skipped = "rate limited"
+            return
+
+        if mode == "cprofile":
+            if not self._cprofile_lock.acquire(blocking=False):
+                g._profile_skipped = "another request is being profiled"
+                return
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            ident = threading.get_ident()
+            profiler = StackSampler(REQUEST_SAMPLE_INTERVAL, lambda: (ident,)).start("request-sampler")
+        g._profile = (mode, output, profiler, time.perf_counter())
+
+    def _stop(self):
+        state = g.pop("_profile", None)
+        if state is None:
+            return None
+        mode, output, profiler, start = state
+        if mode == "cprofile":
+            profiler.disable()
+            self._cprofile_lock.release()
+            return mode, output, profiler, time.perf_counter() - start
+        return mode, output, profiler.stop(), time.perf_counter() - start
+
+    def _render(self, mode, result, seconds):
+        """Profile as text: pstats table or collapsed stacks."""
+        if mode == "cprofile":
+            buffer = io.StringIO()
+            stats = pstats.Stats(result, stream=buffer)
+            stats.sort_stats("cumulative").print_stats(PSTATS_LINES)
+            return f"# {request.method} {request.path} {seconds * 1000:.1f} ms\n" + buffer.getvalue()
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(result.items()))
+
+    def _store(self, mode, result):
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", request.path).strip("_") or "root"
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        if mode == "cprofile":
+            path = os.path.join(self.output_dir, f"{stamp}_{slug}.prof")
+            result.dump_stats(path)
+        else:
+            path = os.path.join(self.output_dir, f"{stamp}_{slug}.folded")
+            write_folded(result, path)
+        return path
+
+    def _after(self, response):
+        skipped = g.pop("_profile_skipped", None)
+        if skipped:
+            response.headers["X-Profile-Skipped"] = skipped
+
+        stopped = self._stop()
+        if stopped is not None:
+            mode, output, result, seconds = stopped
+            if output == "return":
+                profiled = Response(self._render(mode, result, seconds), mimetype="text/plain")
+                # Keep what earlier hooks set (X-Request-ID, X-Trace-ID, ...),
+                # except the headers that describe the replaced body
+                for name, value in response.headers.items():
+                    if name.lower() not in BODY_HEADERS:
+                        profiled.headers.add(name, value)
+                profiled.headers["X-Profiled-Status"] = str(response.status_code)
+                response = profiled
+            else:
+                path = self._store(mode, result)
+                response.headers["X-Profile-File"] = os.path.basename(path)
+            response.headers["X-Profile-Ms"] = f"{seconds * 1000:.1f}"
+        return response
+
+    def _teardown(self, exc):
+        # after_request may not have run (e.g. a failing after_request hook)
+        if "_profile" in g:
+            self._stop()
+        if self.sampling:
+            self._active.discard(threading.get_ident())
+            if time.monotonic() - self._last_flush >= self.flush_seconds:
+                try:
+                    self.flush()
+                except OSError as e:
+                    print(f"⚠️  Could not write stacks.folded: {e}")
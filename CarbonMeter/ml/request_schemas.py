@@ -0,0 +1,357 @@
+"""
+============================================================
+CARBONMETER - DECLARATIVE REQUEST SCHEMAS
+============================================================
+
+PURPOSE:
+    One place that says what each ML endpoint accepts, instead of
+    data.get() chains, [float(x) for x in ...] loops and ad-hoc error
+    bodies in every handler.
+
+    A Schema is declared once at import and compiled into a tuple of
+    per-field converters. validate(body) then walks that tuple:
+        - defaults and aliases (organizationId / organization_id)
+        - numbers, strings (optionally lower-cased / restricted to a
+          set of choices)
+        - numeric arrays converted in one step to NumPy float64
+          arrays (no per-element float() calls in Python)
+        - record lists ([{electricity_kwh: x, ...}, ...]) turned into
+          one float64 array per column; the same data sent column-wise
+          ({electricity_kwh: [...], ...}) is taken as is
+        - arrays already decoded to NumPy (Arrow / MessagePack bodies,
+          see columnar.py) pass through without a copy
+
+    Every problem in the body is collected, then raised together as
+    a SchemaError (a ValueError). Handlers answer it with
+    error.response(), always the same 400 shape:
+
+        {"error": "Invalid request",
+         "message": "emission_history: must be an array of numbers",
+         "details": [{"field": "emission_history",
+                      "message": "must be an array of numbers"}]}
+
+    A missing value, null, "" or an empty array / object takes the
+    field's default, as the handlers' `data.get(k) or default`
+    did. numpy is imported on first use, so services that load it
+    lazily keep doing so.
+
+USAGE:
+    from request_schemas import Schema, FloatArray, String, SchemaError
+
+    MISSING_DAY = Schema(
+        "missing_day",
+        emission_history=FloatArray(),
+        userId=String(default="unknown"),
+    )
+
+    try:
+        fields = MISSING_DAY.validate(request.json)
+    except SchemaError as e:
+        return e.response()
+============================================================
+"""
+
+from flask import jsonify
+
+from service_startup import lazy_module
+
+np = lazy_module("numpy")
+
+_MISSING = object()
+_TITLES = {400: "Invalid request", 413: "Request body too large", 415: "Unsupported media type"}
+_EMPTY_TYPES = (str, list, dict)
+
+
+class SchemaError(ValueError):
+    """A request body that does not match its schema."""
+
+    def __init__(self, errors, status=400):
+        """
+        Args:
+            errors (list): (field, message) pairs
+            status (int): HTTP status of the error response
+        """
+        self.errors = list(errors)
+        self.status = status
+        super().__init__("; ".join(f"{field}: {message}" if field else message
+                                   for field, message in self.errors))
+
+    def to_dict(self):
+        return {
+            "error": _TITLES.get(self.status, "Invalid request"),
+            "message": str(self),
+            "details": [{"field": field, "message": message} for field, message in self.errors],
+        }
+
+    def response(self):
+        return jsonify(self.to_dict()), self.status
+
+
+class Field:
+    """
+    Base field: defaults, aliases and the required flag.
+
+    Subclasses implement compile(), which returns the converter for
+    one present (non-empty) value. A converter raises ValueError or
+    TypeError with the message to report.
+    """
+
+    def __init__(self, default=None, required=False, aliases=()):
+        self.default = default
+        self.required = required
+        self.aliases = tuple(aliases)
+
+    def compile(self):
+        return lambda value: value
+
+    def missing(self):
+        """Value used when the field is absent or empty (a fresh copy)."""
+        default = self.default
+        return type(default)(default) if isinstance(default, (list, dict)) else default
+
+
+class Any(Field):
+    """Value passed through unchanged (e.g. a free-form breakdown)."""
+
+
+class Number(Field):
+    def __init__(self, default=None, integer=False, minimum=None, maximum=None, **kwargs):
+        super().__init__(default, **kwargs)
+        self.integer = integer
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def compile(self):
+        cast = int if self.integer else float
+        minimum, maximum = self.minimum, self.maximum
+        kind = "an integer" if self.integer else "a number"
+
+        def convert(value):
+            if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+                raise TypeError(f"must be {kind}")
+            try:
+                number = cast(float(value))
+            except (ValueError, OverflowError):
+                raise ValueError(f"must be {kind}") from None
+            if number != number:
+                raise ValueError(f"must be {kind}")
+            if minimum is not None and number < minimum:
+                raise ValueError(f"must be at least {minimum}")
+            if maximum is not None and number > maximum:
+                raise ValueError(f"must be at most {maximum}")
+            return number
+
+        return convert
+
+
+class String(Field):
+    def __init__(self, default=None, choices=None, lower=False, invalid="error", **kwargs):
+        """
+        Args:
+            choices: Allowed values (after lower-casing), or None
+            lower (bool): Lower-case the value
+            invalid (str): 'error' or 'default' (use the default for a
+                value outside choices, as the handlers used to)
+        """
+        super().__init__(default, **kwargs)
+        self.choices = frozenset(choices) if choices is not None else None
+        self.lower = lower
+        self.invalid = invalid
+
+    def compile(self):
+        choices, lower = self.choices, self.lower
+        use_default = self.invalid == "default"
+        default = self.default
+
+        def convert(value):
+            if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+                raise TypeError("must be a string")
+            value = str(value)
+            if lower:
+                value = value.lower()
+            if choices is not None and value not in choices:
+                if use_default:
+                    return default
+                raise ValueError(f"must be one of {sorted(choices)}")
+            return value
+
+        return convert
+
+
+class StringList(Field):
+    def __init__(self, default=(), **kwargs):
+        super().__init__(list(default) if default is not None else None, **kwargs)
+
+    def compile(self):
+        def convert(value):
+            if not isinstance(value, list):
+                raise TypeError("must be an array")
+            return [str(item) for item in value]
+
+        return convert
+
+
+def _float_array(value):
+    """A JSON array of numbers as a 1-D float64 array (one C-level pass)."""
+    if not isinstance(value, (list, tuple, np.ndarray)):
+        raise TypeError("must be an array of numbers")
+    try:
+        array = np.asarray(value, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError("must be an array of numbers") from None
+    if array.ndim != 1 or np.isnan(array).any():
+        # NaN here means a null inside the array
+        raise ValueError("must be an array of numbers")
+    return array
+
+
+class FloatArray(Field):
+    """Array of numbers, returned as a NumPy float64 array."""
+
+    def __init__(self, default=(), min_len=0, max_len=None, **kwargs):
+        super().__init__(default, **kwargs)
+        self.min_len = min_len
+        self.max_len = max_len
+
+    def compile(self):
+        min_len, max_len = self.min_len, self.max_len
+
+        def convert(value):
+            array = _float_array(value)
+            if len(array) < min_len:
+                raise ValueError(f"needs at least {min_len} values")
+            if max_len is not None and len(array) > max_len:
+                raise ValueError(f"takes at most {max_len} values")
+            return array
+
+        return convert
+
+    def missing(self):
+        return np.array(self.default, dtype=np.float64)
+
+
+class FloatArrayMap(Field):
+    """Object of name -> array of numbers (e.g. input_features)."""
+
+    def __init__(self, default=None, **kwargs):
+        super().__init__(default if default is not None else {}, **kwargs)
+
+    def compile(self):
+        def convert(value):
+            if not isinstance(value, dict):
+                raise TypeError("must be an object of arrays")
+            columns = {}
+            for name, values in value.items():
+                if values is None:
+                    values = []
+                try:
+                    columns[name] = _float_array(values)
+                except (TypeError, ValueError):
+                    raise ValueError(f"'{name}' must be an array of numbers") from None
+            return columns
+
+        return convert
+
+
+class Records(Field):
+    """
+    Array of row objects, returned column-wise: {column: float64 array}.
+
+    A missing, null or empty value in a row counts as 0. The columns
+    may also be sent directly ({column: [values]}, all the same
+    length); a missing column is then all zeros.
+    """
+
+    def __init__(self, columns, default=None, **kwargs):
+        super().__init__(default if default is not None else {}, **kwargs)
+        self.columns = tuple(columns)
+
+    def compile(self):
+        columns = self.columns
+
+        def convert_columns(data):
+            arrays = {}
+            for column in columns:
+                values = data.get(column)
+                if values is None:
+                    continue
+                try:
+                    arrays[column] = _float_array(values)
+                except (TypeError, ValueError):
+                    raise ValueError(f"'{column}' must be an array of numbers") from None
+            lengths = {len(array) for array in arrays.values()}
+            if len(lengths) > 1:
+                raise ValueError("columns must all have the same length")
+            n = lengths.pop() if lengths else 0
+            return {column: arrays[column] if column in arrays else np.zeros(n)
+                    for column in columns}
+
+        def convert(rows):
+            if isinstance(rows, dict):
+                return convert_columns(rows)
+            if not isinstance(rows, list):
+                raise TypeError("must be an array of objects")
+            result = {}
+            for column in columns:
+                try:
+                    values = [row.get(column) or 0 for row in rows]
+                except AttributeError:
+                    raise TypeError("must be an array of objects") from None
+                try:
+                    result[column] = np.fromiter(values, dtype=np.float64, count=len(values))
+                except (TypeError, ValueError):
+                    raise ValueError(f"'{column}' values must be numbers") from None
+            return result
+
+        return convert
+
+
+class Schema:
+    """A named set of fields, compiled once into a validator."""
+
+    def __init__(self, name, **fields):
+        self.name = name
+        self.fields = fields
+        self._plan = tuple(
+            (key, (key,) + field.aliases, field.compile(), field)
+            for key, field in fields.items()
+        )
+
+    def validate(self, data):
+        """
+        Validate and convert a decoded JSON body.
+
+        Returns:
+            dict: One value per declared field (defaults filled in)
+
+        Raises:
+            SchemaError: Listing every invalid or missing field
+        """
+        if not isinstance(data, dict):
+            raise SchemaError([(None, "request body must be a JSON object")])
+
+        values = {}
+        errors = []
+        for key, names, convert, field in self._plan:
+            value = _MISSING
+            for name in names:
+                candidate = data.get(name)
+                if not (candidate is None or (type(candidate) in _EMPTY_TYPES and not candidate)):
+                    value = candidate
+                    break
+
+            if value is _MISSING:
+                if field.required:
+                    errors.append((key, "is required"))
+                    continue
+                values[key] = field.missing()
+                continue
+
+            try:
+                values[key] = convert(value)
+            except (TypeError, ValueError) as e:
+                errors.append((key, str(e)))
+
+        if errors:
+            raise SchemaError(errors)
+        return values
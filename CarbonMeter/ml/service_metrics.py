@@ -0,0 +1,274 @@
+"""
+============================================================
+CARBONMETER - SERVICE METRICS (PROMETHEUS TEXT FORMAT)
+============================================================
+
+PURPOSE:
+    Show where request time goes in the Flask ML services and how
+    often they quietly answer with a fallback instead of the model.
+
+    ServiceMetrics(app) records, per endpoint:
+        http_requests_total{endpoint,method,status}
+        http_request_duration_seconds{endpoint}          (histogram)
+        exceptions_total{endpoint,type,handled}
+        fallback_responses_total{endpoint,reason}
+    and, around the code the handlers wrap with metrics.time():
+        stage_duration_seconds{stage}                     (histogram)
+        e.g. feature_build, model_predict, csv_append, chart_render
+
+    GET /metrics serves everything in the Prometheus text format
+    (version 0.0.4), plus model load state and service uptime.
+
+    Only the standard library is used. Recording a value takes a
+    lock and a bisect, a few microseconds per request. Counts are
+    per process: with several workers, scrape each one (or sum them
+    in Prometheus).
+
+USAGE:
+    from service_metrics import ServiceMetrics
+
+    metrics = ServiceMetrics(app, service="organization")
+    metrics.track_model("xgboost", xgboost_model)
+
+    with metrics.time("model_predict"):
+        prediction = model.predict(X)
+    metrics.fallback("model_not_loaded")
+    metrics.exception(e)            # in an except block that answers 200
+============================================================
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds. Requests span sub-millisecond /health to chart renders.
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                 0.25, 0.5, 1.0, 2.5)
+
+# Label for requests that matched no route (keeps label cardinality bounded)
+UNMATCHED = "<unmatched>"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    """Bucketed observations per label combination (Prometheus histogram)."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=REQUEST_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Gauge:
+    """Values read from a callback at scrape time: {label tuple: value}."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=(), collect=None):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def samples(self):
+        for labels, value in sorted(self.collect().items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class ServiceMetrics:
+    """Request, stage, fallback and exception metrics for one Flask app."""
+
+    def __init__(self, app=None, service="ml", path="/metrics"):
+        """
+        Args:
+            app (Flask): App to instrument (or call init_app later)
+            service (str): Value of the service label on service_info
+            path (str): URL the metrics are served on
+        """
+        self.service = service
+        self.path = path
+        self.started = time.time()
+        self._models = {}
+
+        self.requests = Counter(
+            "http_requests_total", "HTTP requests by endpoint, method and status",
+            ("endpoint", "method", "status"))
+        self.latency = Histogram(
+            "http_request_duration_seconds", "Request latency by endpoint",
+            ("endpoint",), REQUEST_BUCKETS)
+        self.stages = Histogram(
+            "stage_duration_seconds", "Time spent in named request stages",
+            ("stage",), STAGE_BUCKETS)
+        self.fallbacks = Counter(
+            "fallback_responses_total", "Responses served by a fallback instead of the model",
+            ("endpoint", "reason"))
+        self.exceptions = Counter(
+            "exceptions_total", "Exceptions raised while handling requests",
+            ("endpoint", "type", "handled"))
+        self.metrics = [
+            Gauge("service_info", "Service name", ("service",), lambda: {(self.service,): 1}),
+            Gauge("process_start_time_seconds", "Start time of the process (unix epoch)",
+                  collect=lambda: {(): self.started}),
+            self.requests, self.latency, self.stages, self.fallbacks, self.exceptions,
+            Gauge("model_loaded", "1 when the model is loaded in memory", ("model",),
+                  lambda: {(n,): int(m.loaded) for n, m in self._models.items()}),
+            Gauge("model_load_seconds", "Time the model took to load", ("model",),
+                  lambda: {(n,): m.load_seconds for n, m in self._models.items() if m.load_seconds}),
+        ]
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+        app.add_url_rule(self.path, "metrics", self.render_response, methods=["GET"])
+
+    def track_model(self, name, lazy_model):
+        """Report a service_startup.LazyModel's load state on /metrics."""
+        self._models[name] = lazy_model
+
+    def register(self, *metrics):
+        """Serve metrics owned by another component (e.g. admission control)."""
+        self.metrics.extend(metrics)
+
+    # ------------------------------------------------------------
+    # Request hooks
+    # ------------------------------------------------------------
+    @staticmethod
+    def endpoint():
+        """Route pattern of the current request (not the raw path)."""
+        rule = request.url_rule
+        return rule.rule if rule is not None else UNMATCHED
+
+    def _before(self):
+        g._metrics_start = time.perf_counter()
+
+    def _after(self, response):
+        start = g.pop("_metrics_start", None)
+        endpoint = self.endpoint()
+        if start is not None and endpoint != self.path:
+            self.latency.observe(time.perf_counter() - start, endpoint)
+            self.requests.inc(endpoint, request.method, str(response.status_code))
+        return response
+
+    def _teardown(self, exc):
+        if exc is not None:
+            self.exceptions.inc(self.endpoint(), type(exc).__name__, "false")
+
+    # ------------------------------------------------------------
+    # Handler helpers
+    # ------------------------------------------------------------
+    @contextmanager
+    def time(self, stage):
+        """Record the duration of the wrapped block under `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.observe(time.perf_counter() - start, stage)
+
+    def fallback(self, reason):
+        """Count a response served without the model."""
+        self.fallbacks.inc(self.endpoint(), reason)
+
+    def exception(self, exc):
+        """Count an exception a handler caught and answered anyway."""
+        self.exceptions.inc(self.endpoint(), type(exc).__name__, "true")
+
+    # ------------------------------------------------------------
+    # Exposition
+    # ------------------------------------------------------------
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            samples = list(metric.samples())
+            if not samples and metric.kind == "gauge":
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def render_response(self):
+        return Response(self.render(), mimetype=None, content_type=CONTENT_TYPE)
@@ -0,0 +1,192 @@
+"""
+============================================================
+CARBONMETER - FAST SERVICE STARTUP
+============================================================
+
+PURPOSE:
+    Keep cold starts of the Flask ML services short (Render's free
+    tier spins services down when idle, so the first request after
+    a spin-down pays for the whole process start).
+
+    - lazy_module("pandas") returns a stand-in that imports the real
+      module on first attribute access, so `pd.DataFrame(...)` in a
+      handler works unchanged but /health never imports pandas.
+      module_available("pyarrow") checks an optional dependency
+      without importing it.
+    - LazyModel loads a pickled model on first use, once, under a
+      lock, and remembers load errors instead of retrying per request.
+    - preload_after_bind() warms models in a background thread once
+      the server accepts connections (PRELOAD_MODELS=1), so the port
+      is bound and /health answers while the model loads.
+
+    python profile_startup.py prints an import-time profile of both
+    services (see STARTUP_PROFILE.md).
+
+USAGE:
+    from service_startup import LazyModel, lazy_module, preload_after_bind
+
+    pd = lazy_module("pandas")
+    model = LazyModel("model.pkl", name="behavioral model")
+    preload_after_bind(8000, [model.get])
+============================================================
+"""
+
+import functools
+import importlib
+import importlib.util
+import os
+import socket
+import sys
+import threading
+import time
+
+PRELOAD_ENV = "PRELOAD_MODELS"
+
+
+class LazyModule:
+    """Module stand-in that imports the real module on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if attr.startswith("__") and attr.endswith("__"):
+            raise AttributeError(attr)
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if is_loaded(self._name) else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name):
+    """The module itself if already imported, else a LazyModule."""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+@functools.lru_cache(maxsize=None)
+def module_available(name):
+    """True when an optional module can be imported (checked without importing it)."""
+    return importlib.util.find_spec(name) is not None
+
+
+def is_loaded(name):
+    """True once a module has really been imported in this process."""
+    return name in sys.modules
+
+
+class LazyModel:
+    """Pickled model loaded with joblib on first use."""
+
+    def __init__(self, path, name="model"):
+        self.path = path
+        self.name = name
+        self.model = None
+        self.error = None
+        self.load_seconds = None
+        self._attempted = False
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        return os.path.exists(self.path)
+
+    @property
+    def loaded(self):
+        return self.model is not None
+
+    @property
+    def attempted(self):
+        """True once get() has run (whether or not it found a model)."""
+        return self._attempted
+
+    def get(self):
+        """
+        The model, loading it on the first call.
+
+        Returns:
+            object: The model, or None when the file is missing or
+            failed to load (the error is kept in self.error)
+        """
+        if self._attempted:
+            return self.model
+
+        with self._lock:
+            if self._attempted:
+                return self.model
+
+            if not self.available:
+                print(f"⚠️  {self.name} not found at {self.path}")
+            else:
+                start = time.perf_counter()
+                try:
+                    import joblib
+                    self.model = joblib.load(self.path)
+                    self.load_seconds = time.perf_counter() - start
+                    print(f"✅ {self.name} loaded from {self.path} ({self.load_seconds:.2f}s)")
+                except Exception as e:
+                    self.error = str(e)
+                    print(f"❌ Error loading {self.name}: {self.error}")
+            self._attempted = True
+        return self.model
+
+    def status(self):
+        """Load state for /health (never triggers a load)."""
+        return {
+            "available": self.available,
+            "loaded": self.loaded,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds else None,
+            "error": self.error,
+        }
+
+
+def preload_enabled():
+    return os.environ.get(PRELOAD_ENV, "0").lower() in ("1", "true", "yes")
+
+
+def preload_after_bind(port, loaders, host="127.0.0.1", timeout=60.0, debug=False):
+    """
+    Run loaders in a daemon thread once host:port accepts connections.
+
+    Call right before app.run(): the thread waits for the server to
+    bind, so startup and the first /health are never delayed by it.
+
+    Args:
+        port (int): Port the service is about to listen on
+        loaders (list): Callables run in order (e.g. LazyModel.get)
+        host (str): Address to probe
+        timeout (float): Give up waiting for the port after this long
+        debug (bool): app.run(debug=True): only the reloader's child
+            process serves requests, so the parent does not preload
+
+    Returns:
+        threading.Thread: The started thread (None when skipped)
+    """
+    if debug and os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+        return None
+
+    def wait_and_load():
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection((host, port), timeout=0.5):
+                    break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            print(f"⚠️  Port {port} not bound after {timeout:.0f}s, preloading anyway")
+
+        start = time.perf_counter()
+        for load in loaders:
+            try:
+                load()
+            except Exception as e:
+                print(f"❌ Preload failed: {e}")
+        print(f"🔥 Background preload finished in {time.perf_counter() - start:.2f}s")
+
+    thread = threading.Thread(target=wait_and_load, name="model-preload", daemon=True)
+    thread.start()
+    return thread
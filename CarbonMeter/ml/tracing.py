@@ -0,0 +1,264 @@
+"""
+============================================================
+CARBONMETER - REQUEST TRACING (CORRELATION IDS + JSON SPANS)
+============================================================
+
+PURPOSE:
+    Follow one request from the Node backend into the Flask ML
+    services and see which stage of it was slow.
+
+    Trace context (always on):
+        - X-Request-ID from the caller is kept (one is generated
+          when missing) and echoed on the response
+        - a W3C traceparent header continues the caller's trace;
+          otherwise the trace id is the request id (when it is 32
+          hex digits) or a new one
+        - the response carries X-Request-ID and X-Trace-ID
+
+    Spans (TRACING=1):
+        Each request gets a root span ("POST /predict/org") and the
+        child spans handlers open with tracer.span(name), e.g.
+        parse, validate, feature_build, predict, recommendation,
+        persist, serialize. At the end of the request its spans are
+        appended to a JSON-lines file, one span per line:
+
+        {"trace_id": "...", "span_id": "...", "parent_id": "...",
+         "request_id": "...", "service": "organization",
+         "name": "predict", "start": "2026-10-18T22:50:20.131650+00:00",
+         "duration_ms": 1.234, "status": "ok", "attributes": {...}}
+
+        The file (TRACE_FILE, default <service>/traces/spans.jsonl)
+        is rotated to spans.jsonl.1 past TRACE_MAX_MB (default 50).
+        No collector is needed; jq or pandas.read_json(lines=True)
+        reads it.
+
+    With TRACING off, tracer.span() returns a shared no-op context.
+
+USAGE:
+    from tracing import Tracer
+
+    tracer = Tracer(app, service="organization", path="traces/spans.jsonl")
+    with tracer.span("predict", model="xgboost"):
+        prediction = model.predict(X)
+
+    TRACING=1 python api.py
+    jq 'select(.request_id == "abc")' traces/spans.jsonl
+============================================================
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+from flask import g, request
+
+TRACING_ENV = "TRACING"
+TRACE_FILE_ENV = "TRACE_FILE"
+TRACE_MAX_MB_ENV = "TRACE_MAX_MB"
+
+REQUEST_ID_HEADER = "X-Request-ID"
+TRACEPARENT_RE = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+HEX32_RE = re.compile(r"^[0-9a-f]{32}$")
+MAX_REQUEST_ID = 128
+
+_NOOP = nullcontext()
+
+
+def new_span_id():
+    return os.urandom(8).hex()
+
+
+def trace_context(headers):
+    """
+    (request_id, trace_id, parent span id) from incoming headers.
+
+    Args:
+        headers: Mapping with .get (e.g. flask.request.headers)
+    """
+    request_id = (headers.get(REQUEST_ID_HEADER) or "").strip()[:MAX_REQUEST_ID] or uuid.uuid4().hex
+
+    match = TRACEPARENT_RE.match((headers.get("traceparent") or "").strip().lower())
+    if match and match.group(1) != "0" * 32:
+        return request_id, match.group(1), match.group(2)
+    if HEX32_RE.match(request_id.replace("-", "").lower()):
+        return request_id, request_id.replace("-", "").lower(), None
+    return request_id, uuid.uuid4().hex, None
+
+
+class FileExporter:
+    """Appends spans as JSON lines to a local file, rotating it by size."""
+
+    def __init__(self, path, max_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        if not spans:
+            return
+        data = "".join(json.dumps(span, default=str) + "\n" for span in spans)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if self.max_bytes and os.path.exists(self.path) \
+                    and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a") as f:
+                f.write(data)
+
+
+class Span:
+    """One timed operation of a request."""
+
+    __slots__ = ("name", "span_id", "parent_id", "attributes", "status", "start", "_t0", "duration")
+
+    def __init__(self, name, parent_id, attributes):
+        self.name = name
+        self.span_id = new_span_id()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = "ok"
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self):
+        self.duration = time.perf_counter() - self._t0
+
+    def to_dict(self, trace, service):
+        return {
+            "trace_id": trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "request_id": trace.request_id,
+            "service": service,
+            "name": self.name,
+            "start": datetime.fromtimestamp(self.start, timezone.utc).isoformat(),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class RequestTrace:
+    """Trace state of the current request (kept on flask.g)."""
+
+    def __init__(self, request_id, trace_id, parent_id, recording):
+        self.request_id = request_id
+        self.trace_id = trace_id
+        self.recording = recording
+        self.spans = []
+        self.stack = []
+        self.root = None
+        if recording:
+            self.root = Span(f"{request.method} {request.path}", parent_id, {
+                "http.method": request.method,
+                "http.route": request.url_rule.rule if request.url_rule else None,
+            })
+            self.stack.append(self.root)
+
+
+class Tracer:
+    """Trace context propagation and span export for one Flask app."""
+
+    def __init__(self, app=None, service="ml", path=None, enabled=None, max_bytes=None):
+        """
+        Args:
+            app (Flask): App to instrument (or call init_app later)
+            service (str): Service name written on every span
+            path (str): Span file (default: $TRACE_FILE or traces/spans.jsonl)
+            enabled (bool): Record spans (default: $TRACING)
+            max_bytes (int): Rotate the file past this size
+                (default: $TRACE_MAX_MB or 50 MB)
+        """
+        self.service = service
+        if enabled is None:
+            enabled = os.environ.get(TRACING_ENV, "0").lower() in ("1", "true", "yes")
+        self.enabled = enabled
+        path = os.environ.get(TRACE_FILE_ENV) or path or os.path.join("traces", "spans.jsonl")
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get(TRACE_MAX_MB_ENV, 50)) * 1024 * 1024)
+        self.exporter = FileExporter(path, max_bytes)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+
+    @staticmethod
+    def current():
+        """RequestTrace of the current request, or None outside one."""
+        return g.get("_trace") if g else None
+
+    @property
+    def request_id(self):
+        trace = self.current()
+        return trace.request_id if trace else None
+
+    def _before(self):
+        request_id, trace_id, parent_id = trace_context(request.headers)
+        g._trace = RequestTrace(request_id, trace_id, parent_id, self.enabled)
+
+    def _after(self, response):
+        trace = self.current()
+        if trace is not None:
+            response.headers[REQUEST_ID_HEADER] = trace.request_id
+            response.headers["X-Trace-ID"] = trace.trace_id
+            if trace.root is not None:
+                trace.root.set(**{"http.status_code": response.status_code})
+                if response.status_code >= 500:
+                    trace.root.status = "error"
+        return response
+
+    def _teardown(self, exc):
+        trace = g.pop("_trace", None)
+        if trace is None or trace.root is None:
+            return
+        if exc is not None:
+            trace.root.status = "error"
+            trace.root.set(error=f"{type(exc).__name__}: {exc}")
+        trace.root.end()
+        spans = [trace.root] + trace.spans
+        try:
+            self.exporter.export([span.to_dict(trace, self.service) for span in spans])
+        except OSError as e:
+            print(f"⚠️  Could not write spans: {e}")
+
+    @contextmanager
+    def _span(self, trace, name, attributes):
+        span = Span(name, trace.stack[-1].span_id if trace.stack else None, attributes)
+        trace.stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end()
+            trace.stack.pop()
+            trace.spans.append(span)
+
+    def span(self, name, **attributes):
+        """
+        Context manager timing a child span of the current request.
+
+        Yields the Span (span.set(key=value) adds attributes), or
+        None when tracing is off or outside a request.
+        """
+        trace = self.current() if self.enabled else None
+        if trace is None or not trace.recording:
+            return _NOOP
+        return self._span(trace, name, attributes)